@@ -1,5 +1,171 @@
 """Génération des PNG d'astrométrie (WCS + image).
 
-v0.8.1:
-- À remplir en migrant la génération PNG existante, sans changer la sortie.
+FR:
+- Migré depuis generate_gallery.py (même figure 6×9 po à 160 dpi).
+- Chemin rapide: l'image est réduite par blocs (moyenne) jusqu'au budget de pixels de
+  la figure, le WCS est ajusté en conséquence (CRPIX, CDELT/CD, SIP) et les limites
+  ZScale sont calculées sur un échantillon; le PNG reste visuellement identique.
+
+EN:
+- Migrated from generate_gallery.py (same 6×9 in figure at 160 dpi).
+- Fast path: the image is block-averaged down to the figure's pixel budget, the WCS is
+  rescaled accordingly (CRPIX, CDELT/CD, SIP) and ZScale limits are computed on a
+  sample; the PNG looks the same.
 """
+
+from __future__ import annotations
+
+import math
+import re
+from pathlib import Path
+
+from astrogalery.site.publish import atomic_output
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except Exception:  # pragma: no cover
+    plt = None  # type: ignore
+
+try:
+    from astropy.io import fits
+    from astropy.wcs import WCS
+    from astropy.visualization import ZScaleInterval, ImageNormalize
+except Exception:  # pragma: no cover
+    fits = None  # type: ignore
+    WCS = None  # type: ignore
+
+FIGSIZE = (6, 9)
+DPI = 160
+# Budget par défaut: nombre de pixels de la figure (la zone d'axes est plus petite)
+DEFAULT_MAX_PIXELS = int(FIGSIZE[0] * DPI * FIGSIZE[1] * DPI)
+ZSCALE_SAMPLE_PIXELS = 250_000
+
+_SIP_COEFF = re.compile(r"^(A|B|AP|BP)_(\d+)_(\d+)$")
+
+
+def bin_factor(shape: tuple[int, int], max_pixels: int) -> int:
+    """Plus petit facteur de réduction entier qui tient dans `max_pixels` (1 = pleine résolution)."""
+    ny, nx = shape
+    if max_pixels <= 0 or ny * nx <= max_pixels:
+        return 1
+    return max(1, math.ceil(math.sqrt((ny * nx) / max_pixels)))
+
+
+def block_reduce(img: np.ndarray, factor: int) -> np.ndarray:
+    """
+    Moyenne par blocs factor×factor (bords incomplets ignorés).
+    Somme de vues décalées: la mémoire reste celle de l'image réduite (memmap OK).
+    """
+    if factor <= 1:
+        return img
+    ny = (img.shape[0] // factor) * factor
+    nx = (img.shape[1] // factor) * factor
+    out = np.zeros((ny // factor, nx // factor), dtype=np.float32)
+    for j in range(factor):
+        for i in range(factor):
+            out += img[j:ny:factor, i:nx:factor]
+    out /= np.float32(factor * factor)
+    return out
+
+
+def rescale_wcs_header(h, factor: int):
+    """
+    Adapte un en-tête WCS à une image réduite d'un facteur entier.
+    FITS (1-based): p = factor * (p' - 0.5) + 0.5.
+    """
+    if factor <= 1:
+        return h
+    h = h.copy()
+    for ax in (1, 2):
+        key = f"CRPIX{ax}"
+        if key in h:
+            h[key] = (float(h[key]) - 0.5) / factor + 0.5
+        key = f"CDELT{ax}"
+        if key in h:
+            h[key] = float(h[key]) * factor
+        for bx in (1, 2):
+            key = f"CD{ax}_{bx}"
+            if key in h:
+                h[key] = float(h[key]) * factor
+    # SIP: u = factor·u' et la distorsion est en pixels -> coeff × factor^(p+q-1)
+    for key in list(h.keys()):
+        m = _SIP_COEFF.match(str(key))
+        if m:
+            p, q = int(m.group(2)), int(m.group(3))
+            h[key] = float(h[key]) * factor ** (p + q - 1)
+    return h
+
+
+def zscale_limits(img: np.ndarray, max_samples: int = ZSCALE_SAMPLE_PIXELS) -> tuple[float, float]:
+    """Limites ZScale calculées sur un échantillon régulier (vue à pas fixe)."""
+    ny, nx = img.shape
+    step = max(1, int(math.sqrt((ny * nx) / max_samples)))
+    sample = np.asarray(img[::step, ::step], dtype=np.float32)
+    sample = sample[np.isfinite(sample)]
+    return ZScaleInterval().get_limits(sample)
+
+
+def make_astrometry_png_from_image_and_wcs(
+    image_array_2d: np.ndarray,
+    wcs_header: fits.Header,
+    out_png: Path,
+    title: str = "",
+    max_pixels: int = DEFAULT_MAX_PIXELS,
+) -> bool:
+    try:
+        h = wcs_header.copy()
+        ny, nx = image_array_2d.shape
+        if h.get("NAXIS", None) is None:
+            h["NAXIS"] = 2
+        if h.get("NAXIS1", None) is None:
+            h["NAXIS1"] = nx
+        if h.get("NAXIS2", None) is None:
+            h["NAXIS2"] = ny
+
+        # Réduction au budget de pixels de la figure (max_pixels=0 -> pleine résolution)
+        factor = bin_factor((ny, nx), max_pixels)
+        if factor > 1:
+            image_array_2d = block_reduce(image_array_2d, factor)
+            ny, nx = image_array_2d.shape
+            h = rescale_wcs_header(h, factor)
+            h["NAXIS1"] = nx
+            h["NAXIS2"] = ny
+
+        wcs = WCS(h, naxis=2)
+        vmin, vmax = zscale_limits(image_array_2d)
+        norm = ImageNormalize(vmin=vmin, vmax=vmax)
+
+        fig = plt.figure(figsize=FIGSIZE, dpi=DPI)
+        ax = fig.add_subplot(111, projection=wcs)
+
+        ax.imshow(image_array_2d, origin="lower", norm=norm)
+        ax.grid(color="white", alpha=0.35, linestyle="-", linewidth=0.6)
+        ax.set_xlabel("RA")
+        ax.set_ylabel("DEC")
+
+        if title:
+            ax.set_title(title, fontsize=11)
+
+        cx, cy = nx / 2, ny / 2
+        radius_pix = min(nx, ny) * 0.33
+        ax.add_patch(plt.Circle((cx, cy), radius_pix, fill=False, lw=1.2, alpha=0.85))
+
+        out_png.parent.mkdir(parents=True, exist_ok=True)
+        fig.tight_layout()
+        # Nouveau fichier (os.replace): un PNG publié par lien physique n'est pas écrasé en place
+        with atomic_output(out_png) as tmp_png:
+            fig.savefig(tmp_png)
+        plt.close(fig)
+
+        print(f"[OK] PNG écrit (image+WCS): {out_png}")
+        return True
+    except Exception as e:
+        print(f"\n[WARN] PNG astrométrie impossible: {e}")
+        return False
@@ -0,0 +1,203 @@
+"""Manifeste de build incrémental (entrées → sorties).
+
+FR:
+- Mémorise les empreintes des entrées (JPG/FITS, catalogues XLSX, enrichissement SIMBAD)
+  et la signature de chaque fichier produit dans `site/`.
+- Une sortie n'est réécrite que si sa signature change; les sorties qui ne sont plus
+  produites (observations supprimées, objets renommés) sont effacées en fin de build.
+
+EN:
+- Remembers input fingerprints (JPG/FITS, XLSX catalogs, SIMBAD enrichment) and the
+  signature of every file written to `site/`.
+- An output is rewritten only when its signature changes; outputs that are no longer
+  produced (deleted observations, renamed objects) are removed at the end of the build.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Any, Iterable
+
+from astrogalery.cache import file_fingerprint, load_json, save_json
+from astrogalery.site.asset_store import AssetStore
+from astrogalery.site.publish import atomic_output, publish_file
+
+MANIFEST_VERSION = 1
+
+
+def signature(*parts: Any) -> str:
+    """Signature stable (sha1) d'un ensemble de valeurs JSON-sérialisables."""
+    raw = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class BuildManifest:
+    """
+    FR: Suivi des entrées/sorties d'un build. `reset=True` ignore le manifeste précédent
+        (build complet), mais le nouveau manifeste est tout de même sauvegardé.
+    EN: Tracks build inputs/outputs. `reset=True` ignores the previous manifest (full
+        build) while still saving a fresh one for the next incremental run.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        out_dir: Path,
+        reset: bool = False,
+        publish_mode: str = "copy",
+        asset_store: AssetStore | None = None,
+    ):
+        self.path = path
+        self.out_dir = out_dir
+        self.publish_mode = publish_mode
+        self.asset_store = asset_store
+        self.published: Counter = Counter()
+        data = {} if reset else load_json(path)
+        if data.get("version") != MANIFEST_VERSION:
+            data = {}
+        self.prev_inputs: dict = data.get("inputs", {}) or {}
+        self.prev_outputs: dict = data.get("outputs", {}) or {}
+        self.inputs: dict = {}
+        self.outputs: dict = {}
+        self.written = 0
+        self.skipped = 0
+        # compteurs mis à jour depuis les threads du pipeline dag / stream
+        self.lock = threading.Lock()
+
+    def _count(self, written: bool, published: str | None = None) -> None:
+        with self.lock:
+            if written:
+                self.written += 1
+            else:
+                self.skipped += 1
+            if published is not None:
+                self.published[published] += 1
+
+    # --- Entrées / inputs ---
+    def cached_input(self, key: str, fingerprints: dict) -> dict | None:
+        """Retourne l'enregistrement précédent si toutes les empreintes sont identiques."""
+        rec = self.prev_inputs.get(key)
+        if not rec:
+            return None
+        if rec.get("fingerprints") != fingerprints:
+            return None
+        return rec
+
+    def record_input(self, key: str, fingerprints: dict, **data: Any) -> None:
+        self.inputs[key] = {"fingerprints": fingerprints, **data}
+
+    # --- Sorties / outputs ---
+    def is_current(self, rel: str | Path, sig: str) -> bool:
+        rel = Path(rel).as_posix()
+        return self.prev_outputs.get(rel) == sig and (self.out_dir / rel).exists()
+
+    def mark(self, rel: str | Path, sig: str) -> None:
+        self.outputs[Path(rel).as_posix()] = sig
+
+    def write_text(self, rel: str | Path, text: str, sig: str | None = None) -> bool:
+        return self.write_bytes(rel, text.encode("utf-8"), sig)
+
+    def write_bytes(self, rel: str | Path, data: bytes, sig: str | None = None) -> bool:
+        """Écrit `data` seulement si la signature a changé. Retourne True si écrit."""
+        if sig is None:
+            sig = hashlib.sha1(data).hexdigest()
+        if self.is_current(rel, sig):
+            self.mark(rel, sig)
+            self._count(False)
+            return False
+        with atomic_output(self.out_dir / rel) as tmp:
+            tmp.write_bytes(data)
+        self.mark(rel, sig)
+        self._count(True)
+        return True
+
+    def write_chunks(self, rel: str | Path, chunks: Iterable[bytes]) -> bool:
+        """
+        Comme write_bytes pour un contenu produit par morceaux (jamais entier en mémoire):
+        écrit dans un fichier temporaire en calculant la signature, remplace la sortie
+        seulement si elle a changé.
+        """
+        dst = self.out_dir / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        tmp = dst.with_name(f".{dst.name}.{os.getpid()}.tmp")
+        h = hashlib.sha1()
+        try:
+            with open(tmp, "wb") as f:
+                for chunk in chunks:
+                    h.update(chunk)
+                    f.write(chunk)
+            sig = h.hexdigest()
+            if self.is_current(rel, sig):
+                self.mark(rel, sig)
+                self._count(False)
+                return False
+            os.replace(tmp, dst)
+        finally:
+            if tmp.exists():
+                tmp.unlink()
+        self.mark(rel, sig)
+        self._count(True)
+        return True
+
+    def copy_file(self, src: Path, rel: str | Path) -> bool:
+        """Publie `src` vers `site/rel` (mode `publish_mode`) seulement si la source a changé."""
+        sig = signature(str(src), file_fingerprint(src))
+        if self.is_current(rel, sig):
+            self.mark(rel, sig)
+            self._count(False)
+            return False
+        mode = publish_file(src, self.out_dir / rel, self.publish_mode)
+        self.mark(rel, sig)
+        self._count(True, mode)
+        return True
+
+    def copy_tree(self, src_dir: Path, rel_dir: str | Path) -> None:
+        """Publie un dossier (ex. pyramide de tuiles) fichier par fichier sous `site/rel_dir`."""
+        for dirpath, _, filenames in os.walk(src_dir):
+            for fn in filenames:
+                src = Path(dirpath) / fn
+                self.copy_file(src, Path(rel_dir) / src.relative_to(src_dir))
+
+    def publish_asset(self, src: Path, rel: str | Path) -> Path:
+        """
+        Publie un asset et retourne son chemin dans site/: `rel` tel quel, ou avec un
+        magasin adressé par contenu, le chemin haché (un seul fichier par contenu).
+        """
+        if self.asset_store is None:
+            self.copy_file(src, rel)
+            return Path(rel)
+        hashed_rel, digest = self.asset_store.path_for(src, rel)
+        key = hashed_rel.as_posix()
+        if key in self.outputs or self.is_current(hashed_rel, digest):
+            self.mark(hashed_rel, digest)
+            self._count(False)
+            return hashed_rel
+        mode = publish_file(src, self.out_dir / hashed_rel, self.publish_mode)
+        self.mark(hashed_rel, digest)
+        self._count(True, mode)
+        return hashed_rel
+
+    def remove_stale(self) -> list[str]:
+        """Supprime les sorties du build précédent qui n'ont pas été produites cette fois-ci."""
+        removed = []
+        for rel in sorted(set(self.prev_outputs) - set(self.outputs)):
+            p = self.out_dir / rel
+            try:
+                if p.is_file() or p.is_symlink():
+                    p.unlink()
+                    removed.append(rel)
+            except Exception as e:
+                print(f"[WARN] Suppression sortie obsolète impossible: {p} ({e})")
+        return removed
+
+    def save(self) -> None:
+        save_json(self.path, {
+            "version": MANIFEST_VERSION,
+            "inputs": self.inputs,
+            "outputs": self.outputs,
+        })
@@ -1,16 +1,69 @@
-"""Cache local simple (JSON).
+"""Cache local: magasin SQLite unifié (espaces de noms) + utilitaires JSON.
 
 FR: Utilisé pour éviter de refaire des appels réseau (Simbad, Open-Meteo, Nova...).
 EN: Used to avoid re-fetching network resources (Simbad, Open-Meteo, Nova...).
 
 v0.8.1:
 - Fournit un utilitaire générique; l'intégration se fera sans changer le comportement.
+
+Magasin unifié / unified store (`cache/cache.sqlite`):
+- FR:
+  - Une table (espace de noms, clé) -> valeur JSON compacte; une écriture = un upsert
+    atomique d'une seule clé, sans réécrire le reste du cache.
+  - Mode WAL: lecteurs concurrents (threads, processus de rendu) pendant une écriture;
+    une connexion par processus (recréée après un fork).
+  - Schéma versionné (`PRAGMA user_version`, étapes de migration numérotées).
+  - `import_json`: migration unique d'un ancien fichier JSON vers un espace de noms
+    (le fichier n'est pas modifié, l'import est mémorisé).
+  - `CacheNamespace`: vue dict d'un espace de noms (API proche de JsonCache).
+- EN:
+  - One table (namespace, key) -> compact JSON value; a write is an atomic single-key
+    upsert, the rest of the cache is not rewritten.
+  - WAL mode: concurrent readers (threads, render processes) during a write; one
+    connection per process (re-created after a fork).
+  - Versioned schema (`PRAGMA user_version`, numbered migration steps).
+  - `import_json`: one-time migration of a legacy JSON file into a namespace (the file
+    is left untouched, the import is recorded).
+  - `CacheNamespace`: dict view of a namespace (JsonCache-like API).
 """
 
 from __future__ import annotations
+from collections.abc import MutableMapping
+from datetime import datetime
 from pathlib import Path
 import json
-from typing import Any
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Iterator
+
+CACHE_STORE_PATH = Path(os.environ.get("GNU_ASTRO_GALERY_CACHE_DB", str(Path("cache") / "cache.sqlite")))
+CACHE_STORE_VERSION = 1
+
+# Version -> script SQL qui amène le schéma de la version précédente à celle-ci
+_SCHEMA_STEPS = {
+    1: """
+    CREATE TABLE IF NOT EXISTS entries (
+        ns      TEXT NOT NULL,
+        key     TEXT NOT NULL,
+        value   TEXT NOT NULL,
+        updated REAL NOT NULL,
+        PRIMARY KEY (ns, key)
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS imports (
+        source   TEXT PRIMARY KEY,
+        ns       TEXT NOT NULL,
+        entries  INTEGER NOT NULL,
+        imported TEXT NOT NULL
+    );
+    """,
+}
+
+_UPSERT = (
+    "INSERT INTO entries (ns, key, value, updated) VALUES (?, ?, ?, ?)"
+    " ON CONFLICT (ns, key) DO UPDATE SET value = excluded.value, updated = excluded.updated"
+)
 
 def load_json(path: Path) -> dict:
     if not path.exists():
@@ -24,6 +77,13 @@ def save_json(path: Path, data: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
 
+def file_fingerprint(p: Path) -> str:
+    """
+    Fingerprint rapide et stable (sans lire tout le fichier), pratique en local.
+    """
+    st = p.stat()
+    return f"{st.st_size}-{st.st_mtime_ns}"
+
 class JsonCache:
     def __init__(self, path: Path):
         self.path = path
@@ -37,3 +97,211 @@ class JsonCache:
 
     def persist(self) -> None:
         save_json(self.path, self.data)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+class CacheStore:
+    """
+    FR: Magasin de cache SQLite (WAL) partagé par tous les caches de la galerie.
+    EN: SQLite (WAL) cache store shared by every gallery cache.
+    """
+
+    def __init__(self, path: Path = CACHE_STORE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self._conn: sqlite3.Connection | None = None
+        self._pid = 0
+        with self.lock:
+            self._upgrade(self._connection())
+
+    def _connection(self) -> sqlite3.Connection:
+        # Connexion par processus: un processus fils (fork) ne réutilise pas celle du parent
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=30.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute("PRAGMA synchronous = NORMAL")
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def _upgrade(self, conn: sqlite3.Connection) -> None:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            if version > CACHE_STORE_VERSION:
+                raise RuntimeError(
+                    f"{self.path}: schéma de cache v{version} plus récent que ce programme (v{CACHE_STORE_VERSION})"
+                )
+            for step in range(version + 1, CACHE_STORE_VERSION + 1):
+                for statement in _SCHEMA_STEPS[step].split(";"):
+                    if statement.strip():
+                        conn.execute(statement)
+                conn.execute(f"PRAGMA user_version = {step}")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    # --- Lecture / read ---
+    def get(self, ns: str, key: str, default: Any = None) -> Any:
+        with self.lock:
+            row = self._connection().execute(
+                "SELECT value FROM entries WHERE ns = ? AND key = ?", (ns, key)
+            ).fetchone()
+        return default if row is None else json.loads(row[0])
+
+    def contains(self, ns: str, key: str) -> bool:
+        with self.lock:
+            return self._connection().execute(
+                "SELECT 1 FROM entries WHERE ns = ? AND key = ?", (ns, key)
+            ).fetchone() is not None
+
+    def keys(self, ns: str) -> list[str]:
+        with self.lock:
+            return [r[0] for r in self._connection().execute("SELECT key FROM entries WHERE ns = ?", (ns,))]
+
+    def items(self, ns: str) -> dict[str, Any]:
+        with self.lock:
+            rows = self._connection().execute("SELECT key, value FROM entries WHERE ns = ?", (ns,)).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def count(self, ns: str) -> int:
+        with self.lock:
+            return self._connection().execute("SELECT COUNT(*) FROM entries WHERE ns = ?", (ns,)).fetchone()[0]
+
+    # --- Écriture / write ---
+    def set(self, ns: str, key: str, value: Any) -> None:
+        """Upsert atomique d'une seule clé."""
+        with self.lock:
+            self._connection().execute(_UPSERT, (ns, key, _dumps(value), time.time()))
+
+    def set_many(self, ns: str, values: dict[str, Any]) -> None:
+        """Plusieurs upserts dans une seule transaction."""
+        if not values:
+            return
+        now = time.time()
+        rows = [(ns, k, _dumps(v), now) for k, v in values.items()]
+        with self.lock:
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(_UPSERT, rows)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    def delete(self, ns: str, key: str) -> None:
+        with self.lock:
+            self._connection().execute("DELETE FROM entries WHERE ns = ? AND key = ?", (ns, key))
+
+    def namespace(self, ns: str) -> "CacheNamespace":
+        return CacheNamespace(self, ns)
+
+    # --- Migration des anciens fichiers JSON / legacy JSON files ---
+    def import_json(self, ns: str, path: Path) -> int:
+        """
+        Importe une fois `path` ({clé: valeur}) dans `ns`; les clés déjà présentes dans le
+        magasin sont gardées. Retourne le nombre d'entrées importées (0 si déjà fait / absent).
+        """
+        path = Path(path)
+        source = str(path.resolve())
+        with self.lock:
+            conn = self._connection()
+            if conn.execute("SELECT 1 FROM imports WHERE source = ?", (source,)).fetchone() is not None:
+                return 0
+            data = load_json(path) if path.exists() else {}
+            if not isinstance(data, dict):
+                data = {}
+            now = time.time()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO entries (ns, key, value, updated) VALUES (?, ?, ?, ?)",
+                    [(ns, str(k), _dumps(v), now) for k, v in data.items()],
+                )
+                conn.execute(
+                    "INSERT INTO imports (source, ns, entries, imported) VALUES (?, ?, ?, ?)",
+                    (source, ns, len(data), datetime.now().isoformat(timespec="seconds")),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return len(data)
+
+    def close(self) -> None:
+        with self.lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+class CacheNamespace(MutableMapping):
+    """
+    Vue dict d'un espace de noms: `ns[key] = value` est un upsert immédiat, les valeurs
+    lues sont des copies (réaffecter après modification). `get` / `set` / `persist`
+    gardent l'API de JsonCache (`persist` n'a rien à faire).
+    """
+
+    def __init__(self, store: CacheStore, ns: str):
+        self.store = store
+        self.ns = ns
+
+    def __getitem__(self, key: str) -> Any:
+        missing = object()
+        value = self.store.get(self.ns, key, missing)
+        if value is missing:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self.store.set(self.ns, key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if not self.store.contains(self.ns, key):
+            raise KeyError(key)
+        self.store.delete(self.ns, key)
+
+    def __contains__(self, key: object) -> bool:
+        return isinstance(key, str) and self.store.contains(self.ns, key)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.store.keys(self.ns))
+
+    def __len__(self) -> int:
+        return self.store.count(self.ns)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self.store.get(self.ns, key, default)
+
+    def set(self, key: str, value: Any) -> None:
+        self.store.set(self.ns, key, value)
+
+    def update(self, other=(), **kwargs) -> None:
+        values = dict(other, **kwargs)
+        self.store.set_many(self.ns, values)
+
+    def to_dict(self) -> dict[str, Any]:
+        return self.store.items(self.ns)
+
+    def persist(self) -> None:
+        pass
+
+
+_DEFAULT_STORE: CacheStore | None = None
+_DEFAULT_LOCK = threading.Lock()
+
+
+def get_cache_store(path: Path | None = None) -> CacheStore:
+    """Magasin partagé du processus (`cache/cache.sqlite` relatif au dossier courant par défaut)."""
+    global _DEFAULT_STORE
+    with _DEFAULT_LOCK:
+        if _DEFAULT_STORE is None or (path is not None and _DEFAULT_STORE.path != Path(path)):
+            if _DEFAULT_STORE is not None:
+                _DEFAULT_STORE.close()
+            _DEFAULT_STORE = CacheStore(path or CACHE_STORE_PATH)
+        return _DEFAULT_STORE
@@ -1,5 +1,416 @@
 """Carte stellaire type atlas + labels (Messier + objetsdivers mag<=6).
 
-v0.8.1:
-- À remplir en migrant la génération actuelle.
+FR:
+- Migré depuis generate_gallery.py (même rendu: Hipparcos, lignes de constellations
+  Stellarium, cercle du champ Seestar, labels SIMBAD/objets divers).
+- Aucun appel réseau: le cone search SIMBAD est fait par l'appelant et passé en
+  `nearby`; l'index des constellations est téléchargé par generate_gallery.py.
+- Hipparcos et les lignes de constellations sont gardés en mémoire par processus
+  (chargés une fois dans l'initialiseur des processus de rendu).
+
+EN:
+- Migrated from generate_gallery.py (same rendering: Hipparcos, Stellarium constellation
+  lines, Seestar field circle, SIMBAD / miscellaneous-object labels).
+- No network access: the SIMBAD cone search is done by the caller and passed as
+  `nearby`; the constellation index is downloaded by generate_gallery.py.
+- Hipparcos and constellation lines are kept in memory per process (loaded once in
+  the render workers' initializer).
 """
+
+from __future__ import annotations
+
+import json
+import re
+from pathlib import Path
+
+from astrogalery.site.publish import atomic_output
+
+try:
+    import numpy as np
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+
+try:
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+except Exception:  # pragma: no cover
+    plt = None  # type: ignore
+
+try:
+    from skyfield.api import load as sf_load
+    from skyfield.data import hipparcos as sf_hipparcos
+    from astropy.coordinates import SkyCoord, SkyOffsetFrame
+    import astropy.units as u
+    HAS_ATLAS = True
+except Exception:  # pragma: no cover
+    HAS_ATLAS = False
+
+FOV_ARCMIN_DEFAULT = 240.0
+MAG_LIMIT_DEFAULT = 10.0
+DIVERSE_MAG_LIMIT_DEFAULT = 6.0
+# Rayon du cone search SIMBAD / de la présélection Hipparcos: demi-champ × marge
+CONE_MARGIN = 1.35
+
+
+def cone_radius_deg(fov_arcmin: float) -> float:
+    """Rayon (degrés) à interroger pour une carte de champ total `fov_arcmin`."""
+    return (fov_arcmin / 60.0) / 2.0 * CONE_MARGIN
+
+
+def clean_main_id_for_label(main_id: str) -> str:
+    s = (main_id or "").strip()
+    s = re.sub(r"\s+", " ", s)
+    return s
+
+
+_HIP_DF = None
+
+_CONSTELLATION_LINES = None
+
+
+def load_hipparcos_df():
+    """Charge le dataframe Hipparcos via Skyfield (cache disque + cache mémoire)."""
+    global _HIP_DF
+    if _HIP_DF is not None:
+        return _HIP_DF
+    try:
+        # Skyfield gère le cache disque automatiquement (dans son répertoire de cache)
+        with sf_load.open(sf_hipparcos.URL) as f:
+            df = sf_hipparcos.load_dataframe(f)
+        # df index = HIP
+        _HIP_DF = df
+        return df
+    except Exception as e:
+        print(f"[WARN] Carte atlas: chargement Hipparcos impossible: {e}")
+        return None
+
+
+def load_constellation_lines(index_json: Path):
+    """
+    Charge les lignes de constellations depuis 'western/index.json' (Stellarium skyculture JSON).
+
+    Retour: list[tuple[str, list[tuple[int,int]]]]
+      - str: abréviation IAU (ex: 'Aql') si présente, sinon identifiant de constellation
+      - segments: liste de paires (HIP_a, HIP_b)
+    """
+    global _CONSTELLATION_LINES
+    if _CONSTELLATION_LINES is not None:
+        return _CONSTELLATION_LINES
+
+    if not index_json.exists():
+        _CONSTELLATION_LINES = []
+        return _CONSTELLATION_LINES
+
+    try:
+        data = json.loads(index_json.read_text(encoding="utf-8", errors="ignore"))
+        consts = data.get("constellations", [])
+        out = []
+        for c in consts:
+            label = c.get("iau") or c.get("id") or "CON"
+            segs = []
+            for path in c.get("lines", []) or []:
+                # path: [hip, hip, hip] ou ["thin"/"bold", hip, hip, ...]
+                if not path:
+                    continue
+                if isinstance(path[0], str):
+                    stars = path[1:]
+                else:
+                    stars = path
+                # segments successifs
+                for a, b in zip(stars, stars[1:]):
+                    try:
+                        ia = int(a); ib = int(b)
+                        segs.append((ia, ib))
+                    except Exception:
+                        continue
+            if segs:
+                out.append((label, segs))
+
+        _CONSTELLATION_LINES = out
+        return _CONSTELLATION_LINES
+
+    except Exception as e:
+        print(f"[WARN] Carte atlas: lecture/parsing index.json impossible: {e}")
+        _CONSTELLATION_LINES = []
+        return _CONSTELLATION_LINES
+
+
+def make_finder_chart_png(
+    ra_deg: float,
+    dec_deg: float,
+    out_png: Path,
+    fov_arcmin: float | None = None,
+    inner_fov_arcmin: float = 30.0,
+    title: str = "",
+    diverse_catalog: list[dict] | None = None,
+    diverse_mag_limit: float = DIVERSE_MAG_LIMIT_DEFAULT,
+    nearby: list[dict] | None = None,
+    mag_limit: float = MAG_LIMIT_DEFAULT,
+    constellations: list | None = None,
+) -> bool:
+    """
+    Génère une carte 'atlas' (grille RA/Dec, étoiles, lignes de constellations) centrée sur (RA,DEC).
+    - rendu local open source (matplotlib + astropy + skyfield)
+    - nécessite une connexion Internet seulement au *premier* lancement (cache Skyfield + Stellarium)
+    - `nearby`: résultat du cone search SIMBAD, fait par l'appelant (aucun appel réseau ici)
+    - `constellations`: lignes déjà chargées (load_constellation_lines), sinon celles en mémoire
+    """
+    if not HAS_ATLAS:
+        print("[WARN] Carte atlas: dépendances manquantes (pip install skyfield)")
+        return False
+
+    df = load_hipparcos_df()
+    if df is None:
+        return False
+
+    cons = constellations if constellations is not None else (_CONSTELLATION_LINES or [])
+
+    try:
+        center = SkyCoord(ra=ra_deg * u.deg, dec=dec_deg * u.deg, frame="icrs")
+        frame = SkyOffsetFrame(origin=center)
+        if fov_arcmin is None:
+            fov_arcmin = FOV_ARCMIN_DEFAULT
+        radius_deg = (fov_arcmin / 60.0) / 2.0
+        margin_deg = radius_deg * CONE_MARGIN
+
+        # Pré-sélection rapide par boîte (sur la sphère c'est approximatif mais OK pour réduire)
+        ra = df["ra_degrees"].to_numpy()
+        dec = df["dec_degrees"].to_numpy()
+        mag = df["magnitude"].to_numpy()
+
+        # distance angulaire précise avec astropy (sur subset)
+        stars = SkyCoord(ra=ra * u.deg, dec=dec * u.deg, frame="icrs")
+        sep = stars.separation(center).deg
+        msk = (sep <= margin_deg) & (mag == mag)  # mag not NaN
+        if msk.sum() == 0:
+            print("[WARN] Carte atlas: aucune étoile Hipparcos dans le champ")
+            return False
+
+        stars_sel = stars[msk].transform_to(frame)
+        mag_sel = mag[msk]
+
+        x = stars_sel.lon.to(u.deg).value * 60.0  # arcmin
+        y = stars_sel.lat.to(u.deg).value * 60.0
+
+        # taille des points: magnitude -> taille
+        # Hipparcos: mag plus petite = plus brillant
+        s = (np.clip((mag_limit - mag_sel + 1.0), 0.2, 6.0) ** 2) * 3.0
+
+        out_png.parent.mkdir(parents=True, exist_ok=True)
+
+        fig = plt.figure(figsize=(8, 8), dpi=160)
+        ax = plt.gca()
+        ax.scatter(x, y, s=s, alpha=0.85)
+
+        # convention carte du ciel: Est à gauche
+        ax.invert_xaxis()
+
+        half = radius_deg * 60.0
+        ax.set_xlim(half, -half)
+        ax.set_ylim(-half, half)
+        ax.set_aspect("equal", "box")
+
+        # Grille (arcmin)
+        ax.grid(True, linewidth=0.4, alpha=0.6)
+        ax.set_xlabel("ΔRA cos(Dec) (arcmin)")
+        ax.set_ylabel("ΔDec (arcmin)")
+
+
+        # cercle FOV (Seestar) à l'intérieur de la carte (atlas)
+        inner_half = max(1.0, float(inner_fov_arcmin) / 2.0)  # arcmin
+        ax.add_patch(plt.Circle((0, 0), inner_half, fill=False, linewidth=1.2))
+        ax.annotate(f"FOV {inner_fov_arcmin:.0f}'", xy=(inner_half, 0), xytext=(inner_half+3, 0), va="center")
+
+
+        # Lignes de constellations (si dispo)
+        # On trace seulement les segments dont les 2 étoiles tombent dans la marge
+        if cons:
+            # Accès rapide HIP -> (x,y) dans la même projection:
+            # On recalcule pour les HIPs utiles en évitant de transformer tout le catalogue.
+            # Dictionnaire hip->SkyCoord projeté
+            # df index contient les HIP
+            hip_xy = {}
+            def get_xy(hip:int):
+                if hip in hip_xy:
+                    return hip_xy[hip]
+                try:
+                    row = df.loc[hip]
+                    sc = SkyCoord(ra=float(row["ra_degrees"]) * u.deg, dec=float(row["dec_degrees"]) * u.deg, frame="icrs")
+                    if sc.separation(center).deg > margin_deg:
+                        hip_xy[hip] = None
+                        return None
+                    off = sc.transform_to(frame)
+                    xx = off.lon.to(u.deg).value * 60.0
+                    yy = off.lat.to(u.deg).value * 60.0
+                    hip_xy[hip] = (xx, yy)
+                    return (xx, yy)
+                except Exception:
+                    hip_xy[hip] = None
+                    return None
+
+            for abbr, segs in cons:
+                pts_for_label = []
+                for h1, h2 in segs:
+                    p1 = get_xy(h1)
+                    p2 = get_xy(h2)
+                    if p1 is None or p2 is None:
+                        continue
+                    ax.plot([p1[0], p2[0]], [p1[1], p2[1]], linewidth=0.6, alpha=0.7)
+                    pts_for_label.append(p1)
+                    pts_for_label.append(p2)
+                # label: moyenne si on a assez de points
+                if pts_for_label:
+                    xs = [p[0] for p in pts_for_label]
+                    ys = [p[1] for p in pts_for_label]
+                    cx = float(np.mean(xs))
+                    cy = float(np.mean(ys))
+                    if -half < cy < half and -half < cx < half:
+                        ax.text(cx, cy, abbr, fontsize=8, alpha=0.8, ha="center", va="center")
+
+        # marqueur cible
+        ax.scatter([0], [0], s=80, marker="x")
+
+        # label de l'objet au centre (cible)
+        target_label = title.strip()
+        if target_label:
+            ax.text(0.0, -half * 0.92, target_label, fontsize=10, ha="center", va="top")
+
+        # objets "pertinents" proches via SIMBAD (Messier d'abord, puis étoiles connues/lumineuses)
+        nearby = nearby or []
+
+        # Projeter et choisir quelques labels sans trop d'encombrement
+        if nearby or diverse_catalog:
+            placed = []  # list of (x,y)
+            max_labels = 10
+
+            # --- Labels pertinents (atlas) ---
+            # Règle: afficher uniquement
+            #  1) Objets Messier (via SIMBAD cone) dans le champ
+            #  2) Objets provenant de 'objetsdivers.xlsx' avec magnitude <= diverse_mag_limit dans le champ
+            label_candidates = []
+
+            # 1) Messier (depuis SIMBAD cone)
+            for it in nearby:
+                mid_raw = str(it.get("main_id","") or "").strip()
+                if re.match(r"^M\s*\d+\b", mid_raw.upper()):
+                    label_candidates.append(it)
+
+            # 2) Objets divers (catalogue local)
+            if diverse_catalog:
+                try:
+                    center_icrs = SkyCoord(ra=ra_deg * u.deg, dec=dec_deg * u.deg, frame="icrs")
+                    half_deg = (fov_arcmin / 60.0) / 2.0
+                    for ob in diverse_catalog:
+                        mag = ob.get("mag", None)
+                        if mag is None:
+                            continue
+                        try:
+                            if float(mag) > float(diverse_mag_limit):
+                                continue
+                        except Exception:
+                            continue
+                        try:
+                            c = SkyCoord(ra=float(ob["ra_deg"]) * u.deg, dec=float(ob["dec_deg"]) * u.deg, frame="icrs")
+                            if float(c.separation(center_icrs).deg) <= (half_deg * 1.05):
+                                label_candidates.append({
+                                    "main_id": ob.get("name",""),
+                                    "ra": float(ob["ra_deg"]),
+                                    "dec": float(ob["dec_deg"]),
+                                    "otype": "CAT",
+                                    "otype_txt": f'{ob.get("sheet","")}',
+                                    "mag": float(mag),
+                                })
+                        except Exception:
+                            continue
+                except Exception:
+                    pass
+
+            # trier: Messier d'abord, puis magnitude ascendante, puis distance au centre
+            center_icrs = SkyCoord(ra=ra_deg * u.deg, dec=dec_deg * u.deg, frame="icrs")
+
+            def _is_messier(it):
+                return bool(re.match(r"^M\s*\d+\b", str(it.get("main_id","")).upper()))
+
+            def _mag(it):
+                try:
+                    return float(it.get("mag", 99.0))
+                except Exception:
+                    return 99.0
+
+            def _dist_deg(it):
+                try:
+                    c = SkyCoord(ra=float(it["ra"]) * u.deg, dec=float(it["dec"]) * u.deg, frame="icrs")
+                    return float(c.separation(center_icrs).deg)
+                except Exception:
+                    return 999.0
+
+            nearby_sorted = sorted(
+                label_candidates,
+                key=lambda it: (0 if _is_messier(it) else 1, _mag(it), _dist_deg(it))
+            )
+            for it in nearby_sorted:
+                mid = clean_main_id_for_label(it.get("main_id",""))
+                if not mid:
+                    continue
+                # ne pas répéter le titre central si c'est le même
+                if target_label and mid.upper() == target_label.upper():
+                    continue
+
+                try:
+                    c = SkyCoord(
+                        ra=float(it["ra"]) * u.deg,
+                        dec=float(it["dec"]) * u.deg,
+                        frame="icrs",
+                    ).transform_to(frame)
+                    # IMPORTANT: la carte est en **arcmin** (comme les étoiles Hipparcos plus haut)
+                    # Donc on convertit lon/lat (degrés) -> arcmin pour positionner correctement les labels.
+                    x = float(c.lon.to(u.deg).value * 60.0)
+                    y = float(c.lat.to(u.deg).value * 60.0)
+                except Exception:
+                    continue
+
+                if not (-half < x < half and -half < y < half):
+                    continue
+
+                # anti-collision simple
+                ok = True
+                # (x,y) en arcmin -> distance mini en arcmin
+                min_sep = 6.0  # arcmin (évite que les noms se pile au centre)
+                for (px, py) in placed:
+                    if (x - px) ** 2 + (y - py) ** 2 < (min_sep ** 2):
+                        ok = False
+                        break
+                if not ok:
+                    continue
+
+                ax.scatter([x], [y], s=18, marker="o", alpha=0.9)
+                # placer le texte légèrement sous le symbole (en arcmin)
+                ax.text(x, y - 2.0, mid, fontsize=7.5, ha="center", va="top", alpha=0.9)
+                placed.append((x, y))
+
+                if len(placed) >= max_labels:
+                    break
+
+
+        ttl = title.strip() or "Carte (atlas)"
+        ax.set_title(ttl)
+
+        with atomic_output(out_png) as tmp_png:
+            fig.savefig(tmp_png, bbox_inches="tight")
+        plt.close(fig)
+        return True
+    except Exception as e:
+        print(f"[WARN] Carte atlas impossible: {e}")
+        return False
+
+
+def ensure_hipparcos_file() -> None:
+    """Télécharge le catalogue Hipparcos dans le cache Skyfield s'il manque (sans le charger)."""
+    if not HAS_ATLAS:
+        return
+    try:
+        with sf_load.open(sf_hipparcos.URL):
+            pass
+    except Exception as e:
+        print(f"[WARN] Carte atlas: téléchargement Hipparcos impossible: {e}")
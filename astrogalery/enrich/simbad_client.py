@@ -1,5 +1,110 @@
-"""Client SIMBAD + cache.
+"""Client SIMBAD (TAP) — résolution d'identifiants par lots.
 
-v0.8.1:
-- À remplir en migrant le code existant (requêtes, parsing, backoff).
+FR:
+- `resolve_idents`: tous les identifiants non cachés d'un scan sont résolus en quelques
+  requêtes TAP (`WHERE i.id IN (...)`, par lots de BATCH_SIZE) au lieu d'un aller-retour
+  par dossier; les lots partent en parallèle dans les limites de l'hôte.
+- Les réponses sont rapprochées des demandes par identifiant normalisé (espaces
+  regroupés, majuscules): SIMBAD renvoie `M  31` pour une demande `m 31`.
+- Résultat par identifiant: dict (main_id, otype, otype_txt), None (inconnu de SIMBAD)
+  ou l'exception du lot (réseau / service): l'appelant en fait ses entrées de cache.
+
+EN:
+- `resolve_idents`: every uncached identifier of a scan is resolved in a few TAP queries
+  (`WHERE i.id IN (...)`, BATCH_SIZE per batch) instead of one round trip per folder;
+  batches run concurrently within the host limits.
+- Answers are matched to requests by normalised identifier (collapsed spaces,
+  upper case): SIMBAD returns `M  31` for a `m 31` request.
+- Per identifier result: dict (main_id, otype, otype_txt), None (unknown to SIMBAD) or
+  the batch's exception (network / service): the caller turns these into cache entries.
 """
+
+from __future__ import annotations
+
+import re
+from typing import Iterable
+
+from astrogalery import http_client, net
+
+SIMBAD_TAP_DEFAULT = "https://simbad.cds.unistra.fr/simbad/sim-tap/sync"
+BATCH_SIZE = 200
+
+_SPACES = re.compile(r"\s+")
+# Sharpless: "Sh2-155" (dossiers, normalize_catalog_id) et "SH 2-155" (SIMBAD) -> même clé
+_SHARPLESS = re.compile(r"^SH ?2 ?- ?0*(\d+)$")
+
+
+def normalize_ident(ident: str) -> str:
+    """Forme de comparaison d'un identifiant SIMBAD: espaces regroupés, majuscules, Sharpless en `SH 2-N`."""
+    s = _SPACES.sub(" ", (ident or "").strip()).upper()
+    m = _SHARPLESS.match(s)
+    if m:
+        return f"SH 2-{m.group(1)}"
+    return s
+
+
+def _adql_quote(s: str) -> str:
+    return "'" + s.replace("'", "''") + "'"
+
+
+def batch_adql(idents: list[str]) -> str:
+    return (
+        "SELECT i.id, b.main_id, b.otype, b.otype_txt\n"
+        "FROM basic AS b\n"
+        "JOIN ident AS i ON i.oidref = b.oid\n"
+        f"WHERE i.id IN ({', '.join(_adql_quote(i) for i in idents)})"
+    )
+
+
+def tap_query(adql: str, tap_url: str = SIMBAD_TAP_DEFAULT) -> list[dict]:
+    """Requête TAP synchrone -> lignes sous forme de dict {colonne: valeur}."""
+    r = http_client.post(
+        tap_url,
+        data={"request": "doQuery", "lang": "adql", "format": "json", "query": adql},
+        idempotent=True,
+    )
+    r.raise_for_status()
+    data = r.json()
+    fields = [f["name"] for f in data.get("fields", [])]
+    return [dict(zip(fields, row)) for row in data.get("data", []) or []]
+
+
+def _resolve_batch(batch: list[str], tap_url: str) -> dict[str, dict]:
+    """batch = identifiants tels qu'envoyés; retour indexé par identifiant normalisé."""
+    found: dict[str, dict] = {}
+    for row in tap_query(batch_adql(batch), tap_url):
+        key = normalize_ident(str(row.get("id") or ""))
+        found.setdefault(key, {
+            "main_id": row.get("main_id") or "",
+            "otype": row.get("otype") or "",
+            "otype_txt": row.get("otype_txt") or "",
+        })
+    return found
+
+
+def resolve_idents(
+    idents: Iterable[str],
+    tap_url: str = SIMBAD_TAP_DEFAULT,
+    batch_size: int = BATCH_SIZE,
+) -> dict[str, dict | None | Exception]:
+    """{identifiant demandé: dict | None | exception} pour tous les identifiants."""
+    wanted: dict[str, list[str]] = {}
+    for ident in idents:
+        wanted.setdefault(normalize_ident(ident), []).append(ident)
+    keys = [k for k in wanted if k]
+    batches = [keys[i:i + batch_size] for i in range(0, len(keys), max(1, batch_size))]
+
+    # Envoyé avec sa casse d'origine (espaces regroupés seulement), comparé normalisé
+    results = net.run_concurrently(
+        lambda batch: _resolve_batch([_SPACES.sub(" ", wanted[k][0].strip()) for k in batch], tap_url),
+        batches,
+        concurrency=net.host_concurrency(tap_url),
+    )
+
+    out: dict[str, dict | None | Exception] = {}
+    for batch, res in zip(batches, results):
+        for key in batch:
+            value = res if isinstance(res, Exception) else res.get(key)
+            for ident in wanted[key]:
+                out[ident] = value
+    return out
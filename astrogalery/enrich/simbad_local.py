@@ -0,0 +1,298 @@
+"""Base SIMBAD locale (SQLite): sous-ensemble `basic` + `ident` des objets photographiés.
+
+FR:
+- Messier, NGC, IC, Sharpless et étoiles brillantes (V <= BRIGHT_STAR_MAG): pour ces
+  objets, les réponses SIMBAD ne changent pas d'un build à l'autre.
+- Remplie uniquement par une synchronisation explicite (`python tools/sync_simbad.py`),
+  jamais pendant un build.
+- Identifiants indexés sous forme normalisée (simbad_client.normalize_ident; `Sh2-155`
+  des dossiers = `SH 2-155` de SIMBAD), positions indexées (dec, ra): résolution
+  d'identifiant et cone search sans réseau. `sync_simbad.py` vérifie SYNC_PROBES.
+- L'enrichissement l'interroge avant le cache et le service TAP; un identifiant absent
+  de la base locale n'est pas « inconnu de SIMBAD » (simple sous-ensemble) et part sur
+  le réseau comme avant. Les cartes atlas fusionnent ses objets avec les tuiles du ciel
+  (sky_tiles), qui restent la source complète.
+- `SimbadLocal.replace_all` permet aussi de construire une base de test hors ligne.
+
+EN:
+- Messier, NGC, IC, Sharpless and bright stars (V <= BRIGHT_STAR_MAG): for these objects,
+  SIMBAD answers do not change between builds.
+- Filled only by an explicit sync (`python tools/sync_simbad.py`), never during a build.
+- Identifiers indexed in normalised form (simbad_client.normalize_ident; folder
+  `Sh2-155` = SIMBAD `SH 2-155`), positions indexed (dec, ra): identifier resolution
+  and cone search without network. `sync_simbad.py` checks SYNC_PROBES.
+- Enrichment queries it before the cache and the TAP service; an identifier missing
+  from the local database is not "unknown to SIMBAD" (it is only a subset) and goes to
+  the network as before. Atlas charts merge its objects with the sky tiles (sky_tiles),
+  which remain the complete source.
+- `SimbadLocal.replace_all` also builds an offline stand-in database for tests.
+"""
+
+from __future__ import annotations
+
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable
+
+from astrogalery import net
+from astrogalery.enrich import simbad_client
+from astrogalery.enrich.sky_tiles import angular_sep_deg
+
+SIMBAD_LOCAL_VERSION = 2
+
+# Identifiants qui doivent être résolus après une synchronisation (un par catalogue)
+SYNC_PROBES = ("M 31", "NGC 224", "IC 434", "Sh2-155")
+
+BRIGHT_STAR_MAG = 6.5
+IDENT_CHUNK = 1000
+
+# Catalogue -> condition ADQL sur l'identifiant (ident AS i); étoiles brillantes à part (flux V)
+CATALOG_FILTERS = {
+    "messier": "i.id LIKE 'M %'",
+    "ngc": "i.id LIKE 'NGC %'",
+    "ic": "i.id LIKE 'IC %'",
+    "sharpless": "(i.id LIKE 'SH %2-%' OR i.id LIKE 'Sh %2-%')",
+}
+
+_BASIC_COLUMNS = ("oid", "main_id", "ra", "dec", "otype", "otype_txt", "nbref")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS basic (
+    oid       INTEGER PRIMARY KEY,
+    main_id   TEXT NOT NULL,
+    ra        REAL,
+    dec       REAL,
+    otype     TEXT,
+    otype_txt TEXT,
+    nbref     INTEGER
+);
+CREATE TABLE IF NOT EXISTS ident (
+    id_norm TEXT NOT NULL,
+    id      TEXT NOT NULL,
+    oidref  INTEGER NOT NULL REFERENCES basic(oid) ON DELETE CASCADE
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE INDEX IF NOT EXISTS ident_norm ON ident(id_norm);
+CREATE INDEX IF NOT EXISTS basic_pos ON basic(dec, ra);
+"""
+
+
+class SimbadLocal:
+    """
+    FR: Base SIMBAD locale; lecture concurrente depuis les threads du build (verrou).
+    EN: Local SIMBAD database; concurrent reads from the build threads (lock).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        self.conn.execute("PRAGMA journal_mode = WAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 1:
+            # v2: forme normalisée des identifiants Sharpless changée -> id_norm recalculé
+            self.conn.create_function("normalize_ident", 1, simbad_client.normalize_ident, deterministic=True)
+            with self.conn:
+                self.conn.execute("UPDATE ident SET id_norm = normalize_ident(id)")
+            self.conn.execute(f"PRAGMA user_version = {SIMBAD_LOCAL_VERSION}")
+        elif version != SIMBAD_LOCAL_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS ident; DROP TABLE IF EXISTS basic; DROP TABLE IF EXISTS meta;")
+            self.conn.execute(f"PRAGMA user_version = {SIMBAD_LOCAL_VERSION}")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    def count(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM basic").fetchone()[0]
+
+    def meta(self) -> dict:
+        with self.lock:
+            return dict(self.conn.execute("SELECT key, value FROM meta").fetchall())
+
+    # --- Lecture / read ---
+    def resolve(self, ident: str) -> dict | None:
+        """{main_id, otype, otype_txt} si l'identifiant est dans la base locale, sinon None."""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT b.main_id, b.otype, b.otype_txt FROM ident AS i JOIN basic AS b ON b.oid = i.oidref"
+                " WHERE i.id_norm = ? LIMIT 1",
+                (simbad_client.normalize_ident(ident),),
+            ).fetchone()
+        if row is None:
+            return None
+        return {"main_id": row[0] or "", "otype": row[1] or "", "otype_txt": row[2] or ""}
+
+    def resolve_many(self, idents: Iterable[str]) -> dict[str, dict]:
+        """{identifiant: réponse} pour les identifiants présents dans la base locale."""
+        out = {}
+        for ident in idents:
+            info = self.resolve(ident)
+            if info is not None:
+                out[ident] = info
+        return out
+
+    def cone_search(self, ra_deg: float, dec_deg: float, radius_deg: float, max_rows: int = 200) -> list[dict]:
+        """Même résultat que sky_tiles.cone_search, limité aux objets de la base locale."""
+        r = max(0.01, min(float(radius_deg), 10.0))
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT main_id, ra, dec, otype, otype_txt, nbref FROM basic"
+                " WHERE dec BETWEEN ? AND ? AND ra IS NOT NULL",
+                (dec_deg - r, dec_deg + r),
+            ).fetchall()
+        inside = [row for row in rows if angular_sep_deg(ra_deg, dec_deg, row[1], row[2]) <= r]
+        inside.sort(key=lambda row: -(row[5] or 0))
+        return [
+            {"main_id": (m or "").strip(), "ra": ra, "dec": dec, "otype": (o or "").strip(), "otype_txt": (t or "").strip()}
+            for m, ra, dec, o, t, _ in inside[:max(0, int(max_rows))]
+        ]
+
+    # --- Écriture (synchronisation) / write (sync) ---
+    def replace_all(self, basic_rows: list[dict], ident_rows: list[tuple[int, str]], meta: dict | None = None) -> None:
+        """Remplace tout le contenu en une transaction (les lecteurs voient l'ancienne ou la nouvelle base)."""
+        with self.lock:
+            with self.conn:
+                self.conn.execute("DELETE FROM ident")
+                self.conn.execute("DELETE FROM basic")
+                self.conn.execute("DELETE FROM meta")
+                self.conn.executemany(
+                    f"INSERT OR REPLACE INTO basic ({', '.join(_BASIC_COLUMNS)}) VALUES ({', '.join('?' * len(_BASIC_COLUMNS))})",
+                    [tuple(row.get(c) for c in _BASIC_COLUMNS) for row in basic_rows],
+                )
+                known = {row["oid"] for row in basic_rows}
+                self.conn.executemany(
+                    "INSERT INTO ident (id_norm, id, oidref) VALUES (?, ?, ?)",
+                    [(simbad_client.normalize_ident(i), i, oid) for oid, i in ident_rows if oid in known and i],
+                )
+                self.conn.executemany(
+                    "INSERT INTO meta (key, value) VALUES (?, ?)",
+                    [(k, str(v)) for k, v in (meta or {}).items()],
+                )
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+def missing_probes(db: SimbadLocal) -> list[str]:
+    """Identifiants de SYNC_PROBES que la base ne résout pas (base incomplète ou normalisation cassée)."""
+    return [ident for ident in SYNC_PROBES if db.resolve(ident) is None]
+
+
+def open_local(path: Path) -> SimbadLocal | None:
+    """Base locale si elle existe et a été synchronisée, sinon None (build en ligne)."""
+    if not Path(path).exists():
+        return None
+    try:
+        db = SimbadLocal(path)
+        if db.count():
+            return db
+        db.close()
+    except sqlite3.Error as e:
+        print(f"[WARN] Base SIMBAD locale illisible ({path}): {e}")
+    return None
+
+
+# ------------------------------------------------------------
+# Synchronisation (TAP -> SQLite)
+# ------------------------------------------------------------
+def _basic_select(join: str, where: str) -> str:
+    return (
+        "SELECT DISTINCT b.oid, b.main_id, b.ra, b.dec, b.otype, b.otype_txt, b.nbref\n"
+        f"FROM basic AS b\n{join}\nWHERE {where}"
+    )
+
+
+def sync_queries(bright_star_mag: float = BRIGHT_STAR_MAG) -> dict[str, str]:
+    """{catalogue: requête ADQL des objets (table basic)}."""
+    queries = {
+        name: _basic_select("JOIN ident AS i ON i.oidref = b.oid", cond)
+        for name, cond in CATALOG_FILTERS.items()
+    }
+    queries["bright_stars"] = _basic_select(
+        "JOIN flux AS f ON f.oidref = b.oid",
+        f"f.filter = 'V' AND f.flux <= {float(bright_star_mag):.2f}",
+    )
+    return queries
+
+
+def _basic_row(row: dict) -> dict | None:
+    try:
+        oid = int(row["oid"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    out = {c: row.get(c) for c in _BASIC_COLUMNS}
+    out["oid"] = oid
+    for c in ("ra", "dec"):
+        try:
+            out[c] = float(out[c]) if out[c] is not None else None
+        except (TypeError, ValueError):
+            out[c] = None
+    out["main_id"] = str(out["main_id"] or "").strip()
+    return out
+
+
+def sync(
+    db: SimbadLocal,
+    tap_url: str = simbad_client.SIMBAD_TAP_DEFAULT,
+    bright_star_mag: float = BRIGHT_STAR_MAG,
+) -> dict[str, int]:
+    """
+    Télécharge le sous-ensemble (objets des catalogues, puis tous leurs identifiants par
+    lots d'oid) et remplace le contenu de `db`. Une requête en échec interrompt la
+    synchronisation sans toucher à la base existante.
+    """
+    queries = sync_queries(bright_star_mag)
+    results = net.run_concurrently(
+        lambda adql: simbad_client.tap_query(adql, tap_url),
+        list(queries.values()),
+        concurrency=net.host_concurrency(tap_url),
+    )
+    basic: dict[int, dict] = {}
+    stats: dict[str, int] = {}
+    for name, res in zip(queries, results):
+        if isinstance(res, Exception):
+            raise RuntimeError(f"synchronisation SIMBAD ({name}) impossible: {res}") from res
+        rows = [r for r in (_basic_row(row) for row in res) if r is not None]
+        stats[name] = len(rows)
+        for r in rows:
+            basic[r["oid"]] = r
+        print(f"[INFO] SIMBAD local: {name}: {len(rows)} objet(s)")
+
+    oids = sorted(basic)
+    chunks = [oids[i:i + IDENT_CHUNK] for i in range(0, len(oids), IDENT_CHUNK)]
+    results = net.run_concurrently(
+        lambda chunk: simbad_client.tap_query(
+            f"SELECT i.oidref, i.id FROM ident AS i WHERE i.oidref IN ({', '.join(str(o) for o in chunk)})",
+            tap_url,
+        ),
+        chunks,
+        concurrency=net.host_concurrency(tap_url),
+    )
+    idents: list[tuple[int, str]] = []
+    for res in results:
+        if isinstance(res, Exception):
+            raise RuntimeError(f"synchronisation SIMBAD (identifiants) impossible: {res}") from res
+        for row in res:
+            try:
+                idents.append((int(row["oidref"]), str(row.get("id") or "").strip()))
+            except (KeyError, TypeError, ValueError):
+                continue
+
+    db.replace_all(list(basic.values()), idents, meta={
+        "synced": datetime.now().isoformat(timespec="seconds"),
+        "tap_url": tap_url,
+        "bright_star_mag": bright_star_mag,
+        "catalogs": ",".join(queries),
+    })
+    stats["objects"] = len(basic)
+    stats["idents"] = len(idents)
+    return stats
+
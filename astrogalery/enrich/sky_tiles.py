@@ -0,0 +1,211 @@
+"""Cache spatial persistant des cone searches SIMBAD (cartes atlas).
+
+FR:
+- Le ciel est découpé en tuiles fixes: bandes de déclinaison de TILE_DEG degrés, chaque
+  bande coupée en ascension droite en tuiles de largeur ~TILE_DEG sur le ciel (le nombre
+  de tuiles d'une bande suit cos(dec), les tuiles restent de taille comparable).
+- Une tuile = une requête TAP sur un intervalle RA/Dec (`basic`, les TILE_MAX_ROWS objets
+  les plus cités), stockée dans `cache/simbad_tiles/<TILE_DEG>deg/<bande>_<n>.json`.
+- `cone_search`: union des tuiles qui recoupent le cercle, filtrée au cercle; seules les
+  tuiles absentes (ou expirées) sont demandées, en parallèle. Deux cartes voisines
+  partagent leurs tuiles, un re-rendu ne fait aucun appel réseau.
+- Une tuile en échec est ignorée (résultat partiel, avertissement) et redemandée au
+  prochain appel.
+
+EN:
+- The sky is split into fixed tiles: declination bands TILE_DEG degrees high, each band
+  cut in right ascension into tiles ~TILE_DEG wide on the sky (the number of tiles per
+  band follows cos(dec), so tiles keep a comparable size).
+- One tile = one TAP query over an RA/Dec range (`basic`, the TILE_MAX_ROWS most cited
+  objects), stored in `cache/simbad_tiles/<TILE_DEG>deg/<band>_<n>.json`.
+- `cone_search`: union of the tiles overlapping the circle, filtered to the circle; only
+  missing (or expired) tiles are requested, concurrently. Neighbouring charts share their
+  tiles, a re-render makes no network call.
+- A failed tile is skipped (partial result, warning) and requested again next time.
+"""
+
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from pathlib import Path
+
+from astrogalery import net
+from astrogalery.enrich import simbad_client
+
+TILE_DEG = 2.0
+TILE_MAX_ROWS = 500
+TILE_MAX_AGE_S = float(os.environ.get("GNU_ASTRO_GALERY_CONE_CACHE_DAYS", "90")) * 86400
+TILE_CACHE_DIR = Path("cache") / "simbad_tiles"
+
+_ROW_KEYS = ("main_id", "ra", "dec", "otype", "otype_txt")
+
+_TILES: dict[tuple[int, int], list[dict]] = {}
+_TILES_LOCK = threading.Lock()
+
+
+def _band_count() -> int:
+    return int(math.ceil(180.0 / TILE_DEG))
+
+
+def _band_limits(band: int) -> tuple[float, float]:
+    lo = -90.0 + band * TILE_DEG
+    return lo, min(90.0, lo + TILE_DEG)
+
+
+def _ra_count(band: int) -> int:
+    lo, hi = _band_limits(band)
+    mid = math.radians((lo + hi) / 2.0)
+    return max(1, int(math.ceil(360.0 * math.cos(mid) / TILE_DEG)))
+
+
+def tile_bounds(tile: tuple[int, int]) -> tuple[float, float, float, float]:
+    """(ra_min, ra_max, dec_min, dec_max) d'une tuile (bande, n)."""
+    band, n = tile
+    width = 360.0 / _ra_count(band)
+    dec_lo, dec_hi = _band_limits(band)
+    return n * width, (n + 1) * width, dec_lo, dec_hi
+
+
+def tiles_for_cone(ra_deg: float, dec_deg: float, radius_deg: float) -> list[tuple[int, int]]:
+    """Tuiles qui recoupent le cercle (centre ICRS, rayon en degrés)."""
+    dec_min = max(-90.0, dec_deg - radius_deg)
+    dec_max = min(90.0, dec_deg + radius_deg)
+    # Demi-largeur en RA du cercle; tout le tour si le cercle contient un pôle
+    if dec_min <= -90.0 or dec_max >= 90.0:
+        half_ra = 180.0
+    else:
+        s = math.sin(math.radians(radius_deg)) / max(1e-9, math.cos(math.radians(dec_deg)))
+        half_ra = 180.0 if s >= 1.0 else math.degrees(math.asin(s))
+
+    last_band = _band_count() - 1
+    first = min(last_band, int((dec_min + 90.0) // TILE_DEG))
+    last = min(last_band, int((dec_max + 90.0) // TILE_DEG))
+    tiles = []
+    for band in range(first, last + 1):
+        count = _ra_count(band)
+        if half_ra >= 180.0:
+            tiles.extend((band, n) for n in range(count))
+            continue
+        width = 360.0 / count
+        start = int(math.floor((ra_deg - half_ra) / width))
+        stop = int(math.floor((ra_deg + half_ra) / width))
+        seen = set()
+        for n in range(start, stop + 1):
+            n %= count
+            if n not in seen:
+                seen.add(n)
+                tiles.append((band, n))
+    return tiles
+
+
+def _tile_path(tile: tuple[int, int]) -> Path:
+    return TILE_CACHE_DIR / f"{TILE_DEG:g}deg" / f"{tile[0]}_{tile[1]}.json"
+
+
+def _tile_adql(tile: tuple[int, int]) -> str:
+    ra_lo, ra_hi, dec_lo, dec_hi = tile_bounds(tile)
+    dec_op = "<=" if dec_hi >= 90.0 else "<"
+    return (
+        f"SELECT TOP {TILE_MAX_ROWS} b.main_id, b.ra, b.dec, b.otype, b.otype_txt, b.nbref\n"
+        "FROM basic AS b\n"
+        f"WHERE b.ra >= {ra_lo:.8f} AND b.ra < {ra_hi:.8f}\n"
+        f"AND b.dec >= {dec_lo:.8f} AND b.dec {dec_op} {dec_hi:.8f}\n"
+        "ORDER BY b.nbref DESC"
+    )
+
+
+def _load_tile(tile: tuple[int, int]) -> list[dict] | None:
+    with _TILES_LOCK:
+        rows = _TILES.get(tile)
+    if rows is not None:
+        return rows
+    path = _tile_path(tile)
+    try:
+        data = json.loads(path.read_text(encoding="utf-8"))
+        if time.time() - float(data.get("fetched", 0)) > TILE_MAX_AGE_S:
+            return None
+        rows = data["rows"]
+    except Exception:
+        return None
+    with _TILES_LOCK:
+        _TILES[tile] = rows
+    return rows
+
+
+def _fetch_tile(tile: tuple[int, int], tap_url: str) -> list[dict]:
+    rows = []
+    for row in simbad_client.tap_query(_tile_adql(tile), tap_url):
+        try:
+            ra = float(row.get("ra"))
+            dec = float(row.get("dec"))
+        except (TypeError, ValueError):
+            continue
+        rows.append({
+            "main_id": str(row.get("main_id") or "").strip(),
+            "ra": ra,
+            "dec": dec,
+            "otype": str(row.get("otype") or "").strip(),
+            "otype_txt": str(row.get("otype_txt") or "").strip(),
+            "nbref": int(row.get("nbref") or 0),
+        })
+
+    path = _tile_path(tile)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{threading.get_ident()}.tmp")
+    tmp.write_text(json.dumps({"fetched": time.time(), "rows": rows}, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+    with _TILES_LOCK:
+        _TILES[tile] = rows
+    return rows
+
+
+def angular_sep_deg(ra1: float, dec1: float, ra2: float, dec2: float) -> float:
+    """Séparation angulaire (haversine), degrés."""
+    ra1, dec1, ra2, dec2 = map(math.radians, (ra1, dec1, ra2, dec2))
+    h = math.sin((dec2 - dec1) / 2) ** 2 + math.cos(dec1) * math.cos(dec2) * math.sin((ra2 - ra1) / 2) ** 2
+    return math.degrees(2 * math.asin(min(1.0, math.sqrt(h))))
+
+
+def cone_search(
+    ra_deg: float,
+    dec_deg: float,
+    radius_deg: float,
+    max_rows: int = 200,
+    tap_url: str = simbad_client.SIMBAD_TAP_DEFAULT,
+) -> list[dict]:
+    """
+    Objets SIMBAD dans le cercle: [{main_id, ra, dec, otype, otype_txt}], les plus cités
+    d'abord, au plus `max_rows`.
+    """
+    r = max(0.01, min(float(radius_deg), 10.0))
+    tiles = tiles_for_cone(ra_deg, dec_deg, r)
+
+    loaded = {t: _load_tile(t) for t in tiles}
+    missing = [t for t, rows in loaded.items() if rows is None]
+    if missing:
+        results = net.run_concurrently(
+            lambda t: _fetch_tile(t, tap_url),
+            missing,
+            concurrency=net.host_concurrency(tap_url),
+        )
+        failed = 0
+        for tile, res in zip(missing, results):
+            if isinstance(res, Exception):
+                failed += 1
+                loaded[tile] = []
+            else:
+                loaded[tile] = res
+        if failed:
+            print(f"[WARN] Cone search SIMBAD: {failed}/{len(missing)} tuile(s) indisponible(s) -> résultat partiel")
+
+    # Union filtrée au cercle, les objets les plus cités d'abord (comme dans chaque tuile)
+    inside = [
+        row for t in tiles for row in loaded[t]
+        if angular_sep_deg(ra_deg, dec_deg, row["ra"], row["dec"]) <= r
+    ]
+    inside.sort(key=lambda row: -int(row.get("nbref") or 0))
+    return [{k: row[k] for k in _ROW_KEYS} for row in inside[:max(0, int(max_rows))]]
@@ -0,0 +1,125 @@
+"""Lecteur brut d'en-têtes FITS (sans astropy).
+
+FR:
+- Lit l'en-tête primaire par blocs de 2880 octets (36 cartes de 80 caractères) et
+  s'arrête à `END`: les pixels ne sont jamais lus.
+- Ne décode que les valeurs simples (chaînes, entiers, réels, booléens); pour tout
+  cas inhabituel (CONTINUE, HIERARCH, complexes, octets non ASCII, en-tête tronqué),
+  retourne None et l'appelant se rabat sur astropy.
+
+EN:
+- Reads the primary header in 2880-byte blocks (36 cards of 80 characters) and
+  stops at `END`: pixel data is never read.
+- Only plain values are decoded (strings, ints, floats, booleans); anything unusual
+  (CONTINUE, HIERARCH, complex values, non-ASCII bytes, truncated header) returns
+  None so the caller falls back to astropy.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Any, Iterable
+
+FITS_BLOCK = 2880
+CARD_LEN = 80
+MAX_HEADER_BLOCKS = 1000  # ~100k cartes: au-delà, on laisse astropy décider
+
+COMMENTARY_KEYWORDS = {"COMMENT", "HISTORY", ""}
+UNSUPPORTED_KEYWORDS = {"CONTINUE", "HIERARCH"}
+
+
+class _Unusual(Exception):
+    """Carte que ce lecteur ne sait pas décoder fidèlement -> repli astropy."""
+
+
+def _parse_string(text: str) -> tuple[str, str]:
+    # text commence par "'"; '' = apostrophe échappée
+    out = []
+    i = 1
+    while i < len(text):
+        ch = text[i]
+        if ch == "'":
+            if i + 1 < len(text) and text[i + 1] == "'":
+                out.append("'")
+                i += 2
+                continue
+            rest = text[i + 1:].strip()
+            if rest and not rest.startswith("/"):
+                raise _Unusual(text)
+            return "".join(out).rstrip(), rest[1:].strip() if rest else ""
+        out.append(ch)
+        i += 1
+    raise _Unusual(text)
+
+
+def _parse_scalar(token: str) -> Any:
+    if token == "":
+        return None  # valeur indéfinie (astropy: Undefined)
+    if token == "T":
+        return True
+    if token == "F":
+        return False
+    if token.startswith("("):
+        raise _Unusual(token)  # complexe
+    try:
+        return int(token)
+    except ValueError:
+        pass
+    try:
+        return float(token.replace("D", "E").replace("d", "e"))
+    except ValueError:
+        raise _Unusual(token)
+
+
+def parse_card(card: str) -> tuple[str, Any, str]:
+    """(mot-clé, valeur, commentaire) d'une carte de 80 caractères."""
+    keyword = card[:8].strip().upper()
+    if keyword in UNSUPPORTED_KEYWORDS:
+        raise _Unusual(keyword)
+    if keyword in COMMENTARY_KEYWORDS:
+        return keyword, card[8:].rstrip(), ""
+    if card[8:10] != "= ":
+        raise _Unusual(card)
+
+    field = card[10:].strip()
+    if field.startswith("'"):
+        value, comment = _parse_string(field)
+        return keyword, value, comment
+
+    token, _, comment = field.partition("/")
+    return keyword, _parse_scalar(token.strip()), comment.strip()
+
+
+def read_raw_header(fits_path: Path, keywords: Iterable[str] | None = None) -> list[tuple[str, Any, str]] | None:
+    """
+    Cartes de l'en-tête primaire [(mot-clé, valeur, commentaire), ...] ou None si le
+    fichier sort de l'ordinaire. Avec `keywords`, seules ces cartes sont décodées
+    (les autres sont simplement sautées jusqu'à END).
+    """
+    wanted = {k.strip().upper() for k in keywords} if keywords is not None else None
+    cards: list[tuple[str, Any, str]] = []
+    try:
+        with open(fits_path, "rb") as f:
+            for n_block in range(MAX_HEADER_BLOCKS):
+                block = f.read(FITS_BLOCK)
+                if len(block) < FITS_BLOCK:
+                    return None
+                try:
+                    text = block.decode("ascii")
+                except UnicodeDecodeError:
+                    return None
+                for i in range(0, FITS_BLOCK, CARD_LEN):
+                    card = text[i:i + CARD_LEN]
+                    if n_block == 0 and i == 0 and not card.startswith("SIMPLE  ="):
+                        return None
+                    keyword = card[:8].rstrip()
+                    if keyword == "END":
+                        return cards
+                    if wanted is not None and keyword not in wanted:
+                        if keyword in UNSUPPORTED_KEYWORDS:
+                            return None
+                        continue
+                    cards.append(parse_card(card))
+    except (OSError, _Unusual):
+        return None
+    return None
@@ -0,0 +1,230 @@
+"""Index persistant des en-têtes FITS (SQLite).
+
+FR:
+- Chaque FITS empilé n'est ouvert qu'une seule fois: toutes les cartes de l'en-tête
+  primaire sont mémorisées, associées au chemin et à `file_fingerprint`.
+- Métadonnées, échelle de pixel, bloc météo et lecture image lisent cet index au
+  lieu de ré-analyser le FITS avec astropy.
+- L'index se requête sans toucher aux FITS, ex. `files_missing("SITELAT")`.
+- Les en-têtes sont lus par `fits_header.read_raw_header` (repli astropy).
+
+EN:
+- Each stacked FITS is opened only once: every primary-header card is stored,
+  keyed by path and `file_fingerprint`.
+- Metadata, pixel scale, weather block and image reading query this index instead
+  of re-parsing the FITS with astropy.
+- The index can be queried without touching the FITS files, e.g.
+  `files_missing("SITELAT")`.
+- Headers are read by `fits_header.read_raw_header` (astropy fallback).
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from astrogalery.cache import file_fingerprint
+from astrogalery.fits_header import read_raw_header
+
+try:
+    from astropy.io import fits
+except Exception:  # pragma: no cover
+    fits = None  # type: ignore
+
+FITS_INDEX_VERSION = 1
+
+# Cartes répétables: conservées dans `cards`, mais pas exposées comme mot-clé unique
+REPEATABLE_KEYWORDS = {"COMMENT", "HISTORY", ""}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    id          INTEGER PRIMARY KEY,
+    path        TEXT NOT NULL UNIQUE,
+    fingerprint TEXT NOT NULL,
+    indexed     TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cards (
+    file_id  INTEGER NOT NULL REFERENCES files(id) ON DELETE CASCADE,
+    seq      INTEGER NOT NULL,
+    keyword  TEXT NOT NULL,
+    value    TEXT,
+    comment  TEXT,
+    PRIMARY KEY (file_id, seq)
+);
+CREATE INDEX IF NOT EXISTS cards_keyword ON cards(keyword);
+"""
+
+
+def _encode_value(value: Any) -> str | None:
+    # astropy: str / int / float / bool / complex / Undefined
+    if value is None or type(value).__name__ == "Undefined":
+        return None
+    if isinstance(value, (bool, int, float, str)):
+        return json.dumps(value, ensure_ascii=False)
+    return json.dumps(str(value), ensure_ascii=False)
+
+
+def _decode_value(raw: str | None) -> Any:
+    if raw is None:
+        return None
+    try:
+        return json.loads(raw)
+    except Exception:
+        return raw
+
+
+def _cards_to_dict(pairs) -> dict:
+    out: dict = {}
+    for kw, value in pairs:
+        if kw in REPEATABLE_KEYWORDS or kw in out:
+            continue
+        out[kw] = None if type(value).__name__ == "Undefined" else value
+    return out
+
+
+class FitsHeaderIndex:
+    """
+    FR: Index des en-têtes primaires FITS. `path=None` -> index en mémoire (durée du processus).
+    EN: Primary FITS header index. `path=None` -> in-memory index (process lifetime).
+    """
+
+    def __init__(self, path: Path | None = None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path) if path is not None else ":memory:", check_same_thread=False)
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if path is not None:
+            self.conn.execute("PRAGMA journal_mode = WAL")
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != FITS_INDEX_VERSION:
+            self.conn.executescript("DROP TABLE IF EXISTS cards; DROP TABLE IF EXISTS files;")
+            self.conn.execute(f"PRAGMA user_version = {FITS_INDEX_VERSION}")
+        self.conn.executescript(_SCHEMA)
+        self.conn.commit()
+
+    # --- Lecture / read ---
+    def header(self, fits_path: Path) -> dict | None:
+        """
+        Cartes de l'en-tête primaire {MOT-CLÉ: valeur} (première occurrence).
+        Lit le FITS seulement s'il est absent de l'index ou modifié depuis.
+        """
+        fits_path = Path(fits_path)
+        try:
+            fp = file_fingerprint(fits_path)
+        except OSError:
+            return None
+
+        key = str(fits_path)
+        with self.lock:
+            row = self.conn.execute("SELECT id, fingerprint FROM files WHERE path = ?", (key,)).fetchone()
+            if row is not None and row[1] == fp:
+                self.hits += 1
+                return self._cards_as_dict(row[0])
+
+        # Lecteur brut (blocs de 2880 octets jusqu'à END), astropy pour les cas inhabituels
+        cards = read_raw_header(fits_path)
+        if cards is None:
+            if fits is None:
+                return None
+            with fits.open(fits_path, ignore_missing_simple=True) as hdul:
+                cards = [(c.keyword, c.value, c.comment) for c in hdul[0].header.cards]
+        self.misses += 1
+        self._store(key, fp, cards)
+        return _cards_to_dict((str(kw).strip().upper(), val) for kw, val, _ in cards)
+
+    def store_header(self, fits_path: Path, header) -> None:
+        """Enregistre un en-tête déjà lu (ex. FITS ouvert pour ses pixels) s'il manque."""
+        fits_path = Path(fits_path)
+        try:
+            fp = file_fingerprint(fits_path)
+        except OSError:
+            return
+        key = str(fits_path)
+        with self.lock:
+            row = self.conn.execute("SELECT fingerprint FROM files WHERE path = ?", (key,)).fetchone()
+        if row is not None and row[0] == fp:
+            return
+        self._store(key, fp, [(c.keyword, c.value, c.comment) for c in header.cards])
+
+    def _store(self, key: str, fp: str, cards: list[tuple]) -> None:
+        with self.lock:
+            self.conn.execute("DELETE FROM files WHERE path = ?", (key,))
+            cur = self.conn.execute(
+                "INSERT INTO files (path, fingerprint, indexed) VALUES (?, ?, ?)",
+                (key, fp, datetime.now().isoformat(timespec="seconds")),
+            )
+            file_id = cur.lastrowid
+            self.conn.executemany(
+                "INSERT INTO cards (file_id, seq, keyword, value, comment) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (file_id, seq, str(kw).strip().upper(), _encode_value(val), str(com or ""))
+                    for seq, (kw, val, com) in enumerate(cards)
+                ],
+            )
+            self.conn.commit()
+
+    def _cards_as_dict(self, file_id: int) -> dict:
+        rows = self.conn.execute(
+            "SELECT keyword, value FROM cards WHERE file_id = ? ORDER BY seq", (file_id,)
+        ).fetchall()
+        return _cards_to_dict((kw, _decode_value(raw)) for kw, raw in rows)
+
+    # --- Requêtes / queries (sans ouvrir les FITS) ---
+    def files_missing(self, keyword: str) -> list[str]:
+        """Chemins des FITS indexés dont l'en-tête n'a pas `keyword` (ou une valeur vide)."""
+        rows = self.query(
+            "SELECT path FROM files f WHERE NOT EXISTS ("
+            " SELECT 1 FROM cards c WHERE c.file_id = f.id AND c.keyword = ?"
+            " AND c.value IS NOT NULL AND c.value != '\"\"') ORDER BY path",
+            (keyword.strip().upper(),),
+        )
+        return [r[0] for r in rows]
+
+    def values(self, keyword: str) -> dict[str, Any]:
+        """{chemin: valeur} pour `keyword` sur tous les FITS indexés."""
+        rows = self.query(
+            "SELECT f.path, c.value FROM files f JOIN cards c ON c.file_id = f.id"
+            " WHERE c.keyword = ? ORDER BY f.path, c.seq",
+            (keyword.strip().upper(),),
+        )
+        out: dict = {}
+        for path, raw in rows:
+            out.setdefault(path, _decode_value(raw))
+        return out
+
+    def query(self, sql: str, params: tuple = ()) -> list[tuple]:
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
+
+
+# Index partagé par le processus (fits_utils, space_weather, generate_gallery)
+_DEFAULT_INDEX: FitsHeaderIndex | None = None
+
+
+def get_fits_index() -> FitsHeaderIndex:
+    global _DEFAULT_INDEX
+    if _DEFAULT_INDEX is None:
+        _DEFAULT_INDEX = FitsHeaderIndex()
+    return _DEFAULT_INDEX
+
+
+def set_fits_index(index: FitsHeaderIndex | None) -> None:
+    global _DEFAULT_INDEX
+    _DEFAULT_INDEX = index
+
+
+def read_fits_header(fits_path: Path) -> dict | None:
+    """En-tête primaire via l'index partagé (None si illisible sans astropy)."""
+    return get_fits_index().header(Path(fits_path))
@@ -17,6 +17,8 @@ from __future__ import annotations
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
 
+from astrogalery.fits_index import get_fits_index, read_fits_header
+
 # --- helper from legacy generate_gallery.py (no-behavior-change) ---
 def safe_text(x, default=""):
     s = "" if x is None else str(x)
@@ -41,19 +43,20 @@ except Exception:  # pragma: no cover
 
 def extract_fits_metadata(fits_path: Path) -> dict:
     try:
-        with fits.open(fits_path, ignore_missing_simple=True) as hdul:
-            h = hdul[0].header
-            return {
-                "object": safe_text(h.get("OBJECT"), "Unknown Object"),
-                "date_obs": safe_text(h.get("DATE-OBS"), ""),
-                "exptime": h.get("EXPTIME", 0),
-                "filter": safe_text(h.get("FILTER"), "None"),
-                "telescope": safe_text(h.get("TELESCOP"), "Unknown Telescope"),
-                "instrument": safe_text(h.get("INSTRUME"), "Unknown Instrument"),
-                "observer": safe_text(h.get("OBSERVER"), "Unknown Observer"),
-                "ra": safe_text(h.get("RA"), ""),
-                "dec": safe_text(h.get("DEC"), ""),
-            }
+        h = read_fits_header(fits_path)
+        if h is None:
+            raise OSError("en-tête FITS indisponible")
+        return {
+            "object": safe_text(h.get("OBJECT"), "Unknown Object"),
+            "date_obs": safe_text(h.get("DATE-OBS"), ""),
+            "exptime": h.get("EXPTIME", 0),
+            "filter": safe_text(h.get("FILTER"), "None"),
+            "telescope": safe_text(h.get("TELESCOP"), "Unknown Telescope"),
+            "instrument": safe_text(h.get("INSTRUME"), "Unknown Instrument"),
+            "observer": safe_text(h.get("OBSERVER"), "Unknown Observer"),
+            "ra": safe_text(h.get("RA"), ""),
+            "dec": safe_text(h.get("DEC"), ""),
+        }
     except Exception as e:
         print(f"[WARN] FITS illisible: {fits_path} ({e})")
         return {}
@@ -63,16 +66,73 @@ def find_stacked_fits_in_dir(obs_dir: Path) -> Path | None:
         return p
     return None
 
+def _header_shape(h) -> tuple[int, ...]:
+    """Forme numpy (NAXISn, ..., NAXIS1) lue dans l'en-tête, sans toucher aux pixels."""
+    naxis = int(h.get("NAXIS", 0) or 0)
+    return tuple(int(h.get(f"NAXIS{i}", 0) or 0) for i in range(naxis, 0, -1))
+
+
+def _plane_index(shape: tuple[int, ...]) -> tuple | None:
+    """Index du plan 2D retenu dans le tableau « squeezé » (None si aucun plan 2D)."""
+    dims = [n for n in shape if n != 1]
+    if len(dims) == 2:
+        return ()
+    if len(dims) == 3:
+        return (0,) if dims[0] <= 20 else (-1,)
+    if len(dims) >= 4:
+        return (0,) * (len(dims) - 2)
+    return None
+
+
+def _to_2d_array(arr: np.ndarray) -> np.ndarray | None:
+    """Plan 2D d'un tableau N-D, sous forme de vue (aucune copie, compatible memmap)."""
+    if arr is None:
+        return None
+    idx = _plane_index(arr.shape)
+    if idx is None:
+        return None
+    return np.squeeze(arr)[idx]
+
+
+def _scale_plane(img: np.ndarray, h) -> np.ndarray:
+    # BSCALE/BZERO appliqués au seul plan retenu (et non au cube entier comme astropy)
+    bscale = h.get("BSCALE", 1)
+    bzero = h.get("BZERO", 0)
+    bscale = 1 if bscale is None else bscale
+    bzero = 0 if bzero is None else bzero
+    if bscale == 1 and bzero == 0:
+        return img
+    out = img.astype(np.float32)
+    if bscale != 1:
+        out *= np.float32(bscale)
+    if bzero != 0:
+        out += np.float32(bzero)
+    return out
+
+
 def read_best_image_from_fits(fits_path: Path) -> np.ndarray | None:
+    """
+    Premier plan 2D exploitable du FITS.
+    - Fichier en memmap, données non mises à l'échelle par astropy (pas de copie du cube).
+    - La forme de chaque HDU est lue dans NAXIS* avant d'accéder aux pixels.
+    - Le plan retenu est une vue; seul ce plan est copié si BSCALE/BZERO l'exigent.
+    """
     try:
-        with fits.open(fits_path, ignore_missing_simple=True) as hdul:
+        with fits.open(fits_path, ignore_missing_simple=True, memmap=True, do_not_scale_image_data=True) as hdul:
+            # FITS déjà ouvert pour ses pixels: son en-tête alimente l'index partagé
+            get_fits_index().store_header(fits_path, hdul[0].header)
             for hdu in hdul:
-                data = getattr(hdu, "data", None)
+                if not isinstance(hdu, (fits.PrimaryHDU, fits.ImageHDU, fits.CompImageHDU)):
+                    continue
+                shape = _header_shape(hdu.header)
+                if not shape or 0 in shape or _plane_index(shape) is None:
+                    continue
+                data = hdu.data
                 if data is None:
                     continue
                 img = _to_2d_array(data)
                 if img is not None and img.size > 0:
-                    return img
+                    return _scale_plane(img, hdu.header)
     except Exception as e:
         print(f"[WARN] Lecture FITS échouée {fits_path.name}: {e}")
         return None
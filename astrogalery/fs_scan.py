@@ -8,8 +8,17 @@ NOTE no-behavior-change:
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
+from fnmatch import fnmatchcase
 from pathlib import Path
 
+from astrogalery.cache import load_json, save_json
+
+# Dossiers jamais parcourus (sorties, caches, environnements)
+SKIP_DIR_NAMES = ("site", ".git", "__pycache__", ".venv", "venv", "cache")
+STACKED_FITS_PATTERN = "Stacked*.fit*"
+SCAN_INDEX_VERSION = 2
+
 def is_in_sub_folder(path: Path) -> bool:
     for part in path.parts:
         p = str(part).lower()
@@ -22,12 +31,17 @@ def is_thumbnail_file(path: Path) -> bool:
     return path.name.lower().endswith("_thn.jpg")
 
 
-def find_final_jpgs(root_dir: Path):
+def find_final_jpgs(root_dir: Path, index: "ScanIndex | None" = None, workers: int = 1):
+    if index is None and workers > 1:
+        index = ScanIndex(workers=workers)
+    if index is not None:
+        return index.refresh(root_dir)
+
     results = []
     for dirpath, dirnames, filenames in os.walk(root_dir):
         d = Path(dirpath)
 
-        if d.name in ("site", ".git", "__pycache__", ".venv", "venv", "cache"):
+        if d.name in SKIP_DIR_NAMES:
             dirnames[:] = []
             continue
 
@@ -50,6 +64,224 @@ def find_final_jpgs(root_dir: Path):
     return results
 
 
+# ------------------------------------------------------------
+# Index de scan persistant / persistent scan index
+# ------------------------------------------------------------
+def _is_sub_dirname(name: str) -> bool:
+    n = name.lower()
+    return n.endswith("_sub") or n.endswith("-sub")
+
+
+def _list_dir(d: Path) -> dict:
+    """Liste un répertoire (une seule lecture): sous-dossiers, JPG, vignettes et FITS empilés."""
+    # mtime lu AVANT la liste: un ajout pendant la lecture forcera une relecture au prochain run
+    entry = {"mtime_ns": d.stat().st_mtime_ns, "dirs": [], "jpgs": [], "thumbs": [], "fits": []}
+    with os.scandir(d) as it:
+        for e in it:
+            name = e.name
+            try:
+                # os.walk (followlinks=False) ne descend pas dans les liens symboliques
+                if e.is_dir(follow_symlinks=False):
+                    entry["dirs"].append(name)
+                    continue
+                if e.is_symlink() and e.is_dir():
+                    continue
+            except OSError:
+                continue
+            low = name.lower()
+            if low.endswith("_thn.jpg"):
+                entry["thumbs"].append(name)
+            elif low.endswith(".jpg"):
+                entry["jpgs"].append(name)
+            if fnmatchcase(name, STACKED_FITS_PATTERN):
+                entry["fits"].append(name)
+    for k in ("dirs", "jpgs", "thumbs", "fits"):
+        entry[k].sort()
+    return entry
+
+
+def _fits_stem(name: str) -> str:
+    # 'Stacked_..._20240101-220000.fit' / '.fits' -> 'Stacked_..._20240101-220000'
+    return name.rsplit(".", 1)[0]
+
+
+def _pair_jpg_fits(jpg_name: str, fits_by_stem: dict, fits_sorted: list) -> str | None:
+    """JPG -> FITS du même dossier: même nom de base, sinon plus long préfixe commun, sinon le premier."""
+    stem = jpg_name.rsplit(".", 1)[0]
+    if stem in fits_by_stem:
+        return fits_by_stem[stem]
+    best = None
+    for fstem, fname in fits_by_stem.items():
+        if stem.startswith(fstem) and (best is None or len(fstem) > len(best[0])):
+            best = (fstem, fname)
+    if best:
+        return best[1]
+    return fits_sorted[0] if fits_sorted else None
+
+
+class ScanIndex:
+    """
+    FR: Index du scan MyWorks, construit en une seule passe. Pour chaque répertoire:
+        mtime, sous-dossiers, JPG, vignettes `_thn.jpg` et FITS `Stacked*`. Les
+        associations JPG -> FITS (par nom de base quand un dossier contient plusieurs
+        empilements) et JPG -> vignette sont ensuite de simples accès dict.
+        Avec `path`, l'index est persistant: un répertoire dont le mtime n'a pas
+        changé n'est pas relu (seul un `stat` est fait). Avec `workers > 1`, les
+        dossiers d'un même niveau sont listés en parallèle (`os.scandir` dans un pool
+        de threads borné), utile quand MyWorks est sur un partage SMB/NFS.
+    EN: Single-pass MyWorks scan index. Per directory: mtime, subdirectories, JPGs,
+        `_thn.jpg` thumbnails and `Stacked*` FITS. JPG -> FITS pairing (by stem when a
+        folder holds several stacks) and JPG -> thumbnail are plain dict lookups.
+        With `path`, the index is persisted: directories whose mtime is unchanged are
+        not re-listed (a single `stat` is enough). With `workers > 1`, sibling
+        directories are listed concurrently (`os.scandir` over a bounded thread pool),
+        which helps when MyWorks lives on an SMB/NFS share.
+
+    Note: comme `find_final_jpgs`, les dossiers *_sub / *-sub ne sont jamais listés; un
+    FITS empilé n'est donc cherché que dans le dossier du JPG et ses sous-dossiers retenus.
+    """
+
+    def __init__(self, path: Path | None = None, workers: int = 1):
+        self.path = path
+        self.workers = max(1, int(workers))
+        data = load_json(path) if path else {}
+        if data.get("version") != SCAN_INDEX_VERSION:
+            data = {}
+        self.dirs: dict = data.get("dirs", {}) or {}
+        self.jpg_fits: dict = data.get("jpg_fits", {}) or {}
+        self.jpg_thumbs: dict = {}
+        self.dir_fits: dict = {}
+        self.listed = 0
+        self.reused = 0
+        self.changed: list[str] = []
+
+    @staticmethod
+    def _entry(d: Path, prev: dict) -> tuple[dict | None, bool]:
+        """Retourne (entrée, relu?) — appelé depuis les threads du pool, sans état partagé."""
+        try:
+            mtime_ns = d.stat().st_mtime_ns
+        except OSError:
+            return None, False
+        old = prev.get(str(d))
+        if old is not None and old.get("mtime_ns") == mtime_ns:
+            return old, False
+        try:
+            return _list_dir(d), True
+        except OSError:
+            return None, False
+
+    def refresh(self, root_dir: Path) -> list[Path]:
+        """Met à jour l'index et retourne les JPG finaux (ordre déterministe)."""
+        prev = self.dirs
+        seen: dict = {}
+        self.listed = 0
+        self.reused = 0
+        self.changed = []
+
+        def _wanted(d: Path) -> bool:
+            return not (d.name in SKIP_DIR_NAMES or _is_sub_dirname(d.name))
+
+        def _read(d: Path) -> tuple[dict | None, bool]:
+            return self._entry(d, prev)
+
+        # 1) Parcours en largeur: les dossiers d'un même niveau sont lus ensemble
+        pool = ThreadPoolExecutor(max_workers=self.workers) if self.workers > 1 else None
+        try:
+            level = [d for d in [Path(root_dir)] if _wanted(d)]
+            while level:
+                entries = pool.map(_read, level) if pool is not None else map(_read, level)
+                next_level = []
+                for d, (entry, listed) in zip(level, entries):
+                    if entry is None:
+                        continue
+                    seen[str(d)] = entry
+                    if listed:
+                        self.listed += 1
+                        self.changed.append(str(d))
+                    else:
+                        self.reused += 1
+                    next_level.extend(d / sub for sub in entry["dirs"] if _wanted(d / sub))
+                level = next_level
+        finally:
+            if pool is not None:
+                pool.shutdown()
+
+        # 2) Ordre de sortie indépendant du parallélisme: profondeur d'abord, ordre alphabétique
+        results: list[Path] = []
+        stack = [Path(root_dir)]
+        while stack:
+            d = stack.pop()
+            entry = seen.get(str(d))
+            if entry is None:
+                continue
+            for fn in entry["jpgs"]:
+                p = d / fn
+                if is_in_sub_folder(p):
+                    continue
+                results.append(p)
+            for sub in reversed(entry["dirs"]):
+                stack.append(d / sub)
+
+        self.dirs = seen
+        self._build_lookups(results)
+        return results
+
+    def _build_lookups(self, results: list[Path]) -> None:
+        self.jpg_fits = {}
+        self.jpg_thumbs = {}
+        self.dir_fits = {}
+        thumbs_by_dir: dict = {}
+        for p in results:
+            d = p.parent
+            key = str(d)
+            entry = self.dirs[key]
+            if key not in self.dir_fits:
+                first = self._find_stacked_fits(d)
+                self.dir_fits[key] = str(first) if first else ""
+            if entry["fits"]:
+                by_stem = {_fits_stem(f): f for f in entry["fits"]}
+                fname = _pair_jpg_fits(p.name, by_stem, entry["fits"])
+                self.jpg_fits[str(p)] = str(d / fname) if fname else ""
+            else:
+                self.jpg_fits[str(p)] = self.dir_fits[key]
+            if key not in thumbs_by_dir:
+                # Noms en minuscules -> nom réel: recherche insensible à la casse (Windows)
+                thumbs_by_dir[key] = {t.lower(): t for t in entry["thumbs"]}
+            thn = thumbs_by_dir[key].get((p.stem + "_thn.jpg").lower())
+            if thn is not None:
+                self.jpg_thumbs[str(p)] = str(d / thn)
+
+    def _find_stacked_fits(self, obs_dir: Path) -> Path | None:
+        # Même priorité que rglob: le dossier lui-même, puis ses sous-dossiers
+        stack = [obs_dir]
+        while stack:
+            d = stack.pop()
+            entry = self.dirs.get(str(d))
+            if entry is None:
+                continue
+            if entry["fits"]:
+                return d / entry["fits"][0]
+            for sub in reversed(entry["dirs"]):
+                stack.append(d / sub)
+        return None
+
+    def stacked_fits_for(self, jpg_path: Path) -> Path | None:
+        fp = self.jpg_fits.get(str(jpg_path))
+        if fp is None:
+            fp = self.dir_fits.get(str(Path(jpg_path).parent))
+        if fp is None:
+            return self._find_stacked_fits(Path(jpg_path).parent)
+        return Path(fp) if fp else None
+
+    def thumbnail_for(self, jpg_path: Path) -> Path | None:
+        fp = self.jpg_thumbs.get(str(jpg_path))
+        return Path(fp) if fp else None
+
+    def save(self) -> None:
+        if self.path:
+            save_json(self.path, {"version": SCAN_INDEX_VERSION, "dirs": self.dirs, "jpg_fits": self.jpg_fits})
+
+
 # ------------------------------------------------------------
 # Nova helpers
 # ------------------------------------------------------------
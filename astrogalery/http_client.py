@@ -0,0 +1,192 @@
+"""Client HTTP partagé (SIMBAD, Nova, Open-Meteo, téléchargements statiques).
+
+FR:
+- Une seule `requests.Session` (keep-alive, pool de connexions) pour tout le processus.
+- Délais par service (connexion, lecture): plus aucune requête sans timeout.
+- Nouvelles tentatives bornées avec backoff exponentiel (+ gigue) sur 429/5xx et
+  erreurs de connexion; `Retry-After` respecté. Les POST ne sont rejoués que s'ils
+  sont idempotents (requêtes TAP, login), jamais un envoi de fichier.
+- Chaque tentative passe par le limiteur de l'hôte (astrogalery.net).
+- `download_cached`: cache disque HTTP (ETag / Last-Modified) pour les fichiers statiques
+  (ex. index des constellations): requête conditionnelle, 304 -> fichier local gardé.
+
+EN:
+- A single `requests.Session` (keep-alive, connection pool) for the whole process.
+- Per-service (connect, read) timeouts: no request is left without a timeout.
+- Bounded retries with exponential backoff (+ jitter) on 429/5xx and connection errors;
+  `Retry-After` is honoured. POSTs are only replayed when idempotent (TAP queries,
+  login), never a file upload.
+- Every attempt goes through the host limiter (astrogalery.net).
+- `download_cached`: on-disk HTTP cache (ETag / Last-Modified) for static files (e.g. the
+  constellation index): conditional request, 304 -> local file kept.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from pathlib import Path
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from astrogalery import net
+from astrogalery.config import VERSION
+
+# (connexion, lecture) en secondes
+SERVICE_TIMEOUTS: dict[str, tuple[float, float]] = {
+    "simbad": (10.0, 60.0),
+    "nova": (10.0, 60.0),
+    "nova_upload": (10.0, 600.0),
+    "openmeteo": (10.0, 30.0),
+    "static": (10.0, 120.0),
+    "default": (10.0, 60.0),
+}
+HOST_SERVICES = {
+    "simbad.cds.unistra.fr": "simbad",
+    "nova.astrometry.net": "nova",
+    "archive-api.open-meteo.com": "openmeteo",
+    "raw.githubusercontent.com": "static",
+}
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+MAX_RETRIES = int(os.environ.get("GNU_ASTRO_GALERY_HTTP_RETRIES", "4"))
+BACKOFF_BASE_S = 1.0
+BACKOFF_MAX_S = 30.0
+
+HTTP_CACHE_DIR = Path("cache") / "http"
+USER_AGENT = f"GNU-Astro-Galery/{VERSION}"
+
+_SESSION: requests.Session | None = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Session partagée (créée au premier appel; le pool urllib3 est thread-safe)."""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            s = requests.Session()
+            adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32)
+            s.mount("https://", adapter)
+            s.mount("http://", adapter)
+            s.headers["User-Agent"] = USER_AGENT
+            _SESSION = s
+        return _SESSION
+
+
+def service_for(url: str) -> str:
+    return HOST_SERVICES.get(net.host_of(url), "default")
+
+
+def _backoff_delay(attempt: int, response: requests.Response | None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After", "")
+        if retry_after.strip().isdigit():
+            return min(BACKOFF_MAX_S, float(retry_after))
+    delay = min(BACKOFF_MAX_S, BACKOFF_BASE_S * (2 ** attempt))
+    return delay * (0.5 + random.random() / 2)
+
+
+def request(
+    method: str,
+    url: str,
+    service: str | None = None,
+    retries: int | None = None,
+    idempotent: bool | None = None,
+    **kwargs,
+) -> requests.Response:
+    """
+    Requête via la session partagée, avec timeout du service, limiteur d'hôte et
+    nouvelles tentatives (429/5xx/connexion) si la requête est rejouable.
+    La réponse finale est retournée telle quelle (raise_for_status reste à l'appelant).
+    """
+    kwargs.setdefault("timeout", SERVICE_TIMEOUTS.get(service or service_for(url), SERVICE_TIMEOUTS["default"]))
+    if idempotent is None:
+        idempotent = method.upper() in ("GET", "HEAD", "OPTIONS")
+    retries = (MAX_RETRIES if retries is None else retries) if idempotent else 0
+
+    session = get_session()
+    attempt = 0
+    while True:
+        response = None
+        try:
+            with net.limited(url):
+                response = session.request(method, url, **kwargs)
+            if response.status_code not in RETRY_STATUS or attempt >= retries:
+                return response
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt >= retries:
+                raise
+        delay = _backoff_delay(attempt, response)
+        attempt += 1
+        print(f"[INFO] HTTP {response.status_code if response is not None else 'erreur'} "
+              f"{net.host_of(url)} -> nouvel essai {attempt}/{retries} dans {delay:.1f}s")
+        time.sleep(delay)
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def post(url: str, **kwargs) -> requests.Response:
+    return request("POST", url, **kwargs)
+
+
+def _cache_meta_path(url: str) -> Path:
+    return HTTP_CACHE_DIR / f"{hashlib.sha1(url.encode('utf-8')).hexdigest()}.json"
+
+
+def download_cached(url: str, dest: Path, max_age_s: float = 7 * 86400, min_size: int = 1) -> bool:
+    """
+    `dest` à jour par rapport à `url`: aucune requête si vérifié depuis moins de `max_age_s`,
+    sinon GET conditionnel (If-None-Match / If-Modified-Since). Une erreur réseau garde le
+    fichier local s'il existe. Retourne True si `dest` est utilisable.
+    """
+    dest = Path(dest)
+    meta_path = _cache_meta_path(url)
+    try:
+        meta = json.loads(meta_path.read_text(encoding="utf-8")) if meta_path.exists() else {}
+    except Exception:
+        meta = {}
+    have_file = dest.exists() and dest.stat().st_size >= min_size
+    if have_file and meta.get("url") == url and time.time() - float(meta.get("checked", 0)) < max_age_s:
+        return True
+
+    headers = {}
+    if have_file and meta.get("url") == url:
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    try:
+        r = get(url, headers=headers, service="static")
+        if r.status_code == 304 and have_file:
+            status = "304"
+        else:
+            r.raise_for_status()
+            if len(r.content) < min_size:
+                raise IOError(f"réponse trop petite ({len(r.content)} octets)")
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            tmp = dest.with_name(dest.name + ".tmp")
+            tmp.write_bytes(r.content)
+            os.replace(tmp, dest)
+            meta = {"url": url, "etag": r.headers.get("ETag", ""), "last_modified": r.headers.get("Last-Modified", "")}
+            status = "200"
+    except Exception as e:
+        if have_file:
+            print(f"[WARN] Revalidation HTTP impossible ({url}): {e} -> copie locale conservée")
+            return True
+        raise
+
+    meta["url"] = url
+    meta["checked"] = time.time()
+    meta["status"] = status
+    meta_path.parent.mkdir(parents=True, exist_ok=True)
+    meta_path.write_text(json.dumps(meta, ensure_ascii=False, indent=2), encoding="utf-8")
+    return True
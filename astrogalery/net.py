@@ -0,0 +1,143 @@
+"""Couche réseau concurrente (SIMBAD, Open-Meteo, Nova).
+
+FR:
+- `limited(url)`: chaque requête HTTP passe par le limiteur de son hôte (nombre de
+  requêtes simultanées + débit max en requêtes/s), partagé par tous les threads.
+- `gather_blocking` (asyncio): exécute des fonctions bloquantes (`requests`) dans un
+  pool de threads, `concurrency` à la fois; `run_concurrently` en est la façade
+  synchrone pour le code existant.
+- 300 objets non cachés coûtent ainsi la latence des quelques requêtes les plus
+  lentes, pas leur somme, sans dépasser ce que chaque service accepte.
+- Limites par hôte: `GNU_ASTRO_GALERY_NET_LIMITS="hôte=concurrence/débit,..."`.
+
+EN:
+- `limited(url)`: every HTTP request goes through its host's limiter (simultaneous
+  requests + max rate in requests/s), shared by all threads.
+- `gather_blocking` (asyncio): runs blocking callables (`requests`) in a thread pool,
+  `concurrency` at a time; `run_concurrently` is its sync facade for existing code.
+- 300 uncached objects thus cost the latency of the slowest few requests rather than
+  their sum, without exceeding what each service accepts.
+- Per-host limits: `GNU_ASTRO_GALERY_NET_LIMITS="host=concurrency/rate,..."`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator
+from urllib.parse import urlsplit
+
+# hôte -> (requêtes simultanées, requêtes/s; 0 = pas de limite de débit)
+DEFAULT_LIMITS: dict[str, tuple[int, float]] = {
+    "simbad.cds.unistra.fr": (4, 5.0),
+    "archive-api.open-meteo.com": (4, 8.0),
+    "nova.astrometry.net": (4, 2.0),
+}
+FALLBACK_LIMIT = (4, 0.0)
+
+
+def host_of(url_or_host: str) -> str:
+    return (urlsplit(url_or_host).hostname or url_or_host).lower()
+
+
+def parse_limits(spec: str) -> dict[str, tuple[int, float]]:
+    """"simbad.cds.unistra.fr=2/1,nova.astrometry.net=8" -> {hôte: (concurrence, débit)}."""
+    out = {}
+    for part in (spec or "").split(","):
+        if "=" not in part:
+            continue
+        host, value = part.split("=", 1)
+        conc, _, rate = value.partition("/")
+        try:
+            out[host_of(host.strip())] = (max(1, int(conc)), max(0.0, float(rate or 0)))
+        except ValueError:
+            print(f"[WARN] Limite réseau ignorée: {part.strip()!r}")
+    return out
+
+
+class HostLimiter:
+    """Sémaphore (requêtes simultanées) + espacement minimal entre deux départs (débit)."""
+
+    def __init__(self, concurrency: int, rate: float = 0.0):
+        self.concurrency = max(1, int(concurrency))
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._sem = threading.BoundedSemaphore(self.concurrency)
+        self._lock = threading.Lock()
+        self._next = 0.0
+
+    def _wait_turn(self) -> None:
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+    def __enter__(self) -> "HostLimiter":
+        self._sem.acquire()
+        self._wait_turn()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._sem.release()
+
+
+_LIMITS: dict[str, tuple[int, float]] = dict(DEFAULT_LIMITS)
+_LIMITERS: dict[str, HostLimiter] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+
+def configure(limits: dict[str, tuple[int, float]]) -> None:
+    """Remplace les limites des hôtes donnés (à appeler avant les premières requêtes)."""
+    with _REGISTRY_LOCK:
+        for host, limit in limits.items():
+            _LIMITS[host_of(host)] = limit
+            _LIMITERS.pop(host_of(host), None)
+
+
+def limiter_for(url_or_host: str) -> HostLimiter:
+    host = host_of(url_or_host)
+    with _REGISTRY_LOCK:
+        lim = _LIMITERS.get(host)
+        if lim is None:
+            lim = _LIMITERS[host] = HostLimiter(*_LIMITS.get(host, FALLBACK_LIMIT))
+        return lim
+
+
+def host_concurrency(url_or_host: str) -> int:
+    return limiter_for(url_or_host).concurrency
+
+
+@contextmanager
+def limited(url_or_host: str) -> Iterator[None]:
+    """Bloc d'une requête HTTP vers `url_or_host`, dans les limites de son hôte."""
+    with limiter_for(url_or_host):
+        yield
+
+
+async def gather_blocking(fn: Callable, args_list: Iterable, concurrency: int = 8) -> list:
+    """
+    fn(arg) pour chaque arg, `concurrency` à la fois dans des threads; résultats dans
+    l'ordre des arguments, exceptions retournées comme valeurs.
+    """
+    args_list = list(args_list)
+    if not args_list:
+        return []
+    loop = asyncio.get_running_loop()
+    sem = asyncio.Semaphore(max(1, concurrency))
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(args_list))), thread_name_prefix="net") as pool:
+        async def _one(arg):
+            async with sem:
+                return await loop.run_in_executor(pool, fn, arg)
+
+        return await asyncio.gather(*(_one(a) for a in args_list), return_exceptions=True)
+
+
+def run_concurrently(fn: Callable, args_list: Iterable, concurrency: int = 8) -> list:
+    """Façade synchrone de gather_blocking (appelable depuis n'importe quel thread sans boucle)."""
+    return asyncio.run(gather_blocking(fn, args_list, concurrency))
@@ -0,0 +1,166 @@
+"""Pool de processus pour les rendus matplotlib (PNG d'astrométrie, cartes atlas).
+
+FR:
+- Chaque processus charge Hipparcos, les lignes de constellations et le catalogue
+  d'objets divers une seule fois (initialiseur), puis enchaîne les rendus.
+- Entrées/sorties = chemins + petits enregistrements (dict): les pixels FITS sont lus
+  dans le processus de rendu, rien de volumineux ne transite entre processus.
+- Aucun appel réseau dans les processus: le cone search SIMBAD est fait par l'appelant.
+- `workers <= 1`: rendu dans le processus courant (sérialisé, pyplot n'étant pas
+  thread-safe), comportement historique.
+- Processus démarrés par `forkserver` (`spawn` sous Windows / macOS sans forkserver):
+  le pool est créé à la première tâche, souvent depuis un thread du pipeline; un `fork`
+  à ce moment copierait des verrous tenus par d'autres threads.
+
+EN:
+- Each process loads Hipparcos, the constellation lines and the miscellaneous-object
+  catalog once (initializer), then renders job after job.
+- Inputs/outputs are paths plus small records (dicts): FITS pixels are read inside the
+  render process, nothing large crosses process boundaries.
+- No network access in the workers: the SIMBAD cone search is done by the caller.
+- `workers <= 1`: render in the current process (serialised, pyplot is not
+  thread-safe), historical behaviour.
+- Workers are started with `forkserver` (`spawn` where forkserver is unavailable): the
+  pool is created on the first job, often from a pipeline thread; a `fork` at that point
+  would copy locks held by other threads.
+"""
+
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from astrogalery.astrometry.astrometry_png import make_astrometry_png_from_image_and_wcs
+from astrogalery.charts import atlas_chart
+from astrogalery.fits_index import set_fits_index
+from astrogalery.fits_utils import load_wcs_header_only, read_best_image_from_fits
+from astrogalery.scheduler import process_context
+
+try:
+    import numpy as np
+    from PIL import Image
+except Exception:  # pragma: no cover
+    np = None  # type: ignore
+    Image = None  # type: ignore
+
+# État par processus (rempli par init_worker)
+_WORKER: dict = {}
+
+
+def _load_chart_data(constellation_json: str, diverse_catalog: list[dict]) -> None:
+    if atlas_chart.HAS_ATLAS:
+        atlas_chart.load_hipparcos_df()
+    _WORKER["constellations"] = atlas_chart.load_constellation_lines(Path(constellation_json))
+    _WORKER["diverse_catalog"] = diverse_catalog
+
+
+def init_worker(constellation_json: str, diverse_catalog: list[dict]) -> None:
+    """Initialiseur: données de la carte atlas chargées une fois par processus."""
+    # Processus fils: index d'en-têtes en mémoire, pas la connexion SQLite héritée du parent (fork)
+    set_fits_index(None)
+    _load_chart_data(constellation_json, diverse_catalog)
+
+
+def read_image_from_jpg(jpg_path: Path) -> np.ndarray | None:
+    try:
+        im = Image.open(jpg_path).convert("L")
+        return np.array(im)
+    except Exception as e:
+        print(f"[WARN] Lecture JPG échouée {jpg_path.name}: {e}")
+        return None
+
+
+def astrometry_job(rec: dict) -> bool:
+    """
+    rec = {"fits", "jpg", "wcs", "out", "title", "max_pixels"} (chemins en str).
+    FITS décodé ici (repli JPG), WCS header-only relu ici; retourne True si le PNG est écrit.
+    """
+    wcs_header = load_wcs_header_only(Path(rec["wcs"]))
+    if wcs_header is None:
+        return False
+    fits_path = Path(rec["fits"])
+    img = read_best_image_from_fits(fits_path)
+    if img is None:
+        print(f"\n[WARN] Image FITS invalide: aucun HDU 2D dans {fits_path.name} -> fallback JPG")
+        img = read_image_from_jpg(Path(rec["jpg"]))
+    if img is None:
+        print(f"\n[WARN] Aucun pixel image disponible (FITS+JPG) pour {rec['title']}")
+        return False
+    return make_astrometry_png_from_image_and_wcs(
+        image_array_2d=img,
+        wcs_header=wcs_header,
+        out_png=Path(rec["out"]),
+        title=rec["title"],
+        max_pixels=rec["max_pixels"],
+    )
+
+
+def finder_chart_job(rec: dict) -> bool:
+    """
+    rec = {"ra", "dec", "out", "fov_arcmin", "inner_fov_arcmin", "title", "nearby",
+    "diverse_mag_limit", "mag_limit"}; `nearby` = résultat du cone search SIMBAD.
+    """
+    return atlas_chart.make_finder_chart_png(
+        float(rec["ra"]),
+        float(rec["dec"]),
+        Path(rec["out"]),
+        fov_arcmin=rec["fov_arcmin"],
+        inner_fov_arcmin=rec["inner_fov_arcmin"],
+        title=rec["title"],
+        diverse_catalog=_WORKER.get("diverse_catalog"),
+        diverse_mag_limit=rec["diverse_mag_limit"],
+        nearby=rec["nearby"],
+        mag_limit=rec["mag_limit"],
+        constellations=_WORKER.get("constellations"),
+    )
+
+
+class RenderPool:
+    """
+    Pool de rendu démarré à la première tâche et gardé entre deux builds (mode --watch).
+    Les méthodes `astrometry` / `finder_chart` retournent un Future (bool).
+    """
+
+    def __init__(self, workers: int, constellation_json: Path, diverse_catalog: list[dict]):
+        self.workers = max(1, int(workers))
+        self.initargs = (str(constellation_json), diverse_catalog)
+        self._pool: ProcessPoolExecutor | None = None
+        self._local_ready = False
+        self._lock = threading.Lock()
+
+    def _submit(self, fn: Callable[[dict], bool], rec: dict) -> Future:
+        with self._lock:
+            if self.workers > 1:
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=process_context(),
+                        initializer=init_worker,
+                        initargs=self.initargs,
+                    )
+                return self._pool.submit(fn, rec)
+
+            # Dans le processus courant: même initialisation, rendus sérialisés (pyplot)
+            fut: Future = Future()
+            try:
+                if not self._local_ready:
+                    _load_chart_data(*self.initargs)
+                    self._local_ready = True
+                fut.set_result(fn(rec))
+            except Exception as e:
+                fut.set_exception(e)
+            return fut
+
+    def astrometry(self, rec: dict) -> Future:
+        return self._submit(astrometry_job, rec)
+
+    def finder_chart(self, rec: dict) -> Future:
+        return self._submit(finder_chart_job, rec)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True)
+                self._pool = None
@@ -0,0 +1,131 @@
+"""Ordonnanceur de tâches en graphe de dépendances (pipeline `dag`).
+
+FR:
+- Chaque tâche a un type: `net` (SIMBAD, Nova, Open-Meteo) ou `cpu` (décodage FITS,
+  matplotlib); chaque type a son propre pool de threads, donc sa propre limite de
+  concurrence.
+- Une tâche n'est lancée que lorsque toutes ses dépendances sont terminées: pendant
+  qu'un objet attend Nova, un autre est rendu, et inversement.
+- Une dépendance en échec fait échouer les tâches qui en dépendent (sans les exécuter).
+- Une tâche peut soumettre d'autres tâches (ex.: le nombre de solves d'un objet n'est
+  connu qu'après l'enrichissement de ses items).
+
+EN:
+- Each task has a kind: `net` (SIMBAD, Nova, Open-Meteo) or `cpu` (FITS decode,
+  matplotlib); each kind has its own thread pool, hence its own concurrency limit.
+- A task only starts once all its dependencies are done: while one object waits on
+  Nova another one is rendered, and vice versa.
+- A failed dependency fails its dependents (they are not run).
+- Tasks may submit further tasks (e.g. the number of solves for an object is only
+  known once its items are enriched).
+
+`process_context()`: start method for every process pool of the build (render, images,
+DeepZoom): `forkserver`, or `spawn` where it is unavailable, never `fork` from a
+process that already runs threads (scan, network, SQLite store).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterable
+
+NET = "net"
+CPU = "cpu"
+
+
+def process_context():
+    """Contexte multiprocessing sans fork depuis un processus multithread (forkserver, sinon spawn)."""
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+
+
+class DependencyFailed(Exception):
+    """Une dépendance de la tâche a échoué; la tâche n'a pas été exécutée."""
+
+
+class StageScheduler:
+    def __init__(self, limits: dict[str, int]):
+        self.limits = {kind: max(1, int(n)) for kind, n in limits.items()}
+        self._pools = {
+            kind: ThreadPoolExecutor(max_workers=n, thread_name_prefix=f"stage-{kind}")
+            for kind, n in self.limits.items()
+        }
+        self._lock = threading.Lock()
+        self._tasks: list[tuple[str, Future]] = []
+
+    def submit(
+        self,
+        name: str,
+        kind: str,
+        fn: Callable,
+        *args,
+        deps: Iterable[Future] = (),
+        **kwargs,
+    ) -> Future:
+        """Planifie `fn(*args, **kwargs)` sur le pool `kind` après `deps`; retourne son Future."""
+        if kind not in self._pools:
+            raise ValueError(f"type de tâche inconnu: {kind!r}")
+        result: Future = Future()
+        deps = list(deps)
+        with self._lock:
+            self._tasks.append((name, result))
+
+        def _run():
+            if not result.set_running_or_notify_cancel():
+                return
+            try:
+                result.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                result.set_exception(e)
+
+        def _dispatch():
+            failed = [d for d in deps if d.cancelled() or d.exception() is not None]
+            if failed:
+                result.set_exception(DependencyFailed(name))
+                return
+            self._pools[kind].submit(_run)
+
+        if not deps:
+            _dispatch()
+            return result
+
+        remaining = [len(deps)]
+        counter_lock = threading.Lock()
+
+        def _on_done(_):
+            with counter_lock:
+                remaining[0] -= 1
+                ready = remaining[0] == 0
+            if ready:
+                _dispatch()
+
+        for d in deps:
+            d.add_done_callback(_on_done)
+        return result
+
+    def join(self) -> list[tuple[str, BaseException]]:
+        """Attend toutes les tâches (y compris celles soumises en cours de route); retourne les échecs."""
+        failures = []
+        seen = 0
+        while True:
+            with self._lock:
+                pending = self._tasks[seen:]
+                seen = len(self._tasks)
+            if not pending:
+                return failures
+            for name, fut in pending:
+                exc = fut.exception()
+                if exc is not None and not isinstance(exc, DependencyFailed):
+                    failures.append((name, exc))
+
+    def shutdown(self) -> None:
+        for pool in self._pools.values():
+            pool.shutdown(wait=True)
+
+    def __enter__(self) -> "StageScheduler":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.shutdown()
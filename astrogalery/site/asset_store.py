@@ -0,0 +1,80 @@
+"""Magasin d'assets adressé par contenu (site/a/).
+
+FR:
+- Chaque fichier publié (images, vignettes, variantes, PNG en cache) est stocké sous
+  `a/<2 premiers car.>/<hash><ext>`; deux sources identiques ne donnent qu'un fichier,
+  et renommer un objet ne change pas l'URL de ses images.
+- Le hash (BLAKE2b) est mémorisé par chemin + `file_fingerprint` dans
+  `cache/asset_store.json`: une source inchangée n'est pas relue.
+- `data/assets.json` publie la correspondance nom logique -> chemin haché, et
+  `_headers` (Netlify / Cloudflare Pages) déclare `Cache-Control: immutable` pour `a/*`.
+
+EN:
+- Every published file (images, thumbnails, variants, cached PNGs) is stored as
+  `a/<first 2 chars>/<hash><ext>`; identical sources yield a single file and renaming
+  an object does not change its image URLs.
+- The hash (BLAKE2b) is remembered per path + `file_fingerprint` in
+  `cache/asset_store.json`: unchanged sources are not re-read.
+- `data/assets.json` publishes the logical name -> hashed path mapping, and `_headers`
+  (Netlify / Cloudflare Pages) declares `Cache-Control: immutable` for `a/*`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+from pathlib import Path
+
+from astrogalery.cache import file_fingerprint, load_json, save_json
+
+ASSET_STORE_VERSION = 1
+ASSET_PREFIX = "a"
+CHUNK_SIZE = 1 << 20
+
+IMMUTABLE_HEADERS = (
+    f"/{ASSET_PREFIX}/*\n"
+    "  Cache-Control: public, max-age=31536000, immutable\n"
+)
+
+
+def hash_file(p: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    with open(p, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class AssetStore:
+    def __init__(self, path: Path):
+        self.path = path
+        data = load_json(path)
+        if data.get("version") != ASSET_STORE_VERSION:
+            data = {}
+        self.prev_hashes: dict = data.get("hashes", {}) or {}
+        self.hashes: dict = {}
+        self.logical: dict = {}
+        self.hashed = 0
+
+    def digest(self, src: Path) -> str:
+        """Hash du contenu, relu seulement si l'empreinte (taille/mtime) a changé."""
+        key = str(src)
+        fp = file_fingerprint(src)
+        rec = self.hashes.get(key) or self.prev_hashes.get(key)
+        if rec and rec[0] == fp:
+            digest = rec[1]
+        else:
+            digest = hash_file(src)
+            self.hashed += 1
+        self.hashes[key] = [fp, digest]
+        return digest
+
+    def path_for(self, src: Path, logical: str | Path) -> tuple[Path, str]:
+        """(chemin haché relatif à site/, hash) et enregistrement nom logique -> chemin."""
+        digest = self.digest(src)
+        rel = Path(ASSET_PREFIX) / digest[:2] / f"{digest}{Path(logical).suffix.lower()}"
+        self.logical[Path(logical).as_posix()] = rel.as_posix()
+        return rel, digest
+
+    def save(self) -> None:
+        # Seules les sources vues pendant ce build sont conservées
+        save_json(self.path, {"version": ASSET_STORE_VERSION, "hashes": self.hashes})
@@ -0,0 +1,145 @@
+"""Pyramides de tuiles DeepZoom (DZI) pour les images héros (optionnel).
+
+FR:
+- `pyvips` (si installé): `dzsave` en accès séquentiel, mémoire bornée quelle que soit
+  la taille de la mosaïque.
+- Sinon Pillow: la mémoire n'est PAS bornée. L'image entière est décodée en RGB
+  (3 octets/pixel, ~1,5 Go pour une mosaïque de 500 Mpx), puis chaque niveau est
+  obtenu par réduction du précédent (un niveau, plus brièvement sa moitié, en
+  mémoire). Pour les très grandes mosaïques, installer `pyvips`.
+- Pool de processus sur les images, cache disque par empreinte de la source.
+- Visionneuse: OpenSeadragon (CDN) ne télécharge que les tuiles visibles.
+
+EN:
+- `pyvips` (when installed): sequential-access `dzsave`, bounded memory whatever the
+  mosaic size.
+- Otherwise Pillow: memory is NOT bounded. The whole image is decoded as RGB
+  (3 bytes/pixel, ~1.5 GB for a 500 Mpx mosaic), then each level is reduced from the
+  previous one (one level, briefly plus its half, in memory). Install `pyvips` for
+  very large mosaics.
+- Process pool across images, on-disk cache keyed by source fingerprint.
+- Viewer: OpenSeadragon (CDN) only fetches visible tiles.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from astrogalery.scheduler import process_context
+from astrogalery.site.images import HAS_PIL, cache_stem
+
+try:
+    import pyvips
+    HAS_PYVIPS = True
+except Exception:  # pragma: no cover
+    pyvips = None  # type: ignore
+    HAS_PYVIPS = False
+
+if HAS_PIL:
+    from PIL import Image
+
+TILE_SIZE = 254
+OVERLAP = 1
+TILE_FORMAT = "jpg"
+TILE_QUALITY = 85
+DZI_NAME = "image"
+
+OSD_CDN_JS = "https://cdn.jsdelivr.net/npm/openseadragon@4.1.1/build/openseadragon/openseadragon.min.js"
+OSD_CDN_IMAGES = "https://cdn.jsdelivr.net/npm/openseadragon@4.1.1/build/openseadragon/images/"
+
+
+def dzi_xml(width: int, height: int) -> str:
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<Image xmlns="http://schemas.microsoft.com/deepzoom/2008" TileSize="{TILE_SIZE}" '
+        f'Overlap="{OVERLAP}" Format="{TILE_FORMAT}">\n'
+        f'  <Size Width="{width}" Height="{height}"/>\n'
+        '</Image>\n'
+    )
+
+
+def _cut_level(im, level_dir: Path) -> None:
+    level_dir.mkdir(parents=True, exist_ok=True)
+    w, h = im.size
+    for col in range(math.ceil(w / TILE_SIZE)):
+        for row in range(math.ceil(h / TILE_SIZE)):
+            x0 = max(0, col * TILE_SIZE - OVERLAP)
+            y0 = max(0, row * TILE_SIZE - OVERLAP)
+            x1 = min(w, (col + 1) * TILE_SIZE + OVERLAP)
+            y1 = min(h, (row + 1) * TILE_SIZE + OVERLAP)
+            im.crop((x0, y0, x1, y1)).save(level_dir / f"{col}_{row}.{TILE_FORMAT}", "JPEG", quality=TILE_QUALITY)
+
+
+def _tile_with_pillow(src: Path, base: Path) -> None:
+    """Repli sans pyvips: l'image pleine résolution est entièrement en mémoire (voir le module)."""
+    files_dir = base.parent / f"{base.name}_files"
+    with Image.open(src) as opened:
+        im = opened.convert("RGB")
+    width, height = im.size
+    max_level = math.ceil(math.log2(max(width, height))) if max(width, height) > 1 else 0
+    for level in range(max_level, -1, -1):
+        _cut_level(im, files_dir / str(level))
+        if level == 0:
+            break
+        # niveau suivant: moitié (arrondi supérieur), l'ancien niveau est libéré
+        nw, nh = max(1, math.ceil(im.size[0] / 2)), max(1, math.ceil(im.size[1] / 2))
+        im = im.resize((nw, nh), Image.LANCZOS, reducing_gap=2.0)
+    (base.parent / f"{base.name}.dzi").write_text(dzi_xml(width, height), encoding="utf-8")
+
+
+def tile_job(job: tuple) -> tuple[str, bool]:
+    """Tâche du pool: job = (source, dossier de sortie). Écrit <dossier>/image.dzi + image_files/."""
+    src, out_dir = job
+    out_dir = Path(out_dir)
+    tmp_dir = out_dir.with_name(out_dir.name + ".tmp")
+    try:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        tmp_dir.mkdir(parents=True)
+        base = tmp_dir / DZI_NAME
+        if HAS_PYVIPS:
+            img = pyvips.Image.new_from_file(str(src), access="sequential")
+            img.dzsave(str(base), tile_size=TILE_SIZE, overlap=OVERLAP, suffix=f".{TILE_FORMAT}[Q={TILE_QUALITY}]")
+        else:
+            _tile_with_pillow(Path(src), base)
+        shutil.rmtree(out_dir, ignore_errors=True)
+        os.replace(tmp_dir, out_dir)
+        return src, True
+    except Exception as e:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        print(f"[WARN] Pyramide DeepZoom impossible pour {Path(src).name}: {e}")
+        return src, False
+
+
+def ensure_deepzoom(sources: Iterable[Path], cache_dir: Path, workers: int = 1) -> dict[str, Path]:
+    """Retourne {source: dossier de la pyramide en cache}, en générant celles qui manquent."""
+    if not (HAS_PYVIPS or HAS_PIL):
+        return {}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    found: dict[str, Path] = {}
+    jobs = []
+    for src in sources:
+        src = Path(src)
+        try:
+            out_dir = cache_dir / cache_stem(src, f"dz{TILE_SIZE}-{OVERLAP}")
+        except OSError:
+            continue
+        found[str(src)] = out_dir
+        if not (out_dir / f"{DZI_NAME}.dzi").exists():
+            jobs.append((str(src), str(out_dir)))
+
+    if jobs:
+        backend = "pyvips" if HAS_PYVIPS else "Pillow"
+        print(f"🔍 DeepZoom: {len(jobs)} pyramide(s) à générer ({backend}, {workers} processus)...")
+        if workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=process_context()) as pool:
+                list(pool.map(tile_job, jobs))
+        else:
+            list(map(tile_job, jobs))
+
+    return {k: v for k, v in found.items() if (v / f"{DZI_NAME}.dzi").exists()}
@@ -0,0 +1,210 @@
+"""Images dérivées du site (vignettes JPEG + WebP, variantes responsives).
+
+FR:
+- Quand Seestar n'a pas produit de `_thn.jpg`, une vignette compacte est générée
+  au lieu de publier l'image pleine taille comme vignette.
+- Décodage réduit avec Pillow (`draft` = mise à l'échelle DCT du JPEG, puis `reduce`
+  via `thumbnail(reducing_gap=...)`), dans un pool de processus.
+- Cache disque par empreinte de la source: chaque vignette n'est produite qu'une fois.
+- Variantes de largeur fixe (ex. 480/1024/2048 px), JPEG + WebP, pour `srcset`; les
+  dimensions sont lues dans l'en-tête de l'image, sans décoder les pixels.
+
+EN:
+- When Seestar did not write a `_thn.jpg`, a compact thumbnail is generated instead
+  of publishing the full-size image as the card image.
+- Reduced decoding with Pillow (`draft` = JPEG DCT scaling, then `reduce` through
+  `thumbnail(reducing_gap=...)`) in a process pool.
+- On-disk cache keyed by source fingerprint: each thumbnail is produced only once.
+- Fixed-width variants (e.g. 480/1024/2048 px), JPEG + WebP, for `srcset`; dimensions
+  are read from the image header without decoding pixels.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterable
+
+from astrogalery.cache import file_fingerprint
+from astrogalery.scheduler import process_context
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except Exception:  # pragma: no cover
+    Image = None  # type: ignore
+    HAS_PIL = False
+
+THUMB_SIZE_DEFAULT = 480
+VARIANT_WIDTHS_DEFAULT = (480, 1024, 2048)
+JPEG_QUALITY = 82
+WEBP_QUALITY = 80
+
+
+def default_workers() -> int:
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def cache_stem(src: Path, tag: str) -> str:
+    """Nom de base en cache: change dès que la source (taille/mtime) ou le réglage change."""
+    digest = hashlib.sha1(f"{src.resolve()}|{file_fingerprint(src)}|{tag}".encode("utf-8")).hexdigest()[:16]
+    return f"{src.stem}-{digest}"
+
+
+def image_size(path: Path) -> tuple[int, int] | None:
+    """(largeur, hauteur) lues dans l'en-tête (Pillow ne décode pas les pixels ici)."""
+    if not HAS_PIL:
+        return None
+    try:
+        with Image.open(path) as im:
+            return im.size
+    except Exception:
+        return None
+
+
+def fit_box(size: tuple[int, int], box: tuple[int, int]) -> tuple[int, int]:
+    """Dimensions de `size` réduites pour tenir dans `box` (jamais agrandies)."""
+    w, h = size
+    scale = min(1.0, box[0] / w, box[1] / h)
+    return max(1, round(w * scale)), max(1, round(h * scale))
+
+
+def open_reduced(src: Path, box: tuple[int, int]):
+    """
+    Ouvre `src` réduit pour tenir dans `box` sans décoder la pleine résolution.
+    Retourne une copie en mémoire: le fichier source est fermé au retour.
+    """
+    with Image.open(src) as src_im:
+        src_im.draft("RGB", fit_box(src_im.size, box))
+        # convert() retourne toujours une nouvelle image (copie si déjà RGB)
+        im = src_im.convert("RGB")
+    im.thumbnail(box, Image.LANCZOS, reducing_gap=2.0)
+    return im
+
+
+def _save(im, out: Path, fmt: str) -> None:
+    tmp = out.with_name(out.name + ".tmp")
+    if fmt == "WEBP":
+        im.save(tmp, "WEBP", quality=WEBP_QUALITY, method=4)
+    else:
+        im.save(tmp, "JPEG", quality=JPEG_QUALITY, optimize=True, progressive=True)
+    os.replace(tmp, out)
+
+
+def render_job(job: tuple) -> tuple[str, bool]:
+    """
+    Tâche du pool (fonction de module: importable par les processus Windows).
+    job = (source, [(sortie, "JPEG"|"WEBP", (largeur max, hauteur max)), ...])
+    La source est décodée une seule fois, à la plus grande taille demandée.
+    """
+    src, outputs = job
+    try:
+        boxes = sorted({tuple(box) for _, _, box in outputs}, reverse=True)
+        im = open_reduced(Path(src), boxes[0])
+        for box in boxes:
+            im.thumbnail(box, Image.LANCZOS, reducing_gap=2.0)
+            for out, fmt, out_box in outputs:
+                if tuple(out_box) != box:
+                    continue
+                out = Path(out)
+                out.parent.mkdir(parents=True, exist_ok=True)
+                _save(im, out, fmt)
+        return src, True
+    except Exception as e:
+        print(f"[WARN] Image dérivée impossible pour {Path(src).name}: {e}")
+        return src, False
+
+
+def run_jobs(jobs: list[tuple], workers: int = 1) -> dict[str, bool]:
+    if not jobs:
+        return {}
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)), mp_context=process_context()) as pool:
+            return dict(pool.map(render_job, jobs, chunksize=4))
+    return dict(map(render_job, jobs))
+
+
+def ensure_thumbnails(
+    sources: Iterable[Path],
+    cache_dir: Path,
+    size: int = THUMB_SIZE_DEFAULT,
+    workers: int = 1,
+) -> dict[str, tuple[Path, Path]]:
+    """
+    Retourne {source: (vignette.jpg, vignette.webp)} en cache, en générant les manquantes.
+    Sans Pillow, retourne {} (les pages gardent l'image pleine taille comme vignette).
+    """
+    if not HAS_PIL:
+        return {}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    found: dict[str, tuple[Path, Path]] = {}
+    jobs = []
+    for src in sources:
+        src = Path(src)
+        try:
+            stem = cache_stem(src, f"thn{size}")
+        except OSError:
+            continue
+        out_jpg = cache_dir / f"{stem}_thn.jpg"
+        out_webp = cache_dir / f"{stem}_thn.webp"
+        found[str(src)] = (out_jpg, out_webp)
+        if not (out_jpg.exists() and out_webp.exists()):
+            box = (size, size)
+            jobs.append((str(src), [(str(out_jpg), "JPEG", box), (str(out_webp), "WEBP", box)]))
+
+    if jobs:
+        print(f"🖼️  Vignettes: {len(jobs)} à générer ({workers} processus)...")
+    results = run_jobs(jobs, workers)
+    return {k: v for k, v in found.items() if results.get(k, True) and v[0].exists()}
+
+
+def ensure_variants(
+    sources: Iterable[Path],
+    cache_dir: Path,
+    widths: Iterable[int] = VARIANT_WIDTHS_DEFAULT,
+    workers: int = 1,
+) -> dict[str, list[tuple[int, int, Path, Path]]]:
+    """
+    Retourne {source: [(largeur, hauteur, variante.jpg, variante.webp), ...]} (largeurs
+    croissantes), en générant les variantes manquantes. Seules les largeurs inférieures
+    à celle de la source sont produites (pas d'agrandissement).
+    """
+    if not HAS_PIL:
+        return {}
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    widths = sorted({int(w) for w in widths if int(w) > 0})
+
+    found: dict[str, list[tuple[int, int, Path, Path]]] = {}
+    jobs = []
+    for src in sources:
+        src = Path(src)
+        size = image_size(src)
+        if size is None:
+            continue
+        try:
+            stem = cache_stem(src, "w")
+        except OSError:
+            continue
+        variants = []
+        outputs = []
+        for w in widths:
+            if w >= size[0]:
+                break
+            vw, vh = fit_box(size, (w, size[1]))
+            out = cache_dir / f"{stem}-{w}.jpg"
+            out_webp = cache_dir / f"{stem}-{w}.webp"
+            variants.append((vw, vh, out, out_webp))
+            if not (out.exists() and out_webp.exists()):
+                box = (w, size[1])
+                outputs += [(str(out), "JPEG", box), (str(out_webp), "WEBP", box)]
+        found[str(src)] = variants
+        if outputs:
+            jobs.append((str(src), outputs))
+
+    if jobs:
+        print(f"🖼️  Variantes responsives: {sum(len(j[1]) for j in jobs)} à générer ({workers} processus)...")
+    run_jobs(jobs, workers)
+    return {k: [v for v in vs if v[2].exists() and v[3].exists()] for k, vs in found.items()}
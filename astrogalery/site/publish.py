@@ -0,0 +1,129 @@
+"""Publication des fichiers dans site/ (copie, lien physique, reflink, lien symbolique).
+
+FR:
+- `copy` (défaut): `shutil.copy2`, comportement historique.
+- `hardlink`: `os.link`, aucun octet écrit (même volume seulement).
+- `reflink`: clone copy-on-write (ioctl FICLONE: Btrfs, XFS, bcachefs...); le fichier
+  publié est indépendant de la source, sans dupliquer les blocs.
+- `symlink`: lien symbolique vers la source (serveur local; à éviter pour un envoi FTP).
+- Repli sur la copie fichier par fichier (autre volume, système sans reflink, droits).
+- Une destination déjà identique (même inode, même cible, ou même taille + mtime)
+  n'est pas réécrite.
+- Les fichiers produits dans site/ ou cache/ passent par `atomic_output` (fichier
+  temporaire + `os.replace`): avec `hardlink`/`symlink`, réécrire en place une sortie
+  publiée modifierait aussi la source partagée (même inode).
+
+EN:
+- `copy` (default): `shutil.copy2`, historical behaviour.
+- `hardlink`: `os.link`, no bytes written (same volume only).
+- `reflink`: copy-on-write clone (FICLONE ioctl: Btrfs, XFS, bcachefs...); the published
+  file is independent from the source without duplicating blocks.
+- `symlink`: symbolic link to the source (local serving; avoid for FTP uploads).
+- Falls back to copying per file (other volume, no reflink support, permissions).
+- A destination that is already identical (same inode, same target, or same size +
+  mtime) is not rewritten.
+- Files produced in site/ or cache/ go through `atomic_output` (temporary file +
+  `os.replace`): with `hardlink`/`symlink`, rewriting a published output in place would
+  also change the shared source (same inode).
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+PUBLISH_MODES = ("copy", "hardlink", "reflink", "symlink")
+
+FICLONE = 0x40049409  # linux/fs.h
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    if not sys.platform.startswith("linux"):
+        raise OSError("reflink non supporté sur cette plateforme")
+    import fcntl
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            dst.unlink()
+            raise
+    shutil.copystat(src, dst)
+
+
+@contextmanager
+def atomic_output(dst: Path) -> Iterator[Path]:
+    """
+    Chemin temporaire à écrire (même dossier, même extension que `dst`), renommé sur
+    `dst` si le bloc réussit. La destination reçoit un nouvel inode: un lien physique ou
+    symbolique existant n'est jamais réécrit en place.
+    """
+    dst = Path(dst)
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dst.with_name(f".{dst.stem}.{os.getpid()}-{threading.get_ident()}.tmp{dst.suffix}")
+    try:
+        yield tmp
+        os.replace(tmp, dst)
+    finally:
+        if tmp.exists():
+            tmp.unlink()
+
+
+def copy_atomic(src: Path, dst: Path) -> None:
+    """`shutil.copy2` vers `dst` sans écrire dans un inode partagé (voir atomic_output)."""
+    with atomic_output(dst) as tmp:
+        shutil.copy2(src, tmp)
+
+
+def is_identical(src: Path, dst: Path, mode: str) -> bool:
+    """Vrai si `dst` publie déjà `src` (rien à faire)."""
+    try:
+        if mode == "symlink":
+            return dst.is_symlink() and Path(os.readlink(dst)) == src.resolve()
+        if dst.is_symlink():
+            return False
+        if mode == "hardlink" and os.path.samefile(src, dst):
+            return True
+        s, d = src.stat(), dst.stat()
+        return s.st_size == d.st_size and s.st_mtime_ns == d.st_mtime_ns
+    except OSError:
+        return False
+
+
+def publish_file(src: Path, dst: Path, mode: str = "copy") -> str:
+    """
+    Publie `src` vers `dst` et retourne le mode effectivement utilisé
+    ("identical" si la destination était déjà à jour).
+    """
+    src = Path(src)
+    dst = Path(dst)
+    if is_identical(src, dst, mode):
+        return "identical"
+
+    dst.parent.mkdir(parents=True, exist_ok=True)
+    if dst.exists() or dst.is_symlink():
+        dst.unlink()
+
+    if mode != "copy":
+        try:
+            if mode == "hardlink":
+                os.link(src, dst)
+            elif mode == "reflink":
+                _reflink(src, dst)
+            elif mode == "symlink":
+                os.symlink(src.resolve(), dst)
+            else:
+                raise ValueError(f"mode de publication inconnu: {mode}")
+            return mode
+        except (OSError, NotImplementedError):
+            # autre volume (EXDEV), FS sans reflink, symlink interdit (Windows sans droits)...
+            pass
+
+    shutil.copy2(src, dst)
+    return "copy"
@@ -0,0 +1,141 @@
+"""Surveillance de MyWorks (mode `--watch`).
+
+FR:
+- Détecte les dossiers d'observation nouveaux ou modifiés et les signale par lots.
+- Utilise `watchdog` (inotify / ReadDirectoryChangesW / FSEvents) s'il est installé,
+  sinon un polling léger basé sur l'index de scan (un `stat` par dossier).
+- Ignore les sorties et caches du générateur (site/, cache/, .cache/) et les *_sub / *-sub.
+
+EN:
+- Detects new or changed observation folders and reports them in batches.
+- Uses `watchdog` (inotify / ReadDirectoryChangesW / FSEvents) when installed,
+  otherwise a lightweight poll driven by the scan index (one `stat` per folder).
+- Ignores the generator's own outputs and caches (site/, cache/, .cache/) and *_sub / *-sub.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from astrogalery.cache import file_fingerprint
+from astrogalery.fs_scan import SKIP_DIR_NAMES, ScanIndex, is_in_sub_folder
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+    HAS_WATCHDOG = True
+except Exception:  # pragma: no cover
+    FileSystemEventHandler = object  # type: ignore
+    Observer = None  # type: ignore
+    HAS_WATCHDOG = False
+
+IGNORED_DIR_NAMES = set(SKIP_DIR_NAMES) | {".cache"}
+WATCHED_SUFFIXES = (".jpg", ".fit", ".fits", ".xlsx")
+
+
+def is_relevant_path(path: Path, root: Path) -> bool:
+    """Vrai si un changement sur `path` peut modifier la galerie."""
+    try:
+        rel = Path(path).relative_to(root)
+    except ValueError:
+        return False
+    if any(part in IGNORED_DIR_NAMES for part in rel.parts):
+        return False
+    if is_in_sub_folder(rel):
+        return False
+    name = rel.name.lower()
+    return (not rel.suffix) or name.endswith(WATCHED_SUFFIXES)
+
+
+def _fingerprints(files: Iterable[Path]) -> dict:
+    out = {}
+    for f in files:
+        try:
+            out[str(f)] = file_fingerprint(Path(f))
+        except OSError:
+            out[str(f)] = ""
+    return out
+
+
+class _EventCollector(FileSystemEventHandler):
+    def __init__(self, root: Path):
+        self.root = root
+        self.lock = threading.Lock()
+        self.pending: set[str] = set()
+        self.last_event = 0.0
+
+    def on_any_event(self, event):
+        paths = [getattr(event, "src_path", ""), getattr(event, "dest_path", "")]
+        for raw in paths:
+            if not raw:
+                continue
+            p = Path(raw)
+            if not is_relevant_path(p, self.root):
+                continue
+            with self.lock:
+                self.pending.add(str(p if event.is_directory else p.parent))
+                self.last_event = time.monotonic()
+
+    def drain_if_quiet(self, quiet_s: float) -> set[str]:
+        with self.lock:
+            if not self.pending or time.monotonic() - self.last_event < quiet_s:
+                return set()
+            out, self.pending = self.pending, set()
+            return out
+
+
+def watch_changes(
+    root: Path,
+    interval: float = 5.0,
+    extra_files: Iterable[Path] = (),
+    workers: int = 1,
+) -> Iterator[set[str]]:
+    """
+    Générateur infini: produit l'ensemble des dossiers modifiés, une fois l'activité
+    retombée (anti-rebond = `interval`), pour ne pas reconstruire au milieu d'une copie.
+    `extra_files` (ex. catalogues XLSX) sont surveillés par empreinte.
+    """
+    root = Path(root)
+    extra_files = [Path(f) for f in extra_files]
+    extra_fp = _fingerprints(extra_files)
+
+    def _extra_changes() -> set[str]:
+        nonlocal extra_fp
+        now = _fingerprints(extra_files)
+        changed = {k for k in now if now[k] != extra_fp.get(k)}
+        extra_fp = now
+        return changed
+
+    if HAS_WATCHDOG:
+        collector = _EventCollector(root)
+        observer = Observer()
+        observer.schedule(collector, str(root), recursive=True)
+        observer.start()
+        try:
+            while True:
+                time.sleep(min(1.0, interval))
+                changed = collector.drain_if_quiet(interval) | _extra_changes()
+                if changed:
+                    yield changed
+        finally:
+            observer.stop()
+            observer.join()
+        return
+
+    # Polling: seuls les dossiers dont le mtime a changé sont relus par l'index
+    index = ScanIndex(workers=workers)
+    index.refresh(root)
+    pending: set[str] = set()
+    while True:
+        time.sleep(interval)
+        index.refresh(root)
+        new = set(index.changed) | _extra_changes()
+        if new:
+            pending |= new
+            continue  # attendre un cycle calme avant de reconstruire
+        if pending:
+            yield pending
+            pending = set()
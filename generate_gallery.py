@@ -24,10 +24,14 @@ import re
 import json
 import time
 import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import groupby
 from datetime import datetime, date
 from pathlib import Path
 try:
-    from astrogalery.fs_scan import is_in_sub_folder, is_thumbnail_file, find_final_jpgs
+    from astrogalery.fs_scan import is_in_sub_folder, is_thumbnail_file, find_final_jpgs, ScanIndex
 except Exception as _e:
     # Fallback: keep local implementations if the package folder is missing.
     # This preserves behavior and avoids hard failure.
@@ -36,7 +40,20 @@ except Exception as _e:
     except Exception:
         pass
 
-from astrogalery.fits_utils import extract_fits_metadata, find_stacked_fits_in_dir, read_best_image_from_fits, wcs_center_from_header, load_wcs_header_only, looks_like_fits_bytes
+from astrogalery.fits_utils import extract_fits_metadata, find_stacked_fits_in_dir, wcs_center_from_header, load_wcs_header_only, looks_like_fits_bytes
+from astrogalery.cache import CACHE_STORE_PATH, file_fingerprint, get_cache_store
+from astrogalery.fits_index import FitsHeaderIndex, read_fits_header, set_fits_index
+from astrogalery.build_manifest import BuildManifest, signature
+from astrogalery.scheduler import CPU, NET, StageScheduler
+from astrogalery import http_client, net
+from astrogalery.enrich import simbad_client, simbad_local, sky_tiles
+from astrogalery.site.publish import PUBLISH_MODES, atomic_output, copy_atomic
+from astrogalery.site.asset_store import IMMUTABLE_HEADERS, AssetStore
+from astrogalery.site.deepzoom import DZI_NAME, OSD_CDN_IMAGES, OSD_CDN_JS, ensure_deepzoom
+from astrogalery.site.images import THUMB_SIZE_DEFAULT, VARIANT_WIDTHS_DEFAULT, default_workers, ensure_thumbnails, ensure_variants, image_size
+from astrogalery.astrometry.astrometry_png import DEFAULT_MAX_PIXELS
+from astrogalery.charts.atlas_chart import cone_radius_deg, ensure_hipparcos_file
+from astrogalery.render_pool import RenderPool
 
 # --- Module météo (optionnel) / Weather module (optional) ---
 try:
@@ -52,34 +69,15 @@ WEATHER_DONE = 0
 import xml.etree.ElementTree as ET
 
 import requests
-import numpy as np
 
-import matplotlib
-matplotlib.use("Agg")
-import matplotlib.pyplot as plt
-
-from astropy.io import fits
-from astropy.wcs import WCS
-from astropy.visualization import ZScaleInterval, ImageNormalize
-
-# Optional (carte atlas) - Open Source, rendu local (Hipparcos + lignes de constellations Stellarium)
-# - nécessite une connexion Internet seulement au *premier* lancement pour télécharger:
-#   1) le catalogue Hipparcos (Skyfield cache) et 2) le fichier constellationship.fab (Stellarium)
-try:
-    from skyfield.api import load as sf_load
-    from skyfield.data import hipparcos as sf_hipparcos
-    from astropy.coordinates import SkyCoord, SkyOffsetFrame
-    import astropy.units as u
-    HAS_ATLAS = True
-except Exception:
-    HAS_ATLAS = False
+# PNG astrométrie: image réduite par blocs au budget de pixels de la figure ("0" = pleine résolution)
+ASTROMETRY_PNG_MAX_PIXELS = int(os.environ.get("GNU_ASTRO_GALERY_ASTROMETRY_PNG_MAX_PIXELS", str(DEFAULT_MAX_PIXELS)))
 
 # Réglages carte atlas (finder chart)
 ATLAS_FOV_ARCMIN = float(os.environ.get("GNU_ASTRO_GALERY_ATLAS_FOV_ARCMIN", "240"))  # champ total en arcmin (ex: 240 = 4°)
 ATLAS_MAG_LIMIT = float(os.environ.get("GNU_ASTRO_GALERY_ATLAS_MAG_LIMIT", "10"))    # limite de magnitude (plus grand = plus d'étoiles)
 
 
-from PIL import Image
 from openpyxl import load_workbook
 
 
@@ -95,7 +93,12 @@ ASTRO_NOVA_SITE = "https://nova.astrometry.net/"
 SIMBAD_TAP = "https://simbad.cds.unistra.fr/simbad/sim-tap/sync"
 
 ASTROMETRY_MODE = "latest_per_object"  # "latest_per_object" or "all"
+# Ancien cache SIMBAD (JSON), importé dans l'espace de noms "simbad" du magasin de cache
 CACHE_PATH = Path("cache") / "object_info.json"
+# Durées de vie des entrées SIMBAD du cache selon leur statut (trouvé / inconnu / erreur réseau)
+SIMBAD_TTL_HIT_S = float(os.environ.get("GNU_ASTRO_GALERY_SIMBAD_TTL_HIT_DAYS", "180")) * 86400
+SIMBAD_TTL_NOT_FOUND_S = float(os.environ.get("GNU_ASTRO_GALERY_SIMBAD_TTL_NOT_FOUND_DAYS", "14")) * 86400
+SIMBAD_TTL_ERROR_S = float(os.environ.get("GNU_ASTRO_GALERY_SIMBAD_TTL_ERROR_HOURS", "1")) * 3600
 
 # Catalogue Messier (XLSX) placé au même endroit que le script
 MESSIER_XLSX_NAME = "Objets Messiers..xlsx"
@@ -112,12 +115,86 @@ ASTRO_CACHE_INDEX = ASTRO_CACHE_DIR / "index.json"
 STAR_CACHE_DIR = Path("cache") / "starcharts"
 STAR_CACHE_INDEX = STAR_CACHE_DIR / "index.json"
 
+# Index de cache regroupés dans le magasin SQLite (cache/cache.sqlite): espace de noms -> ancien
+# fichier JSON, importé une seule fois (le fichier n'est plus relu ni réécrit ensuite)
+LEGACY_JSON_CACHES = {
+    "simbad": CACHE_PATH,
+    "astrometry": ASTRO_CACHE_INDEX,
+    "starcharts": STAR_CACHE_INDEX,
+    "space_weather": Path(".cache") / "space_weather_cache.json",
+}
+
+# Build incrémental: on ne supprime plus site/ et on ne réécrit que les sorties dont les entrées ont changé.
+# Incremental build: keep site/ and only rewrite outputs whose inputs changed (GNU_ASTRO_GALERY_INCREMENTAL=1).
+INCREMENTAL_BUILD = os.environ.get("GNU_ASTRO_GALERY_INCREMENTAL", "0").strip() == "1"
+BUILD_MANIFEST_PATH = Path("cache") / "build_manifest.json"
+
+# Index de scan persistant: seuls les répertoires dont le mtime a changé sont relus (GNU_ASTRO_GALERY_SCAN_INDEX=1).
+# Persistent scan index: only directories whose mtime changed are re-listed.
+SCAN_INDEX_ENABLED = os.environ.get("GNU_ASTRO_GALERY_SCAN_INDEX", "0").strip() == "1"
+SCAN_INDEX_PATH = Path("cache") / "scan_index.json"
+# Index SQLite des en-têtes FITS (toutes les cartes, clé = chemin + empreinte); "0" -> en mémoire seulement
+FITS_INDEX_ENABLED = os.environ.get("GNU_ASTRO_GALERY_FITS_INDEX", "1").strip() == "1"
+FITS_INDEX_PATH = Path("cache") / "fits_headers.sqlite"
+# Base SIMBAD locale (Messier/NGC/IC/Sharpless/étoiles brillantes), remplie par tools/sync_simbad.py
+SIMBAD_LOCAL_PATH = Path(os.environ.get("GNU_ASTRO_GALERY_SIMBAD_DB", str(Path("cache") / "simbad_local.sqlite")))
+# Nombre de threads pour lister les dossiers (partage SMB/NFS: 8-32; disque local: 1)
+SCAN_WORKERS = max(1, int(os.environ.get("GNU_ASTRO_GALERY_SCAN_WORKERS", "1")))
+
+# Pipeline: "classic" (tout accumuler puis rendre), "stream" (chaque page objet écrite dès que son groupe est complet)
+# ou "dag" (graphe de tâches par observation: réseau et CPU en parallèle, limites séparées)
+PIPELINE_MODE = os.environ.get("GNU_ASTRO_GALERY_PIPELINE", "classic").strip().lower()
+# Pipeline dag: tâches réseau simultanées (SIMBAD, Nova, Open-Meteo) / tâches CPU (FITS, matplotlib)
+NET_WORKERS = max(1, int(os.environ.get("GNU_ASTRO_GALERY_NET_WORKERS", "8")))
+CPU_WORKERS = max(1, int(os.environ.get("GNU_ASTRO_GALERY_CPU_WORKERS", str(os.cpu_count() or 2))))
+# Limites réseau par hôte (toutes les requêtes): "hôte=concurrence/débit req/s,..." (ex. "nova.astrometry.net=2/1")
+net.configure(net.parse_limits(os.environ.get("GNU_ASTRO_GALERY_NET_LIMITS", "")))
+WEATHER_PROGRESS_LOCK = threading.Lock()
+
+# Publication des images/PNG dans site/: copy | hardlink | reflink | symlink (repli: copie par fichier)
+PUBLISH_MODE = os.environ.get("GNU_ASTRO_GALERY_PUBLISH_MODE", "copy").strip().lower()
+if PUBLISH_MODE not in PUBLISH_MODES:
+    print(f"[WARN] GNU_ASTRO_GALERY_PUBLISH_MODE inconnu: {PUBLISH_MODE!r} -> copy")
+    PUBLISH_MODE = "copy"
+
+# Magasin d'assets adressé par contenu (site/a/<hash>): URLs immuables, dédoublonnage, renommages gratuits
+ASSET_STORE_ENABLED = os.environ.get("GNU_ASTRO_GALERY_ASSET_STORE", "0").strip() == "1"
+ASSET_STORE_PATH = Path("cache") / "asset_store.json"
+
+# Pyramides DeepZoom des images héros (visionneuse OpenSeadragon); pyvips si installé, sinon Pillow
+DEEPZOOM_ENABLED = os.environ.get("GNU_ASTRO_GALERY_DEEPZOOM", "0").strip() == "1"
+DEEPZOOM_CACHE_DIR = Path("cache") / "deepzoom"
+
+# Processus de rendu matplotlib (PNG astrométrie + cartes atlas); "1" = dans le processus principal
+RENDER_WORKERS = max(1, int(os.environ.get("GNU_ASTRO_GALERY_RENDER_WORKERS", str(default_workers()))))
+
+# Vignettes générées (JPEG + WebP) quand Seestar n'a pas produit de _thn.jpg
+THUMB_CACHE_DIR = Path("cache") / "thumbs"
+THUMB_SIZE = int(os.environ.get("GNU_ASTRO_GALERY_THUMB_SIZE", str(THUMB_SIZE_DEFAULT)))
+# Processus pour les images dérivées (Pillow); défaut = nb de cœurs - 1
+IMAGE_WORKERS = max(1, int(os.environ.get("GNU_ASTRO_GALERY_IMAGE_WORKERS", str(default_workers()))))
+# Variantes responsives (srcset) en px de large; vide = désactivé
+VARIANT_CACHE_DIR = Path("cache") / "variants"
+IMAGE_VARIANT_WIDTHS = [
+    int(w) for w in os.environ.get(
+        "GNU_ASTRO_GALERY_IMAGE_VARIANTS", ",".join(str(w) for w in VARIANT_WIDTHS_DEFAULT)
+    ).split(",") if w.strip()
+]
+# Attribut `sizes` des cartes (accueil: col-12 col-sm-6 col-lg-4; page objet: col-md-4)
+CARD_SIZES_INDEX = "(min-width: 992px) 33vw, (min-width: 576px) 50vw, 100vw"
+CARD_SIZES_OBJECT = "(min-width: 768px) 33vw, 100vw"
+
+# Mode surveillance (python generate_gallery.py --watch): intervalle de polling / anti-rebond (secondes)
+WATCH_INTERVAL_S = float(os.environ.get("GNU_ASTRO_GALERY_WATCH_INTERVAL", "5"))
+
 # Données (Stellarium) pour dessiner les lignes de constellations (carte atlas)
 STELLARIUM_DATA_DIR = Path("data") / "stellarium"
 # Depuis 2025+, Stellarium utilise des skycultures au format JSON (index.json) plutôt que constellationship.fab.
 # On récupère donc les lignes de constellations depuis le dépôt open-source stellarium-skycultures.
 CONSTELLATION_INDEX_JSON = STELLARIUM_DATA_DIR / "western_index.json"
 CONSTELLATION_INDEX_URL = "https://raw.githubusercontent.com/Stellarium/stellarium-skycultures/master/western/index.json"
+# Requête conditionnelle (304 si inchangé) au plus une fois par semaine
+CONSTELLATION_INDEX_MAX_AGE_S = 7 * 86400
 
 
 BASE_URL = "https://example.com/seestar"
@@ -217,28 +294,6 @@ def html_escape(s: str) -> str:
               .replace("'", "&#039;"))
 
 
-def load_json(path: Path) -> dict:
-    if path.exists():
-        try:
-            return json.loads(path.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
-
-
-def save_json(path: Path, data: dict):
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
-def file_fingerprint(p: Path) -> str:
-    """
-    Fingerprint rapide et stable (sans lire tout le fichier), pratique en local.
-    """
-    st = p.stat()
-    return f"{st.st_size}-{st.st_mtime_ns}"
-
-
 # ------------------------------------------------------------
 # IMPORTANT: SIMBAD ident = nom du répertoire (exclure _sub / -sub)
 # ------------------------------------------------------------
@@ -257,20 +312,6 @@ def simbad_ident_from_dir(obs_dir: Path) -> str:
 # ------------------------------------------------------------
 # Cache SIMBAD
 # ------------------------------------------------------------
-def load_cache(cache_path: Path) -> dict:
-    if cache_path.exists():
-        try:
-            return json.loads(cache_path.read_text(encoding="utf-8"))
-        except Exception:
-            return {}
-    return {}
-
-
-def save_cache(cache_path: Path, cache: dict):
-    cache_path.parent.mkdir(parents=True, exist_ok=True)
-    cache_path.write_text(json.dumps(cache, ensure_ascii=False, indent=2), encoding="utf-8")
-
-
 # ------------------------------------------------------------
 # Catalogue Messier (XLSX)
 # ------------------------------------------------------------
@@ -674,9 +715,10 @@ def _simbad_query_basic(ident: str) -> dict | None:
     JOIN ident AS i ON i.oidref = b.oid
     WHERE i.id = '{ident.replace("'", "''")}'
     """
-    r = requests.post(
+    r = http_client.post(
         SIMBAD_TAP,
-        data={"request": "doQuery", "lang": "adql", "format": "json", "query": adql})
+        data={"request": "doQuery", "lang": "adql", "format": "json", "query": adql},
+        idempotent=True)
     r.raise_for_status()
     data = r.json()
     rows = data.get("data", [])
@@ -691,51 +733,6 @@ def _simbad_query_basic(ident: str) -> dict | None:
     }
 
 
-
-def _simbad_cone_basic(ra_deg: float, dec_deg: float, radius_deg: float, max_rows: int = 200) -> list[dict]:
-    """Cone search SIMBAD TAP (table basic) autour d'un centre ICRS (RA/DEC en degrés).
-
-    Retourne une liste de dicts: {main_id, ra, dec, otype, otype_txt}
-    NOTE: on reste volontairement sur la table 'basic' (léger et stable).
-    """
-    try:
-        r = float(radius_deg)
-    except Exception:
-        r = 2.0
-    r = max(0.01, min(r, 10.0))
-
-    adql = f"""
-    SELECT TOP {int(max_rows)} b.main_id, b.ra, b.dec, b.otype, b.otype_txt
-    FROM basic AS b
-    WHERE 1=CONTAINS(
-        POINT('ICRS', b.ra, b.dec),
-        CIRCLE('ICRS', {ra_deg:.8f}, {dec_deg:.8f}, {r:.8f})
-    )
-    """
-    resp = requests.post(
-        SIMBAD_TAP,
-        data={"request": "doQuery", "lang": "adql", "format": "json", "query": adql},
-        timeout=60,
-    )
-    resp.raise_for_status()
-    data = resp.json()
-    out = []
-    for row in data.get("data", []) or []:
-        # colonne order: main_id, ra, dec, otype, otype_txt
-        if not row or len(row) < 5:
-            continue
-        main_id = str(row[0] or "").strip()
-        try:
-            ra = float(row[1])
-            dec = float(row[2])
-        except Exception:
-            continue
-        otype = str(row[3] or "").strip()
-        otype_txt = str(row[4] or "").strip()
-        out.append({"main_id": main_id, "ra": ra, "dec": dec, "otype": otype, "otype_txt": otype_txt})
-    return out
-
-
 # classement "pertinence" pour les labels de carte
 _FAMOUS_STAR_NAMES = {
     # très visibles à l'œil nu / noms très connus
@@ -765,42 +762,27 @@ def _label_score(main_id: str, otype: str) -> tuple:
     # le reste
     return (4, 0, up)
 
-def _clean_main_id_for_label(main_id: str) -> str:
-    s = (main_id or "").strip()
-    s = re.sub(r"\s+", " ", s)
-    return s
 
+# Base SIMBAD locale ouverte par load_build_state (None: pas de synchro, tout passe par TAP)
+SIMBAD_LOCAL = None
 
-def enrich_tags(object_name_for_simbad: str, cache: dict) -> dict:
-    ident = normalize_catalog_id(object_name_for_simbad) or object_name_for_simbad.strip()
-    ident_key = ident.upper()
 
-    if ident_key in LOCAL_OBJECT_DB:
-        t_fr, t_en, tags_fr, tags_en = LOCAL_OBJECT_DB[ident_key]
-        return {
-            "ident": ident,
-            "main_id": ident,
-            "otype": "",
-            "otype_txt": f"{t_en} / {t_fr}",
-            "tags_fr": tags_fr,
-            "tags_en": tags_en,
-            "source": "local"
-        }
+def simbad_cache_key(object_name_for_simbad: str) -> tuple[str, str]:
+    """(identifiant interrogé, clé du cache SIMBAD)."""
+    ident = normalize_catalog_id(object_name_for_simbad) or object_name_for_simbad.strip()
+    return ident, ident.upper()
 
-    if ident_key in cache:
-        return cache[ident_key]
 
-    try:
-        info = _simbad_query_basic(ident)
-    except Exception as e:
-        out = {"ident": ident, "main_id": "", "otype": "", "otype_txt": "", "tags_fr": [], "tags_en": [], "source": f"simbad_error:{e}"}
-        cache[ident_key] = out
-        return out
+def simbad_cache_entry(ident: str, info: dict | None = None, error: Exception | None = None) -> dict:
+    """Entrée du cache SIMBAD à partir d'une réponse (ou d'une erreur / absence de résultat), horodatée."""
+    fetched = datetime.now().isoformat(timespec="seconds")
+    if error is not None:
+        return {"ident": ident, "main_id": "", "otype": "", "otype_txt": "", "tags_fr": [], "tags_en": [],
+                "source": f"simbad_error:{error}", "status": "error", "fetched": fetched}
 
     if not info:
-        out = {"ident": ident, "main_id": "", "otype": "", "otype_txt": "", "tags_fr": [], "tags_en": [], "source": "simbad_not_found"}
-        cache[ident_key] = out
-        return out
+        return {"ident": ident, "main_id": "", "otype": "", "otype_txt": "", "tags_fr": [], "tags_en": [],
+                "source": "simbad_not_found", "status": "not_found", "fetched": fetched}
 
     otype = info.get("otype", "")
     otype_txt = info.get("otype_txt", "")
@@ -811,30 +793,161 @@ def enrich_tags(object_name_for_simbad: str, cache: dict) -> dict:
     if not tags_en and otype_txt:
         tags_en = [otype_txt.lower()]
 
-    out = {
+    return {
         "ident": ident,
         "main_id": info.get("main_id", ""),
         "otype": otype,
         "otype_txt": otype_txt,
         "tags_fr": tags_fr,
         "tags_en": tags_en,
-        "source": "simbad"
+        "source": "simbad",
+        "status": "hit",
+        "fetched": fetched,
     }
-    cache[ident_key] = out
-    return out
+
+
+def simbad_entry_status(entry: dict) -> str:
+    """hit / not_found / error (déduit de `source` pour les entrées antérieures aux statuts)."""
+    status = entry.get("status")
+    if status:
+        return status
+    source = str(entry.get("source", ""))
+    if source.startswith("simbad_error"):
+        return "error"
+    return "not_found" if source == "simbad_not_found" else "hit"
+
+
+def simbad_entry_expired(entry: dict, now: datetime | None = None) -> bool:
+    """Vrai si l'entrée a dépassé la durée de vie de son statut (ou n'a pas d'horodatage valide)."""
+    now = now or datetime.now()
+    try:
+        # Rafraîchissement en échec: entrée gardée, nouvel essai après la durée de vie d'une erreur
+        if (now - datetime.fromisoformat(str(entry["retry_after"]))).total_seconds() <= SIMBAD_TTL_ERROR_S:
+            return False
+    except (KeyError, ValueError):
+        pass
+    ttl = {"hit": SIMBAD_TTL_HIT_S, "not_found": SIMBAD_TTL_NOT_FOUND_S}.get(simbad_entry_status(entry), SIMBAD_TTL_ERROR_S)
+    try:
+        fetched = datetime.fromisoformat(str(entry.get("fetched")))
+    except ValueError:
+        return True
+    return (now - fetched).total_seconds() > ttl
+
+
+def upgrade_simbad_cache(cache: dict) -> int:
+    """
+    Ajoute statut + horodatage aux entrées importées d'un ancien object_info.json: trouvées / inconnues
+    datées d'aujourd'hui (durée de vie complète), erreurs laissées sans date (redemandées).
+    """
+    now = datetime.now().isoformat(timespec="seconds")
+    upgraded = {}
+    for key, entry in cache.items():
+        if not isinstance(entry, dict) or entry.get("status"):
+            continue
+        entry["status"] = simbad_entry_status(entry)
+        entry["fetched"] = "" if entry["status"] == "error" else now
+        upgraded[key] = entry
+    cache.update(upgraded)
+    return len(upgraded)
+
+
+def store_simbad_entry(cache: dict, ident_key: str, entry: dict) -> dict:
+    """
+    Range une nouvelle réponse; une erreur réseau ne remplace pas une entrée trouvée
+    (expirée): l'ancienne est gardée et redemandée après la durée de vie d'une erreur.
+    """
+    old = cache.get(ident_key)
+    if entry["status"] == "error" and isinstance(old, dict) and simbad_entry_status(old) == "hit":
+        old["retry_after"] = entry["fetched"]
+        cache[ident_key] = old
+        return old
+    cache[ident_key] = entry
+    return entry
+
+
+def enrich_tags(object_name_for_simbad: str, cache: dict) -> dict:
+    ident, ident_key = simbad_cache_key(object_name_for_simbad)
+
+    if ident_key in LOCAL_OBJECT_DB:
+        t_fr, t_en, tags_fr, tags_en = LOCAL_OBJECT_DB[ident_key]
+        return {
+            "ident": ident,
+            "main_id": ident,
+            "otype": "",
+            "otype_txt": f"{t_en} / {t_fr}",
+            "tags_fr": tags_fr,
+            "tags_en": tags_en,
+            "source": "local"
+        }
+
+    # Base SIMBAD locale (si synchronisée) avant le cache et le service TAP
+    if SIMBAD_LOCAL is not None:
+        info = SIMBAD_LOCAL.resolve(ident)
+        if info is not None:
+            return simbad_cache_entry(ident, info)
+
+    if ident_key in cache and not simbad_entry_expired(cache[ident_key]):
+        return cache[ident_key]
+
+    try:
+        info = _simbad_query_basic(ident)
+    except Exception as e:
+        return store_simbad_entry(cache, ident_key, simbad_cache_entry(ident, error=e))
+
+    return store_simbad_entry(cache, ident_key, simbad_cache_entry(ident, info))
+
+
+def prefetch_simbad(jpgs: list[Path], cache: dict) -> int:
+    """
+    Résout par lots TAP (`IN (...)`, astrogalery.enrich.simbad_client) les identifiants
+    absents du cache ou dont l'entrée a expiré (erreur, inconnu, trouvé: durées de vie
+    distinctes), avant la passe 1: enrich_tags n'y trouve ensuite que des entrées valides.
+    Les entrées encore valides ne sont pas touchées.
+    """
+    todo = {}
+    now = datetime.now()
+    for jpg_path in jpgs:
+        ident, ident_key = simbad_cache_key(simbad_ident_from_dir(jpg_path.parent))
+        if ident_key in LOCAL_OBJECT_DB or ident_key in todo:
+            continue
+        if ident_key in cache and not simbad_entry_expired(cache[ident_key], now):
+            continue
+        if SIMBAD_LOCAL is not None and SIMBAD_LOCAL.resolve(ident) is not None:
+            continue
+        todo[ident_key] = ident
+    if not todo:
+        return 0
+
+    n_batches = -(-len(todo) // simbad_client.BATCH_SIZE)
+    n_expired = sum(1 for k in todo if k in cache)
+    print(f"🔭 SIMBAD: {len(todo)} identifiant(s) à résoudre ({n_expired} expiré(s)) en {n_batches} requête(s) TAP...")
+    results = simbad_client.resolve_idents(todo.values(), SIMBAD_TAP)
+    for ident_key, ident in todo.items():
+        res = results.get(ident)
+        if isinstance(res, Exception):
+            store_simbad_entry(cache, ident_key, simbad_cache_entry(ident, error=res))
+        else:
+            store_simbad_entry(cache, ident_key, simbad_cache_entry(ident, res))
+    return len(todo)
 
 
 # ------------------------------------------------------------
 # FITS / metadata
 # ------------------------------------------------------------
+# Index du scan courant (construit une seule fois par main): JPG -> FITS sans parcours disque.
+# Current scan index (built once by main): JPG -> FITS lookups without walking the disk.
+SCAN_INDEX = None
 
 
+def stacked_fits_for_jpg(jpg_path: Path) -> Path | None:
+    if SCAN_INDEX is not None:
+        return SCAN_INDEX.stacked_fits_for(jpg_path)
+    return find_stacked_fits_in_dir(jpg_path.parent)
 
 
 def estimate_scale_arcsec_per_pix(fits_path: Path):
     try:
-        with fits.open(fits_path, ignore_missing_simple=True) as hdul:
-            h = hdul[0].header
+        h = read_fits_header(fits_path) or {}
         focal = h.get("FOCALLEN") or h.get("FOCAL") or h.get("FOCAL_LENGTH") or h.get("TELFOCAL")
         pix_um = h.get("XPIXSZ") or h.get("PIXSIZE") or h.get("PIXELSIZE") or h.get("PIX_SIZE") or h.get("XPIXELSZ")
         if focal is not None and pix_um is not None:
@@ -848,38 +961,7 @@ def estimate_scale_arcsec_per_pix(fits_path: Path):
 
 
 # ------------------------------------------------------------
-# Image read: FITS robust
-# ------------------------------------------------------------
-def _to_2d_array(arr: np.ndarray) -> np.ndarray | None:
-    if arr is None:
-        return None
-    arr = np.array(arr)
-    arr = np.squeeze(arr)
-
-    if arr.ndim == 2:
-        return arr
-    if arr.ndim == 3:
-        return arr[0] if arr.shape[0] <= 20 else arr[-1]
-    if arr.ndim >= 4:
-        while arr.ndim > 2:
-            arr = arr[0]
-        return arr if arr.ndim == 2 else None
-    return None
-
-
-
-
-def read_image_from_jpg(jpg_path: Path) -> np.ndarray | None:
-    try:
-        im = Image.open(jpg_path).convert("L")
-        return np.array(im)
-    except Exception as e:
-        print(f"[WARN] Lecture JPG échouée {jpg_path.name}: {e}")
-        return None
-
-
-# ------------------------------------------------------------
-# JPG discovery (exclude *_sub/*-sub and *_thn.jpg)
+# Astrometry.net (Nova)
 # ------------------------------------------------------------
 def _json_or_raise(r: requests.Response, context: str) -> dict:
     r.raise_for_status()
@@ -893,10 +975,11 @@ def _json_or_raise(r: requests.Response, context: str) -> dict:
 
 def nova_login(api_key: str) -> str:
     payload = {"apikey": api_key}
-    r = requests.post(
+    r = http_client.post(
         ASTRO_NOVA_API + "login",
         data={"request-json": json.dumps(payload)},
-        headers={"Accept": "application/json"})
+        headers={"Accept": "application/json"},
+        idempotent=True)
     data = _json_or_raise(r, "Login Nova échoué")
     if data.get("status") != "success":
         raise RuntimeError(f"Login Nova échoué: {data}")
@@ -919,11 +1002,13 @@ def nova_upload_fits(session: str, fits_path: Path, scale_arcsec_per_pix=None):
 
     files = {"file": open(fits_path, "rb")}
     try:
-        r = requests.post(
+        # Envoi de fichier: jamais rejoué (risque de soumission en double)
+        r = http_client.post(
             ASTRO_NOVA_API + "upload",
             data={"request-json": json.dumps(upload_kwargs)},
             files=files,
-            headers={"Accept": "application/json"})
+            headers={"Accept": "application/json"},
+            service="nova_upload")
         data = _json_or_raise(r, "Upload Nova échoué")
         if data.get("status") != "success":
             raise RuntimeError(f"Upload Nova échoué: {data}")
@@ -935,7 +1020,7 @@ def nova_upload_fits(session: str, fits_path: Path, scale_arcsec_per_pix=None):
 def nova_poll_submission(subid: int, wait_s: int = 5, timeout_s: int = 600):
     t0 = time.time()
     while True:
-        r = requests.get(ASTRO_NOVA_API + f"submissions/{subid}")
+        r = http_client.get(ASTRO_NOVA_API + f"submissions/{subid}")
         data = _json_or_raise(r, f"Submission Nova échouée (subid={subid})")
         jobs = data.get("jobs") or []
         job_ids = [j for j in jobs if isinstance(j, int)]
@@ -949,7 +1034,7 @@ def nova_poll_submission(subid: int, wait_s: int = 5, timeout_s: int = 600):
 def nova_poll_job_solved(jobid: int, wait_s: int = 5, timeout_s: int = 900):
     t0 = time.time()
     while True:
-        r = requests.get(ASTRO_NOVA_API + f"jobs/{jobid}")
+        r = http_client.get(ASTRO_NOVA_API + f"jobs/{jobid}")
         data = _json_or_raise(r, f"Job Nova échoué (jobid={jobid})")
         st = data.get("status")
         if st == "success":
@@ -964,7 +1049,7 @@ def nova_poll_job_solved(jobid: int, wait_s: int = 5, timeout_s: int = 900):
 
 
 def download_binary(url: str, timeout: int = 300) -> tuple[bytes, str]:
-    r = requests.get(url, timeout=timeout)
+    r = http_client.get(url, timeout=(10, timeout))
     r.raise_for_status()
     return r.content, (r.headers.get("Content-Type") or "")
 
@@ -977,426 +1062,65 @@ def nova_download_wcs_header_only(jobid: int, out_fits_path: Path) -> bool:
         snippet = b[:300].decode("utf-8", errors="ignore")
         print(f"\n[WARN] wcs_file non-FITS jobid={jobid} (Content-Type={ct}). Début: {snippet!r}")
         return False
-    out_fits_path.write_bytes(b)
+    with atomic_output(out_fits_path) as tmp_fits:
+        tmp_fits.write_bytes(b)
     print(f"\n[OK] Téléchargé WCS header-only jobid={jobid} -> {out_fits_path.name} (Content-Type={ct})")
     return True
 
 
-def make_astrometry_png_from_image_and_wcs(
-    image_array_2d: np.ndarray,
-    wcs_header: fits.Header,
-    out_png: Path,
-    title: str = ""
-) -> bool:
-    try:
-        h = wcs_header.copy()
-        ny, nx = image_array_2d.shape
-        if h.get("NAXIS", None) is None:
-            h["NAXIS"] = 2
-        if h.get("NAXIS1", None) is None:
-            h["NAXIS1"] = nx
-        if h.get("NAXIS2", None) is None:
-            h["NAXIS2"] = ny
-
-        wcs = WCS(h, naxis=2)
-        norm = ImageNormalize(image_array_2d, interval=ZScaleInterval())
-
-        fig = plt.figure(figsize=(6, 9), dpi=160)
-        ax = fig.add_subplot(111, projection=wcs)
-
-        ax.imshow(image_array_2d, origin="lower", norm=norm)
-        ax.grid(color="white", alpha=0.35, linestyle="-", linewidth=0.6)
-        ax.set_xlabel("RA")
-        ax.set_ylabel("DEC")
-
-        if title:
-            ax.set_title(title, fontsize=11)
-
-        cx, cy = nx / 2, ny / 2
-        radius_pix = min(nx, ny) * 0.33
-        ax.add_patch(plt.Circle((cx, cy), radius_pix, fill=False, lw=1.2, alpha=0.85))
-
-        out_png.parent.mkdir(parents=True, exist_ok=True)
-        fig.tight_layout()
-        fig.savefig(out_png)
-        plt.close(fig)
-
-        print(f"[OK] PNG écrit (image+WCS): {out_png}")
-        return True
-    except Exception as e:
-        print(f"\n[WARN] PNG astrométrie impossible: {e}")
-        return False
-
-
 # ------------------------------------------------------------
 # STAR CHART (Finder chart) + cache persistant
 # ------------------------------------------------------------
-def load_star_cache() -> dict:
-    return load_json(STAR_CACHE_INDEX)
-
-def save_star_cache(cache: dict):
-    save_json(STAR_CACHE_INDEX, cache)
-
-
 def _ensure_constellation_index_json() -> bool:
     """
     Assure la présence du fichier 'western/index.json' (format skyculture JSON).
     Source: dépôt open-source Stellarium/stellarium-skycultures.
     Cache local: {STELLARIUM_DATA_DIR}
     Sortie: {CONSTELLATION_INDEX_JSON}
+    Revalidé (ETag / Last-Modified) au plus une fois par CONSTELLATION_INDEX_MAX_AGE_S.
     """
     try:
-        if CONSTELLATION_INDEX_JSON.exists() and CONSTELLATION_INDEX_JSON.stat().st_size > 1024:
-            return True
-
-        STELLARIUM_DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-        import requests
-        r = requests.get(CONSTELLATION_INDEX_URL, timeout=60)
-        r.raise_for_status()
-        # L'index est du JSON
-        data = r.content
-        if not data or len(data) < 1024:
-            raise IOError("index.json trop petit / invalide.")
-        CONSTELLATION_INDEX_JSON.write_bytes(data)
-        return True
+        # L'index est du JSON (< 1 Ko = réponse invalide)
+        return http_client.download_cached(
+            CONSTELLATION_INDEX_URL,
+            CONSTELLATION_INDEX_JSON,
+            max_age_s=CONSTELLATION_INDEX_MAX_AGE_S,
+            min_size=1024,
+        )
 
     except Exception as e:
         print(f"[WARN] Carte atlas: téléchargement index.json (constellations) impossible: {e}")
         return False
 
 
-_HIP_DF = None
-
-_CONSTELLATION_LINES = None
-
+def atlas_nearby(ra_deg: float, dec_deg: float, fov_arcmin: float) -> list[dict]:
+    """Cone search SIMBAD des labels de la carte atlas (processus principal, pas les processus de rendu).
 
-def _load_hipparcos_df():
-    """Charge le dataframe Hipparcos via Skyfield (cache disque + cache mémoire)."""
-    global _HIP_DF
-    if _HIP_DF is not None:
-        return _HIP_DF
-    try:
-        # Skyfield gère le cache disque automatiquement (dans son répertoire de cache)
-        with sf_load.open(sf_hipparcos.URL) as f:
-            df = sf_hipparcos.load_dataframe(f)
-        # df index = HIP
-        _HIP_DF = df
-        return df
-    except Exception as e:
-        print(f"[WARN] Carte atlas: chargement Hipparcos impossible: {e}")
-        return None
-
-
-def _load_constellation_lines():
-    """
-    Charge les lignes de constellations depuis 'western/index.json' (Stellarium skyculture JSON).
-
-    Retour: list[tuple[str, list[tuple[int,int]]]]
-      - str: abréviation IAU (ex: 'Aql') si présente, sinon identifiant de constellation
-      - segments: liste de paires (HIP_a, HIP_b)
+    Cache de tuiles du ciel (cache/simbad_tiles/): seules les tuiles absentes sont demandées. Si la base
+    SIMBAD locale est synchronisée, ses objets passent en premier et sont complétés par les tuiles
+    (la base n'est qu'un sous-ensemble); hors ligne, les labels de la base locale restent disponibles.
     """
-    global _CONSTELLATION_LINES
-    if _CONSTELLATION_LINES is not None:
-        return _CONSTELLATION_LINES
-
-    if not _ensure_constellation_index_json():
-        _CONSTELLATION_LINES = []
-        return _CONSTELLATION_LINES
-
-    import json
-
+    radius = cone_radius_deg(fov_arcmin)
+    rows: list[dict] = []
+    if SIMBAD_LOCAL is not None:
+        try:
+            rows = SIMBAD_LOCAL.cone_search(ra_deg, dec_deg, radius, max_rows=300)
+        except Exception as e:
+            print(f"[WARN] Carte atlas: base SIMBAD locale (cone) illisible: {e}")
     try:
-        data = json.loads(CONSTELLATION_INDEX_JSON.read_text(encoding="utf-8", errors="ignore"))
-        consts = data.get("constellations", [])
-        out = []
-        for c in consts:
-            label = c.get("iau") or c.get("id") or "CON"
-            segs = []
-            for path in c.get("lines", []) or []:
-                # path: [hip, hip, hip] ou ["thin"/"bold", hip, hip, ...]
-                if not path:
-                    continue
-                if isinstance(path[0], str):
-                    stars = path[1:]
-                else:
-                    stars = path
-                # segments successifs
-                for a, b in zip(stars, stars[1:]):
-                    try:
-                        ia = int(a); ib = int(b)
-                        segs.append((ia, ib))
-                    except Exception:
-                        continue
-            if segs:
-                out.append((label, segs))
-
-        _CONSTELLATION_LINES = out
-        return _CONSTELLATION_LINES
-
+        tiles = sky_tiles.cone_search(ra_deg, dec_deg, radius, max_rows=300, tap_url=SIMBAD_TAP)
     except Exception as e:
-        print(f"[WARN] Carte atlas: lecture/parsing index.json impossible: {e}")
-        _CONSTELLATION_LINES = []
-        return _CONSTELLATION_LINES
-
-
-def make_finder_chart_png(ra_deg: float, dec_deg: float, out_png: Path, fov_arcmin: float | None = None, inner_fov_arcmin: float = 30.0, title: str = "", diverse_catalog: list[dict] | None = None, diverse_mag_limit: float = DIVERSE_LABEL_MAG_LIMIT_DEFAULT) -> bool:
-    """
-    Génère une carte 'atlas' (grille RA/Dec, étoiles, lignes de constellations) centrée sur (RA,DEC).
-    - rendu local open source (matplotlib + astropy + skyfield)
-    - nécessite une connexion Internet seulement au *premier* lancement (cache Skyfield + Stellarium)
-    """
-    if not HAS_ATLAS:
-        print("[WARN] Carte atlas: dépendances manquantes (pip install skyfield)")
-        return False
-
-    df = _load_hipparcos_df()
-    if df is None:
-        return False
-
-    cons = _load_constellation_lines()
+        print(f"[WARN] Carte atlas: requête SIMBAD (cone) impossible: {e}")
+        tiles = []
+    seen = {r["main_id"] for r in rows}
+    rows.extend(r for r in tiles if r["main_id"] not in seen)
+    return rows[:300]
 
-    try:
-        center = SkyCoord(ra=ra_deg * u.deg, dec=dec_deg * u.deg, frame="icrs")
-        frame = SkyOffsetFrame(origin=center)
-        if fov_arcmin is None:
-            fov_arcmin = ATLAS_FOV_ARCMIN
-        radius_deg = (fov_arcmin / 60.0) / 2.0
-        margin_deg = radius_deg * 1.35
-
-        # Pré-sélection rapide par boîte (sur la sphère c'est approximatif mais OK pour réduire)
-        ra = df["ra_degrees"].to_numpy()
-        dec = df["dec_degrees"].to_numpy()
-        mag = df["magnitude"].to_numpy()
-
-        # distance angulaire précise avec astropy (sur subset)
-        stars = SkyCoord(ra=ra * u.deg, dec=dec * u.deg, frame="icrs")
-        sep = stars.separation(center).deg
-        msk = (sep <= margin_deg) & (mag == mag)  # mag not NaN
-        if msk.sum() == 0:
-            print("[WARN] Carte atlas: aucune étoile Hipparcos dans le champ")
-            return False
 
-        stars_sel = stars[msk].transform_to(frame)
-        mag_sel = mag[msk]
-
-        x = stars_sel.lon.to(u.deg).value * 60.0  # arcmin
-        y = stars_sel.lat.to(u.deg).value * 60.0
-
-        # taille des points: magnitude -> taille
-        # Hipparcos: mag plus petite = plus brillant
-        mag_limit = ATLAS_MAG_LIMIT
-        s = (np.clip((mag_limit - mag_sel + 1.0), 0.2, 6.0) ** 2) * 3.0
-
-        out_png.parent.mkdir(parents=True, exist_ok=True)
-
-        fig = plt.figure(figsize=(8, 8), dpi=160)
-        ax = plt.gca()
-        ax.scatter(x, y, s=s, alpha=0.85)
-
-        # convention carte du ciel: Est à gauche
-        ax.invert_xaxis()
-
-        half = radius_deg * 60.0
-        ax.set_xlim(half, -half)
-        ax.set_ylim(-half, half)
-        ax.set_aspect("equal", "box")
-
-        # Grille (arcmin)
-        ax.grid(True, linewidth=0.4, alpha=0.6)
-        ax.set_xlabel("ΔRA cos(Dec) (arcmin)")
-        ax.set_ylabel("ΔDec (arcmin)")
-
-
-        # cercle FOV (Seestar) à l'intérieur de la carte (atlas)
-        inner_half = max(1.0, float(inner_fov_arcmin) / 2.0)  # arcmin
-        ax.add_patch(plt.Circle((0, 0), inner_half, fill=False, linewidth=1.2))
-        ax.annotate(f"FOV {inner_fov_arcmin:.0f}'", xy=(inner_half, 0), xytext=(inner_half+3, 0), va="center")
-
-
-        # Lignes de constellations (si dispo)
-        # On trace seulement les segments dont les 2 étoiles tombent dans la marge
-        if cons:
-            # Accès rapide HIP -> (x,y) dans la même projection:
-            # On recalcule pour les HIPs utiles en évitant de transformer tout le catalogue.
-            # Dictionnaire hip->SkyCoord projeté
-            # df index contient les HIP
-            hip_xy = {}
-            def get_xy(hip:int):
-                if hip in hip_xy:
-                    return hip_xy[hip]
-                try:
-                    row = df.loc[hip]
-                    sc = SkyCoord(ra=float(row["ra_degrees"]) * u.deg, dec=float(row["dec_degrees"]) * u.deg, frame="icrs")
-                    if sc.separation(center).deg > margin_deg:
-                        hip_xy[hip] = None
-                        return None
-                    off = sc.transform_to(frame)
-                    xx = off.lon.to(u.deg).value * 60.0
-                    yy = off.lat.to(u.deg).value * 60.0
-                    hip_xy[hip] = (xx, yy)
-                    return (xx, yy)
-                except Exception:
-                    hip_xy[hip] = None
-                    return None
-
-            for abbr, segs in cons:
-                pts_for_label = []
-                for h1, h2 in segs:
-                    p1 = get_xy(h1)
-                    p2 = get_xy(h2)
-                    if p1 is None or p2 is None:
-                        continue
-                    ax.plot([p1[0], p2[0]], [p1[1], p2[1]], linewidth=0.6, alpha=0.7)
-                    pts_for_label.append(p1)
-                    pts_for_label.append(p2)
-                # label: moyenne si on a assez de points
-                if pts_for_label:
-                    xs = [p[0] for p in pts_for_label]
-                    ys = [p[1] for p in pts_for_label]
-                    cx = float(np.mean(xs))
-                    cy = float(np.mean(ys))
-                    if -half < cy < half and -half < cx < half:
-                        ax.text(cx, cy, abbr, fontsize=8, alpha=0.8, ha="center", va="center")
-
-        # marqueur cible
-        ax.scatter([0], [0], s=80, marker="x")
-
-        # label de l'objet au centre (cible)
-        target_label = title.strip()
-        if target_label:
-            ax.text(0.0, -half * 0.92, target_label, fontsize=10, ha="center", va="top")
-
-        # objets "pertinents" proches via SIMBAD (Messier d'abord, puis étoiles connues/lumineuses)
-        try:
-            nearby = _simbad_cone_basic(ra_deg, dec_deg, radius_deg=margin_deg, max_rows=300)
-        except Exception as e:
-            print(f"[WARN] Carte atlas: requête SIMBAD (cone) impossible: {e}")
-            nearby = []
-
-        # Projeter et choisir quelques labels sans trop d'encombrement
-        if nearby or diverse_catalog:
-            placed = []  # list of (x,y)
-            max_labels = 10
-
-            # --- Labels pertinents (atlas) ---
-            # Règle: afficher uniquement
-            #  1) Objets Messier (via SIMBAD cone) dans le champ
-            #  2) Objets provenant de 'objetsdivers.xlsx' avec magnitude <= diverse_mag_limit dans le champ
-            label_candidates = []
-
-            # 1) Messier (depuis SIMBAD cone)
-            for it in nearby:
-                mid_raw = str(it.get("main_id","") or "").strip()
-                if re.match(r"^M\s*\d+\b", mid_raw.upper()):
-                    label_candidates.append(it)
-
-            # 2) Objets divers (catalogue local)
-            if diverse_catalog:
-                try:
-                    center_icrs = SkyCoord(ra=ra_deg * u.deg, dec=dec_deg * u.deg, frame="icrs")
-                    half_deg = (fov_arcmin / 60.0) / 2.0
-                    for ob in diverse_catalog:
-                        mag = ob.get("mag", None)
-                        if mag is None:
-                            continue
-                        try:
-                            if float(mag) > float(diverse_mag_limit):
-                                continue
-                        except Exception:
-                            continue
-                        try:
-                            c = SkyCoord(ra=float(ob["ra_deg"]) * u.deg, dec=float(ob["dec_deg"]) * u.deg, frame="icrs")
-                            if float(c.separation(center_icrs).deg) <= (half_deg * 1.05):
-                                label_candidates.append({
-                                    "main_id": ob.get("name",""),
-                                    "ra": float(ob["ra_deg"]),
-                                    "dec": float(ob["dec_deg"]),
-                                    "otype": "CAT",
-                                    "otype_txt": f'{ob.get("sheet","")}',
-                                    "mag": float(mag),
-                                })
-                        except Exception:
-                            continue
-                except Exception:
-                    pass
-
-            # trier: Messier d'abord, puis magnitude ascendante, puis distance au centre
-            center_icrs = SkyCoord(ra=ra_deg * u.deg, dec=dec_deg * u.deg, frame="icrs")
-
-            def _is_messier(it):
-                return bool(re.match(r"^M\s*\d+\b", str(it.get("main_id","")).upper()))
-
-            def _mag(it):
-                try:
-                    return float(it.get("mag", 99.0))
-                except Exception:
-                    return 99.0
-
-            def _dist_deg(it):
-                try:
-                    c = SkyCoord(ra=float(it["ra"]) * u.deg, dec=float(it["dec"]) * u.deg, frame="icrs")
-                    return float(c.separation(center_icrs).deg)
-                except Exception:
-                    return 999.0
-
-            nearby_sorted = sorted(
-                label_candidates,
-                key=lambda it: (0 if _is_messier(it) else 1, _mag(it), _dist_deg(it))
-            )
-            for it in nearby_sorted:
-                mid = _clean_main_id_for_label(it.get("main_id",""))
-                if not mid:
-                    continue
-                # ne pas répéter le titre central si c'est le même
-                if target_label and mid.upper() == target_label.upper():
-                    continue
-
-                try:
-                    c = SkyCoord(
-                        ra=float(it["ra"]) * u.deg,
-                        dec=float(it["dec"]) * u.deg,
-                        frame="icrs",
-                    ).transform_to(frame)
-                    # IMPORTANT: la carte est en **arcmin** (comme les étoiles Hipparcos plus haut)
-                    # Donc on convertit lon/lat (degrés) -> arcmin pour positionner correctement les labels.
-                    x = float(c.lon.to(u.deg).value * 60.0)
-                    y = float(c.lat.to(u.deg).value * 60.0)
-                except Exception:
-                    continue
-
-                if not (-half < x < half and -half < y < half):
-                    continue
-
-                # anti-collision simple
-                ok = True
-                # (x,y) en arcmin -> distance mini en arcmin
-                min_sep = 6.0  # arcmin (évite que les noms se pile au centre)
-                for (px, py) in placed:
-                    if (x - px) ** 2 + (y - py) ** 2 < (min_sep ** 2):
-                        ok = False
-                        break
-                if not ok:
-                    continue
-
-                ax.scatter([x], [y], s=18, marker="o", alpha=0.9)
-                # placer le texte légèrement sous le symbole (en arcmin)
-                ax.text(x, y - 2.0, mid, fontsize=7.5, ha="center", va="top", alpha=0.9)
-                placed.append((x, y))
-
-                if len(placed) >= max_labels:
-                    break
-
-
-        ttl = title.strip() or "Carte (atlas)"
-        ax.set_title(ttl)
-
-        fig.savefig(out_png, bbox_inches="tight")
-        plt.close(fig)
-        return True
-    except Exception as e:
-        print(f"[WARN] Carte atlas impossible: {e}")
-        return False
+def prepare_atlas_data() -> None:
+    """Téléchargements de la carte atlas faits une fois ici, avant que les processus de rendu ne les lisent."""
+    _ensure_constellation_index_json()
+    ensure_hipparcos_file()
 
 
 def image_jsonld(item: dict, page_url: str) -> dict:
@@ -1503,58 +1227,114 @@ def build_index_html(title: str, og_block: str) -> str:
 """
 
 
-def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og_block: str, items: list) -> str:
-    # Héro = plus récent (items[0] est trié ailleurs)
-    hero = items[0]
+def srcset_attr(candidates: list, prefix: str = "") -> str:
+    return ", ".join(f"{prefix}{url} {w}w" for url, w in candidates)
 
-    author = CREATOR_NAME
-    license_name = IMAGE_LICENSE
 
-    hero_img = hero["contentUrl"]
-    hero_img_alt = hero.get("alt", obj_name)
+def card_srcset(it: dict, webp: bool = False) -> list:
+    """Candidats d'une carte: la vignette, puis les variantes plus larges qu'elle (JPEG ou WebP)."""
+    tw = it.get("thumbnailWidth") or 0
+    thumb = it.get("thumbnailWebpUrl") if webp else it["thumbnailUrl"]
+    out = [[thumb, tw]] if tw and thumb else []
+    out += [c for c in (it.get("srcsetWebp" if webp else "srcset") or []) if c[1] > tw]
+    return out
 
-    # --- Météo et conditions d'observation / Weather & observing conditions ---
-    # On tente de retrouver le FITS source associé à l'image héros.
-    # If missing, we try to locate the FITS next to the JPG (same folder).
-    global WEATHER_DONE, WEATHER_TOTAL
-    space_weather_block = ""
-    if HAS_SPACE_WEATHER and space_weather is not None:
-        fp = hero.get("_fitsPath") or hero.get("fitsPath") or hero.get("fits_path") or ""
-        if (not fp) and hero.get("_jpgPath"):
-            try:
-                jpgp = Path(hero.get("_jpgPath"))
-                fp2 = find_stacked_fits_in_dir(jpgp.parent)
-                fp = str(fp2) if fp2 else ""
-            except Exception:
-                fp = ""
 
-        # Indicateur visuel / Progress indicator
+def img_dims_attrs(w, h) -> str:
+    return f' width="{int(w)}" height="{int(h)}"' if w and h else ""
+
+
+def card_thumbnail_html(it: dict) -> str:
+    """
+    Vignette de carte (« Autres images »): srcset/sizes, dimensions, chargement différé.
+    <picture>: <source> WebP avec les mêmes largeurs que le srcset JPEG de l'<img>.
+    """
+    cands = card_srcset(it)
+    srcset = f' srcset="{html_escape(srcset_attr(cands, "../"))}" sizes="{CARD_SIZES_OBJECT}"' if len(cands) > 1 else ""
+    img = (
+        f'<img src="../{html_escape(it["thumbnailUrl"])}"{srcset}'
+        f'{img_dims_attrs(it.get("thumbnailWidth"), it.get("thumbnailHeight"))}'
+        f' loading="lazy" decoding="async" class="card-img-top" alt="{html_escape(it.get("alt",""))}">'
+    )
+    webp = card_srcset(it, webp=True)
+    if not webp:
+        return img
+    if len(webp) > 1:
+        source = f'srcset="{html_escape(srcset_attr(webp, "../"))}" sizes="{CARD_SIZES_OBJECT}"'
+    else:
+        source = f'srcset="../{html_escape(webp[0][0])}"'
+    return f'<picture><source type="image/webp" {source}>{img}</picture>'
+
+
+def hero_fits_path(hero: dict) -> str:
+    """FITS source de l'image héros (ou FITS empilé trouvé à côté du JPG); "" si introuvable."""
+    fp = hero.get("_fitsPath") or hero.get("fitsPath") or hero.get("fits_path") or ""
+    if (not fp) and hero.get("_jpgPath"):
         try:
-            WEATHER_DONE += 1
-            if WEATHER_TOTAL > 0:
-                pct = (WEATHER_DONE / WEATHER_TOTAL) * 100.0
-                print(f"🌤️  Météo: {WEATHER_DONE}/{WEATHER_TOTAL} ({pct:5.1f}%) — {obj_name}")
-            else:
-                print(f"🌤️  Météo: {WEATHER_DONE} — {obj_name}")
+            fp2 = stacked_fits_for_jpg(Path(hero.get("_jpgPath")))
+            fp = str(fp2) if fp2 else ""
         except Exception:
-            pass
+            fp = ""
+    return fp
 
-        if fp and Path(fp).exists():
-            try:
-                space_weather_block = space_weather.render_space_weather_block(fp)
-            except Exception as e:
-                space_weather_block = (
-                    "<div class='card shadow-sm'><div class='card-body text-muted'>"
-                    f"Données météo non disponibles (erreur module): {html_escape(str(e))}"
-                    "</div></div>"
-                )
+
+def space_weather_block_for(hero: dict, obj_name: str) -> str:
+    """Bloc HTML météo/conditions de l'image héros ("" sans le module space_weather)."""
+    # On tente de retrouver le FITS source associé à l'image héros.
+    # If missing, we try to locate the FITS next to the JPG (same folder).
+    global WEATHER_DONE
+    if not (HAS_SPACE_WEATHER and space_weather is not None):
+        return ""
+    fp = hero_fits_path(hero)
+
+    # Indicateur visuel / Progress indicator
+    try:
+        with WEATHER_PROGRESS_LOCK:
+            WEATHER_DONE += 1
+            done = WEATHER_DONE
+        if WEATHER_TOTAL > 0:
+            pct = (done / WEATHER_TOTAL) * 100.0
+            print(f"🌤️  Météo: {done}/{WEATHER_TOTAL} ({pct:5.1f}%) — {obj_name}")
         else:
-            space_weather_block = (
+            print(f"🌤️  Météo: {done} — {obj_name}")
+    except Exception:
+        pass
+
+    if fp and Path(fp).exists():
+        try:
+            return space_weather.render_space_weather_block(fp)
+        except Exception as e:
+            return (
                 "<div class='card shadow-sm'><div class='card-body text-muted'>"
-                "Météo/conditions: FITS source introuvable pour cet objet "
-                "(DATE-OBS/SITELAT/SITELONG requis)."
+                f"Données météo non disponibles (erreur module): {html_escape(str(e))}"
                 "</div></div>"
             )
+    return (
+        "<div class='card shadow-sm'><div class='card-body text-muted'>"
+        "Météo/conditions: FITS source introuvable pour cet objet "
+        "(DATE-OBS/SITELAT/SITELONG requis)."
+        "</div></div>"
+    )
+
+
+def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og_block: str, items: list, weather_block: str | None = None) -> str:
+    # Héro = plus récent (items[0] est trié ailleurs)
+    hero = items[0]
+
+    author = CREATOR_NAME
+    license_name = IMAGE_LICENSE
+
+    hero_img = hero["contentUrl"]
+    hero_img_alt = hero.get("alt", obj_name)
+    hero_srcset = ""
+    if hero.get("srcset"):
+        hero_srcset = f' srcset="{html_escape(srcset_attr(hero["srcset"], "../"))}" sizes="100vw"'
+
+    # --- Météo et conditions d'observation / Weather & observing conditions ---
+    # Bloc déjà récupéré par une tâche réseau (pipeline dag), sinon appel direct.
+    if weather_block is None:
+        weather_block = space_weather_block_for(hero, obj_name)
+    space_weather_block = weather_block
 
     # --- Métadonnées de l'image ---
     image_meta_rows = [
@@ -1620,7 +1400,7 @@ def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og
               <span class="text-muted small">Cliquez pour agrandir</span>
             </div>
             <a href="#" data-bs-toggle="modal" data-bs-target="#{astro_id}">
-              <img src="../{html_escape(astro)}" class="img-fluid rounded mt-2 astro-preview" alt="Astrométrie {html_escape(obj_name)}">
+              <img src="../{html_escape(astro)}" loading="lazy" decoding="async" class="img-fluid rounded mt-2 astro-preview" alt="Astrométrie {html_escape(obj_name)}">
             </a>
           </div>
         </div>
@@ -1649,7 +1429,7 @@ def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og
         <div class="col-md-4">
           <div class="card h-100 shadow-sm">
             <a href="../{html_escape(it['contentUrl'])}" target="_blank" rel="noopener">
-              <img src="../{html_escape(it['thumbnailUrl'])}" class="card-img-top" alt="{html_escape(it.get('alt',''))}">
+              {card_thumbnail_html(it)}
             </a>
             <div class="card-body">
               <div class="fw-semibold">{html_escape(it.get('objectName', it.get('name','')))}</div>
@@ -1660,6 +1440,40 @@ def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og
         """)
     gallery_cards_html = "\n".join(gallery_cards)
 
+    # --- Zoom profond (pyramide DeepZoom, OpenSeadragon ne charge que les tuiles visibles) ---
+    dz = hero.get("deepZoomUrl", "")
+    dz_button = ""
+    dz_modal = ""
+    if dz:
+        dz_button = '<button type="button" class="btn btn-outline-primary btn-sm" data-bs-toggle="modal" data-bs-target="#deepZoomModal">Zoom</button>'
+        dz_modal = f"""
+<div class="modal fade" id="deepZoomModal" tabindex="-1" aria-hidden="true">
+  <div class="modal-dialog modal-fullscreen">
+    <div class="modal-content">
+      <div class="modal-header">
+        <h5 class="modal-title">Zoom — {html_escape(obj_name)}</h5>
+        <button type="button" class="btn-close" data-bs-dismiss="modal" aria-label="Fermer"></button>
+      </div>
+      <div class="modal-body p-0">
+        <div id="deepZoomViewer" class="deepzoom-viewer"></div>
+      </div>
+    </div>
+  </div>
+</div>
+<script src="{OSD_CDN_JS}" defer></script>
+<script>
+document.getElementById('deepZoomModal').addEventListener('shown.bs.modal', function () {{
+  if (window.deepZoomViewer) return;
+  window.deepZoomViewer = OpenSeadragon({{
+    id: 'deepZoomViewer',
+    prefixUrl: '{OSD_CDN_IMAGES}',
+    tileSources: '../{html_escape(dz)}',
+    showNavigator: true
+  }});
+}});
+</script>
+"""
+
     # --- Carte stellaire (finder chart) ---
     star = hero.get("starChartUrl", "")
     star_block = ""
@@ -1674,7 +1488,7 @@ def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og
               <span class="text-muted small">Cliquez pour agrandir</span>
             </div>
             <a href="#" data-bs-toggle="modal" data-bs-target="#{star_id}">
-              <img src="../{html_escape(star)}" class="img-fluid mt-2 astro-preview" alt="Carte stellaire {html_escape(obj_name)}">
+              <img src="../{html_escape(star)}" loading="lazy" decoding="async" class="img-fluid mt-2 astro-preview" alt="Carte stellaire {html_escape(obj_name)}">
             </a>
           </div>
         </div>
@@ -1730,6 +1544,7 @@ def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og
     <div class="text-end">
       <a class="btn btn-outline-secondary btn-sm" href="../index.html">← Retour</a>
       <a class="btn btn-primary btn-sm" href="../{html_escape(hero_img)}" target="_blank" rel="noopener">Ouvrir l’image</a>
+      {dz_button}
     </div>
   </div>
 
@@ -1738,7 +1553,7 @@ def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og
     <div class="row g-0">
       <div class="col-lg-8">
         <a href="../{html_escape(hero_img)}" target="_blank" rel="noopener">
-          <img src="../{html_escape(hero_img)}" class="img-fluid w-100 object-hero" alt="{html_escape(hero_img_alt)}">
+          <img src="../{html_escape(hero_img)}"{hero_srcset}{img_dims_attrs(hero.get("width"), hero.get("height"))} decoding="async" class="img-fluid w-100 object-hero" alt="{html_escape(hero_img_alt)}">
         </a>
       </div>
       <div class="col-lg-4">
@@ -1810,6 +1625,7 @@ def build_object_page_html(site_title: str, obj_name: str, jsonld_block: str, og
 
 {astro_modal}
         {star_modal}
+{dz_modal}
 
 <script src="{BOOTSTRAP_CDN_JS}"></script>
 </body>
@@ -1844,6 +1660,35 @@ function matches(item, q) {
   return hay.includes(q.toLowerCase());
 }
 
+const CARD_SIZES = '__CARD_SIZES__';
+
+function cardSrcset(item, webp) {
+  const tw = item.thumbnailWidth || 0;
+  const thumb = webp ? item.thumbnailWebpUrl : item.thumbnailUrl;
+  const cands = (tw && thumb) ? [[thumb, tw]] : [];
+  for (const c of ((webp ? item.srcsetWebp : item.srcset) || [])) if (c[1] > tw) cands.push(c);
+  return cands;
+}
+
+function srcsetAttr(cands) {
+  return cands.length > 1
+    ? ` srcset="${cands.map(c => `${c[0]} ${c[1]}w`).join(', ')}" sizes="${CARD_SIZES}"`
+    : '';
+}
+
+function thumbHtml(item) {
+  const srcset = srcsetAttr(cardSrcset(item, false));
+  const dims = (item.thumbnailWidth && item.thumbnailHeight)
+    ? ` width="${item.thumbnailWidth}" height="${item.thumbnailHeight}"`
+    : '';
+  const img = `<img src="${item.thumbnailUrl}"${srcset}${dims} loading="lazy" decoding="async" class="card-img-top" alt="${item.alt}">`;
+  // <source> WebP avec les mêmes largeurs que le srcset JPEG
+  const webp = cardSrcset(item, true);
+  if (!webp.length) return img;
+  const source = webp.length > 1 ? srcsetAttr(webp) : ` srcset="${webp[0][0]}"`;
+  return `<picture><source type="image/webp"${source}>${img}</picture>`;
+}
+
 function buildCard(item) {
   const col = document.createElement('div');
   col.className = 'col-12 col-sm-6 col-lg-4';
@@ -1856,7 +1701,7 @@ function buildCard(item) {
   col.innerHTML = `
     <div class="card h-100 shadow-sm">
       <a href="${item.objectPage || item.contentUrl}">
-        <img src="${item.thumbnailUrl}" class="card-img-top" alt="${item.alt}">
+        ${thumbHtml(item)}
       </a>
       <div class="card-body">
         <div class="fw-semibold">${item.objectName || item.name}</div>
@@ -1915,13 +1760,19 @@ function render(data) {
 
   render(data);
 })();
-"""
+""".replace("__CARD_SIZES__", CARD_SIZES_INDEX)
 
 
 def build_styles_css() -> str:
     return """
 .card-img-top { object-fit: cover; height: 240px; }
 
+.deepzoom-viewer {
+  width: 100%;
+  height: 100%;
+  background: #000;
+}
+
 .object-hero {
   max-height: 70vh;
   object-fit: cover;
@@ -1937,489 +1788,1139 @@ def build_styles_css() -> str:
 # ------------------------------------------------------------
 # Sitemap
 # ------------------------------------------------------------
-def write_sitemap(site_dir: Path, urls: list[str], base_url: str):
+def build_sitemap_xml(urls: list[str], base_url: str) -> bytes:
     urlset = ET.Element("urlset", xmlns="http://www.sitemaps.org/schemas/sitemap/0.9")
     for u in urls:
         url = ET.SubElement(urlset, "url")
         ET.SubElement(url, "loc").text = base_url.rstrip("/") + "/" + u.lstrip("/")
-    tree = ET.ElementTree(urlset)
-    tree.write(site_dir / "sitemap.xml", encoding="utf-8", xml_declaration=True)
+    return ET.tostring(urlset, encoding="utf-8", xml_declaration=True)
+
+
+def write_sitemap(site_dir: Path, urls: list[str], base_url: str):
+    (site_dir / "sitemap.xml").write_bytes(build_sitemap_xml(urls, base_url))
 
 
 # ------------------------------------------------------------
-# MAIN
+# Étapes du build (partagées par le pipeline classique et le pipeline streaming)
 # ------------------------------------------------------------
-def main():
-    root = Path(os.getcwd())
-    out = root / "site"
+def read_item_meta(jpg_path: Path, ctx: dict) -> tuple[Path | None, dict]:
+    """FITS empilé associé au JPG + métadonnées FITS (lecture légère, sans copie ni réseau)."""
+    manifest = ctx["manifest"]
+    fits_path = ctx["scan_index"].stacked_fits_for(jpg_path)
+
+    # Métadonnées FITS: réutilisées depuis le manifeste si JPG et FITS sont inchangés
+    input_fps = {
+        "jpg": file_fingerprint(jpg_path),
+        "fits": str(fits_path) if fits_path else "",
+        "fits_fp": file_fingerprint(fits_path) if fits_path else "",
+    }
+    cached_input = manifest.cached_input(str(jpg_path), input_fps)
+    if cached_input is not None:
+        meta = cached_input.get("meta") or {}
+    else:
+        meta = extract_fits_metadata(fits_path) if fits_path else {}
+    manifest.record_input(str(jpg_path), input_fps, meta=meta)
+
+    return fits_path, meta
+
+
+def object_name_from_meta(jpg_path: Path, meta: dict) -> str:
+    obs_dir = jpg_path.parent
+    object_name = meta.get("object") or obs_dir.name
+    if object_name.strip().lower() in ("unknown object", "unknown", ""):
+        object_name = obs_dir.name
+    return object_name
+
+
+def build_item(jpg_path: Path, fits_path: Path | None, meta: dict, ctx: dict) -> dict:
+    """Pass 1 (un JPG): copie image/vignette, tags SIMBAD, champs Messier -> item."""
+    manifest = ctx["manifest"]
+    scan_index = ctx["scan_index"]
+    cache = ctx["cache"]
+    messier_db = ctx["messier_db"]
+
+    obs_dir = jpg_path.parent
+    object_name = object_name_from_meta(jpg_path, meta)
+
+    dt = parse_date(meta.get("date_obs", ""))
+    date_created_human = dt.strftime("%Y-%m-%d %H:%M") if dt else ""
+    date_created_iso = dt.isoformat() if dt else ""
+
+    catalog = infer_catalog(object_name)
+    obj_type = infer_object_type_basic(object_name)
+
+    # Copy image
+    rel_img_name = f"{slugify(object_name)}-{jpg_path.name}"
+    rel_img = manifest.publish_asset(jpg_path, Path("data/img") / rel_img_name)
+
+    # Thumbnail if exists
+    thn_guess = scan_index.thumbnail_for(jpg_path)
+    rel_thn = rel_img
+    rel_thn_webp = None
+    generated = ctx["generated_thumbs"].get(str(jpg_path))
+    if thn_guess is not None and (not is_in_sub_folder(thn_guess)):
+        rel_thn_name = f"{slugify(object_name)}-{thn_guess.name}"
+        rel_thn = manifest.publish_asset(thn_guess, Path("data/img") / rel_thn_name)
+    elif generated is not None:
+        # Pas de _thn.jpg Seestar: vignette générée (JPEG + WebP) plutôt que l'image pleine taille
+        gen_jpg, gen_webp = generated
+        rel_thn = manifest.publish_asset(gen_jpg, Path("data/img") / f"{slugify(object_name)}-{jpg_path.stem}_thn.jpg")
+        if gen_webp.exists():
+            rel_thn_webp = manifest.publish_asset(gen_webp, Path("data/img") / f"{slugify(object_name)}-{jpg_path.stem}_thn.webp")
+
+    # Dimensions intrinsèques (en-têtes JPEG, sans décodage) + variantes responsives pour srcset
+    img_size = image_size(jpg_path) or (0, 0)
+    if rel_thn == rel_img:
+        thn_size = img_size
+    else:
+        thn_size = image_size(generated[0] if thn_guess is None else thn_guess) or (0, 0)
+    srcset = []
+    srcset_webp = []
+    for vw, vh, vpath, vpath_webp in ctx["image_variants"].get(str(jpg_path), []):
+        rel_v = manifest.publish_asset(vpath, Path("data/img/w") / f"{slugify(object_name)}-{jpg_path.stem}-{vw}w.jpg")
+        srcset.append([rel_v.as_posix(), vw])
+        rel_vw = manifest.publish_asset(vpath_webp, Path("data/img/w") / f"{slugify(object_name)}-{jpg_path.stem}-{vw}w.webp")
+        srcset_webp.append([rel_vw.as_posix(), vw])
+    if srcset and img_size[0]:
+        srcset.append([rel_img.as_posix(), img_size[0]])
+
+    # SIMBAD: use folder name (not filename, not FITS OBJECT)
+    simbad_ident = simbad_ident_from_dir(obs_dir)
+    enrich = enrich_tags(simbad_ident, cache)
+
+    tags_fr = uniq_preserve(enrich.get("tags_fr", []))
+    tags_en = uniq_preserve(enrich.get("tags_en", []))
+
+    # Improve object type from tags
+    if "planetary nebula" in tags_en:
+        obj_type = "Planetary Nebula"
+    elif "globular cluster" in tags_en:
+        obj_type = "Globular Cluster"
+    elif "open cluster" in tags_en:
+        obj_type = "Open Cluster"
+    elif "nebula" in tags_en or "HII region" in tags_en:
+        obj_type = "Nebula"
+    elif "spiral galaxy" in tags_en:
+        obj_type = "Spiral Galaxy"
+    elif "galaxy" in tags_en:
+        obj_type = "Galaxy"
+    elif "star" in tags_en:
+        obj_type = "Star"
+    elif "planet" in tags_en:
+        obj_type = "Planet"
+
+    # Messier enrichment from XLSX
+    messier_id = normalize_messier_id(obs_dir.name) or normalize_messier_id(object_name)
+    messier_info = messier_db.get(messier_id.upper()) if (messier_id and messier_db) else None
+
+    messier_fields = {
+        "messier": "",
+        "ngc": "",
+        "constellation": "",
+        "magnitude": None,
+        "size": "",
+        "distance_ly": None,
+        "messier_type": "",
+    }
 
-    script_dir = Path(__file__).resolve().parent
+    if messier_id and messier_info:
+        messier_fields["messier"] = messier_id
+        messier_fields["ngc"] = messier_info.get("ngc_id") or ""
+        messier_fields["constellation"] = messier_info.get("constellation") or ""
+        messier_fields["magnitude"] = messier_info.get("mag")
+        messier_fields["size"] = messier_info.get("size") or ""
+        messier_fields["distance_ly"] = messier_info.get("distance_ly")
+        messier_fields["messier_type"] = messier_info.get("type") or ""
+
+        if obj_type in ("Other", "", None) and messier_fields["messier_type"]:
+            obj_type = messier_fields["messier_type"]
+
+        if messier_fields["messier_type"]:
+            tags_fr = uniq_preserve(tags_fr + [messier_fields["messier_type"]])
+
+    keywords_fr = uniq_preserve([object_name, catalog, "Seestar S50", "astrophotographie"] + tags_fr)
+    keywords_en = uniq_preserve([object_name, catalog, "Seestar S50", "astrophotography"] + tags_en)
+
+    if messier_fields["messier"]:
+        keywords_fr = uniq_preserve(keywords_fr + [messier_fields["messier"], messier_fields["ngc"], messier_fields["constellation"]])
+        keywords_en = uniq_preserve(keywords_en + [messier_fields["messier"], messier_fields["ngc"], messier_fields["constellation"]])
+
+    tags_short_fr = ", ".join(tags_fr[:3]) if tags_fr else ""
+    tags_short_en = ", ".join(tags_en[:3]) if tags_en else ""
+    desc = f"Astrophotographie {object_name} (Seestar S50). {tags_short_fr} / {tags_short_en}".strip()
+
+    alt = f"{object_name} — {', '.join(uniq_preserve(tags_fr[:2] + tags_en[:2]))} — {catalog} — Seestar S50".strip(" —")
+
+    obj_slug = slugify(object_name)
+    object_page = f"gallery/{obj_slug}.html"
+
+    content_abs = BASE_URL.rstrip("/") + "/" + rel_img.as_posix()
+    thumb_abs = BASE_URL.rstrip("/") + "/" + rel_thn.as_posix()
+
+    item = {
+        "name": jpg_path.name,
+        "objectName": object_name,
+        "catalog": catalog,
+        "objectType": obj_type,
+        "dateCreated": date_created_human,
+        "dateCreatedISO": date_created_iso,
+        "filter": meta.get("filter", ""),
+        "exptime": meta.get("exptime", ""),
+        "telescope": meta.get("telescope", ""),
+        "instrument": meta.get("instrument", ""),
+        "ra": meta.get("ra", ""),
+        "dec": meta.get("dec", ""),
 
-    # Messier catalog
-    messier_xlsx = find_messier_xlsx(script_dir, root)
-    messier_db = {}
-    if messier_xlsx:
-        try:
-            messier_db = load_messier_catalog(messier_xlsx)
-            print(f"[INFO] Catalogue Messier chargé: {messier_xlsx} ({len(messier_db)} entrées)")
-        except Exception as e:
-            print(f"[WARN] Lecture catalogue Messier impossible: {messier_xlsx} ({e})")
-            messier_db = {}
-    else:
-        print(f"[INFO] Catalogue Messier introuvable (attendu: {MESSIER_XLSX_NAME} près du script).")
+        "tags_fr": tags_fr,
+        "tags_en": tags_en,
+        "keywords_fr": keywords_fr,
+        "keywords_en": keywords_en,
+
+        # SIMBAD fields to display on object page
+        "simbad_ident": enrich.get("ident", ""),
+        "simbad_main_id": enrich.get("main_id", ""),
+        "simbad_otype": enrich.get("otype", ""),
+        "simbad_otype_txt": enrich.get("otype_txt", ""),
+        "simbad_source": enrich.get("source", ""),
+
+        # Messier fields
+        "messier": messier_fields["messier"],
+        "ngc": messier_fields["ngc"],
+        "constellation": messier_fields["constellation"],
+        "magnitude": messier_fields["magnitude"],
+        "size": messier_fields["size"],
+        "distance_ly": messier_fields["distance_ly"],
+        "messier_type": messier_fields["messier_type"],
+
+        "description": desc,
+        "alt": alt,
+
+        "contentUrl": rel_img.as_posix(),
+        "width": img_size[0],
+        "height": img_size[1],
+        "srcset": srcset,
+        "srcsetWebp": srcset_webp,
+        "thumbnailUrl": rel_thn.as_posix(),
+        "thumbnailWidth": thn_size[0],
+        "thumbnailHeight": thn_size[1],
+        "thumbnailWebpUrl": rel_thn_webp.as_posix() if rel_thn_webp else "",
+        "contentUrlAbs": content_abs,
+        "thumbnailUrlAbs": thumb_abs,
+
+        "objectPage": object_page,
+        "astrometryUrl": "",
+
+        "_fitsPath": str(fits_path) if fits_path else "",
+        "_jpgPath": str(jpg_path),
+        "_jpgStem": jpg_path.stem,
+    }
 
+    return item
 
-    # Catalogue d’objets divers (pour labels de la carte): objets <= mag 6
-    diverse_xlsx = find_diverse_xlsx(script_dir, root)
-    diverse_catalog = []
-    if diverse_xlsx:
+
+def astrometry_targets(group_items: list) -> list:
+    """Items d'un groupe (objet) à résoudre selon ASTROMETRY_MODE."""
+    if ASTROMETRY_MODE == "all":
+        return [it for it in group_items if it.get("_fitsPath")]
+    group_items.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+    if group_items and group_items[0].get("_fitsPath"):
+        return [group_items[0]]
+    return []
+
+
+def solve_item_wcs(it: dict, ctx: dict) -> dict | None:
+    """
+    Pass 2, partie réseau (un item): cache persistant, plate-solve Nova, WCS header-only.
+    Retourne l'état à transmettre à render_item_astrometry, ou None (cache réutilisé / échec).
+    """
+    out = ctx["out"]
+    manifest = ctx["manifest"]
+    nova_session = ctx["nova_session"]
+    astro_cache = ctx["astro_cache"]
+
+    obj = it["objectName"]
+    fits_path = Path(it["_fitsPath"]) if it.get("_fitsPath") else None
+    jpg_path = Path(it["_jpgPath"])
+    jpg_stem = it["_jpgStem"]
+
+    try:
+        if not fits_path or not fits_path.exists():
+            print(f"\n[WARN] Pas de FITS local pour {obj} -> astrométrie skip")
+            return None
+
+        # ---------- Persistent cache check ----------
+        src_path = fits_path if fits_path.exists() else jpg_path
+        src_fp = file_fingerprint(src_path)
+
+        cache_key = f"{slugify(obj)}-{jpg_stem}"
+        cached = astro_cache.get(cache_key)
+
+        cached_png = ASTRO_CACHE_DIR / f"{cache_key}-astrometry.png"
+        cached_wcs = ASTRO_CACHE_DIR / f"{cache_key}-wcs.fits"
+
+        if cached and cached.get("src_fp") == src_fp and cached_png.exists() and cached_wcs.exists():
+            wcs_rel = Path("data/solved") / cached_wcs.name
+
+            astro_rel = manifest.publish_asset(cached_png, Path("astrometry") / cached_png.name)
+            manifest.copy_file(cached_wcs, wcs_rel)
+
+            it["astrometryUrl"] = astro_rel.as_posix()
+            print(f"\n[CACHE] Astrométrie réutilisée pour {obj}: {cached_png.name}")
+            return None
+        # -------------------------------------------
+
+        wcs_rel = Path("data/solved") / f"{cache_key}-wcs.fits"
+        wcs_fits = out / wcs_rel
+        wcs_sig = signature(src_fp)
+
+        # WCS du build précédent réutilisé seulement s'il a été résolu à partir du même FITS
+        # (un FITS ré-empilé change src_fp -> nouveau solve)
+        if not manifest.is_current(wcs_rel, wcs_sig):
+            if wcs_fits.exists() or wcs_fits.is_symlink():
+                wcs_fits.unlink()
+            scale = estimate_scale_arcsec_per_pix(fits_path)
+            subid = nova_upload_fits(nova_session, fits_path, scale_arcsec_per_pix=scale)
+            jobid = nova_poll_submission(subid, wait_s=5, timeout_s=600)
+            ok = nova_poll_job_solved(jobid, wait_s=5, timeout_s=900)
+            if not ok:
+                print(f"\n[WARN] Plate-solve échoué (job failure) pour {obj}")
+                return None
+
+            ok_dl = nova_download_wcs_header_only(jobid, wcs_fits)
+            if not ok_dl:
+                print(f"\n[WARN] Téléchargement WCS header-only échoué pour {obj}")
+                return None
+
+        manifest.mark(wcs_rel, wcs_sig)
+        return {
+            "fits_path": fits_path,
+            "src_fp": src_fp,
+            "cache_key": cache_key,
+            "cached_png": cached_png,
+            "cached_wcs": cached_wcs,
+            "wcs_fits": wcs_fits,
+        }
+
+    except Exception as e:
+        print(f"\n[WARN] Astrométrie échouée pour {obj}: {e}")
+        return None
+
+
+def render_item_astrometry(it: dict, solved: dict | None, ctx: dict):
+    """
+    Pass 2, partie CPU (un item): PNG astrométrie et carte atlas (processus de rendu),
+    publication et cache persistant. Attend ses rendus: appelée depuis un thread.
+    """
+    if not solved:
+        return
+    out = ctx["out"]
+    manifest = ctx["manifest"]
+    astro_cache = ctx["astro_cache"]
+    star_cache = ctx["star_cache"]
+    render_pool = ctx["render_pool"]
+    diverse_mag_limit = ctx["diverse_mag_limit"]
+
+    obj = it["objectName"]
+    jpg_path = Path(it["_jpgPath"])
+    fits_path = solved["fits_path"]
+    src_fp = solved["src_fp"]
+    cache_key = solved["cache_key"]
+    cached_png = solved["cached_png"]
+    cached_wcs = solved["cached_wcs"]
+    wcs_fits = solved["wcs_fits"]
+
+    try:
+        wcs_header = load_wcs_header_only(wcs_fits)
+        if wcs_header is None:
+            return
+        # Centre du champ (WCS) pour usage local (carte stellaire)
+        ra_c, dec_c = wcs_center_from_header(wcs_header)
+        if ra_c is not None and dec_c is not None:
+            it["wcsCenterRaDeg"] = ra_c
+            it["wcsCenterDecDeg"] = dec_c
+
+        astro_name = f"{cache_key}-astrometry.png"
+        astro_rel = Path("astrometry") / astro_name
+        astro_sig = signature(src_fp, file_fingerprint(wcs_fits))
+
+        if manifest.is_current(astro_rel, astro_sig):
+            # PNG déjà produit à partir des mêmes FITS + WCS (build incrémental)
+            manifest.mark(astro_rel, astro_sig)
+            ok_png = True
+        else:
+            # Décodage FITS + matplotlib dans un processus de rendu (chemins seulement)
+            ok_png = render_pool.astrometry({
+                "fits": str(fits_path),
+                "jpg": str(jpg_path),
+                "wcs": str(wcs_fits),
+                "out": str(out / astro_rel),
+                "title": obj,
+                "max_pixels": ASTROMETRY_PNG_MAX_PIXELS,
+            }).result()
+            if ok_png:
+                manifest.mark(astro_rel, astro_sig)
+
+        if ok_png:
+            it["astrometryUrl"] = astro_rel.as_posix()
+
+        # Carte stellaire (cache persistant + copie dans /site)
         try:
-            diverse_catalog = load_diverse_catalog(diverse_xlsx)
-            print(f"[INFO] Catalogue objets divers chargé: {diverse_xlsx} ({len(diverse_catalog)} entrées)")
+            ra_c = it.get("wcsCenterRaDeg", None)
+            dec_c = it.get("wcsCenterDecDeg", None)
+
+            if ra_c is None or dec_c is None:
+                # fallback Messier si disponible (si vous le mappez plus tard)
+                ra_c = it.get("messier_ra_deg", None)
+                dec_c = it.get("messier_dec_deg", None)
+
+            if ra_c is not None and dec_c is not None:
+                STAR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+                star_key = f"{obj.upper()}|{float(ra_c):.6f}|{float(dec_c):.6f}|30"
+
+                if star_key in star_cache and Path(star_cache[star_key]).exists():
+                    star_png_cache = Path(star_cache[star_key])
+                else:
+                    star_png_cache = STAR_CACHE_DIR / f"{slugify(obj)}_{abs(int(float(ra_c)*1000))}_{abs(int(float(dec_c)*1000))}_30.png"
+                    ok_star = render_pool.finder_chart({
+                        "ra": float(ra_c),
+                        "dec": float(dec_c),
+                        "out": str(star_png_cache),
+                        "fov_arcmin": ATLAS_FOV_ARCMIN,
+                        "inner_fov_arcmin": 30.0,
+                        "title": obj,
+                        "nearby": atlas_nearby(float(ra_c), float(dec_c), ATLAS_FOV_ARCMIN),
+                        "diverse_mag_limit": diverse_mag_limit,
+                        "mag_limit": ATLAS_MAG_LIMIT,
+                    }).result()
+                    if ok_star:
+                        star_cache[star_key] = str(star_png_cache)
+
+                if star_png_cache.exists():
+                    star_name = f"{slugify(obj)}-finder.png"
+                    dest_rel = manifest.publish_asset(star_png_cache, Path("starcharts") / star_name)
+                    it["starChartUrl"] = dest_rel.as_posix()
         except Exception as e:
-            print(f"[WARN] Lecture catalogue objets divers impossible: {diverse_xlsx} ({e})")
-            diverse_catalog = []
-    else:
-        print(f"[INFO] Catalogue objets divers introuvable (attendu: {DIVERSE_XLSX_NAME} près du script).")
+            print(f"[WARN] Carte stellaire: erreur inattendue: {e}")
+
+        cached = astro_cache.get(cache_key) or {}
+        if ok_png and cached.get("src_fp") == src_fp and cached_png.exists() and cached_wcs.exists():
+            pass  # déjà en cache (PNG inchangé, build incrémental)
+        elif ok_png:
+            # ---------- Save to persistent cache ----------
+            # copie vers un nouveau fichier: cached_* peut être lié (hardlink) dans site/
+            copy_atomic(wcs_fits, cached_wcs)
+            copy_atomic(out / astro_rel, cached_png)
+            astro_cache[cache_key] = {
+                "src_fp": src_fp,
+                "object": obj,
+                "updated": datetime.now().isoformat(timespec="seconds")
+            }
+            # ---------------------------------------------
+        else:
+            print(f"\n[WARN] PNG astrométrie non généré: {obj}")
 
-    diverse_mag_limit = float(os.environ.get("GNU_ASTRO_GALERY_DIVERSE_MAG_LIMIT", str(DIVERSE_LABEL_MAG_LIMIT_DEFAULT)))
-    NOVA_API_KEY = os.environ.get("NOVA_ASTROMETRY_API_KEY", "").strip()
-    if not NOVA_API_KEY:
-        print("[INFO] NOVA_ASTROMETRY_API_KEY non défini -> pas d'astrométrie (plate solve)")
+    except Exception as e:
+        print(f"\n[WARN] Astrométrie échouée pour {obj}: {e}")
 
-    # SIMBAD cache
-    cache = load_cache(root / CACHE_PATH)
 
-    # Astrometry persistent cache
-    ASTRO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    astro_cache = load_json(ASTRO_CACHE_INDEX)
+def solve_items_astrometry(to_solve: list, ctx: dict, progress: bool = False):
+    """
+    Pass 2: solves Nova en parallèle (limites de l'hôte Nova, voir astrogalery.net); le
+    rendu PNG + carte de chaque item part dans les processus de rendu dès son WCS reçu.
+    """
+    done = [0]
+    done_lock = threading.Lock()
 
-    # Rebuild site fresh
-    if out.exists():
-        shutil.rmtree(out)
-    (out / "assets/css").mkdir(parents=True, exist_ok=True)
-    (out / "assets/js").mkdir(parents=True, exist_ok=True)
-    (out / "data").mkdir(parents=True, exist_ok=True)
-    (out / "gallery").mkdir(parents=True, exist_ok=True)
-    (out / "data/img").mkdir(parents=True, exist_ok=True)
-    (out / "astrometry").mkdir(parents=True, exist_ok=True)
-    (out / "data/solved").mkdir(parents=True, exist_ok=True)
+    with ThreadPoolExecutor(max_workers=RENDER_WORKERS) as renders:
+        def _solve(it: dict):
+            renders.submit(render_item_astrometry, it, solve_item_wcs(it, ctx), ctx)
+            if progress:
+                with done_lock:
+                    done[0] += 1
+                    n = done[0]
+                pct = (n / max(1, len(to_solve))) * 100.0
+                print(f"🌐 Astrométrie: {n}/{len(to_solve)} ({pct:5.1f}%) — {it['objectName']}", end="\r")
 
-    jpgs = find_final_jpgs(root)
-    if not jpgs:
-        print("Aucun JPG final trouvé (hors dossiers *_sub/*-sub et hors fichiers *_thn.jpg).")
+        net.run_concurrently(_solve, to_solve, concurrency=net.host_concurrency(ASTRO_NOVA_API))
+
+
+def prefetch_weather_conditions(fits_paths: list[str]):
+    """Conditions Open-Meteo des images héros récupérées en parallèle avant le rendu des pages."""
+    if not (HAS_SPACE_WEATHER and space_weather is not None):
+        return
+    fits_paths = [fp for fp in fits_paths if fp and Path(fp).exists()]
+    try:
+        fetched, failed = space_weather.prefetch_conditions(fits_paths)
+    except Exception as e:
+        print(f"[WARN] Pré-chargement météo impossible: {e}")
         return
+    if fetched:
+        print(f"🌤️  Météo: {fetched} heure(s)/site(s) récupérée(s) en parallèle")
+    if failed:
+        print(f"[WARN] Météo: {failed} heure(s)/site(s) non récupérée(s) (réseau ou données absentes)")
 
-    total = len(jpgs)
-    processed = 0
-    print(f"🔎 {total} image(s) à traiter (hors *_sub/*-sub et hors *_thn.jpg)...")
 
-    items = []
-    object_groups = {}
+def run_deepzoom_stage(hero_jpgs: list[str], ctx: dict):
+    """Pyramides des images héros, en parallèle (processus) et en cache par empreinte."""
+    ctx["deepzoom"] = {}
+    if DEEPZOOM_ENABLED and hero_jpgs:
+        ctx["deepzoom"] = ensure_deepzoom(hero_jpgs, ctx["root"] / DEEPZOOM_CACHE_DIR, workers=IMAGE_WORKERS)
 
-    # Nova session
-    nova_session = None
-    if NOVA_API_KEY:
-        try:
-            nova_session = nova_login(NOVA_API_KEY)
-            print("[INFO] Nova: session OK")
-        except Exception as e:
-            print(f"[WARN] Login Nova impossible: {e}")
-            nova_session = None
 
-    # Pass 1: build items
-    for jpg_path in jpgs:
-        processed += 1
-        pct = (processed / total) * 100.0
-        print(f"🛠️  Scan+tags: {processed}/{total} ({pct:5.1f}%)", end="\r")
+def attach_deepzoom(hero: dict, ctx: dict):
+    src_dir = ctx.get("deepzoom", {}).get(hero["_jpgPath"])
+    if src_dir is None or "deepZoomUrl" in hero:
+        return
+    rel_dir = Path("dz") / f"{slugify(hero['objectName'])}-{hero['_jpgStem']}"
+    ctx["manifest"].copy_tree(src_dir, rel_dir)
+    hero["deepZoomUrl"] = (rel_dir / f"{DZI_NAME}.dzi").as_posix()
+
+
+def object_page_signature(obj_name: str, group_items: list, ctx: dict) -> tuple[str, str]:
+    """(chemin relatif, signature) de la page objet; trie le groupe et attache la pyramide du héros."""
+    manifest = ctx["manifest"]
+    group_items.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+    attach_deepzoom(group_items[0], ctx)
+
+    page_rel = f"gallery/{slugify(obj_name)}.html"
+    # Page inchangée (mêmes items, mêmes FITS, mêmes catalogues) -> pas de re-rendu ni d'appel météo
+    page_sig = signature(
+        ctx["catalogs_fp"],
+        group_items,
+        [manifest.inputs.get(it["_jpgPath"], {}).get("fingerprints") for it in group_items],
+    )
+    return page_rel, page_sig
 
-        obs_dir = jpg_path.parent
-        fits_path = find_stacked_fits_in_dir(obs_dir)
-        meta = extract_fits_metadata(fits_path) if fits_path else {}
 
-        object_name = meta.get("object") or obs_dir.name
-        if object_name.strip().lower() in ("unknown object", "unknown", ""):
-            object_name = obs_dir.name
+def render_object_page(obj_name: str, group_items: list, ctx: dict) -> str:
+    """Écrit gallery/<objet>.html (bloc météo inclus) sauf si inchangé; retourne le chemin relatif."""
+    manifest = ctx["manifest"]
 
-        dt = parse_date(meta.get("date_obs", ""))
-        date_created_human = dt.strftime("%Y-%m-%d %H:%M") if dt else ""
-        date_created_iso = dt.isoformat() if dt else ""
-
-        catalog = infer_catalog(object_name)
-        obj_type = infer_object_type_basic(object_name)
-
-        # Copy image
-        rel_img_name = f"{slugify(object_name)}-{jpg_path.name}"
-        rel_img = Path("data/img") / rel_img_name
-        shutil.copy2(jpg_path, out / rel_img)
-
-        # Thumbnail if exists
-        thn_guess = jpg_path.with_name(jpg_path.stem + "_thn.jpg")
-        rel_thn = rel_img
-        if thn_guess.exists() and (not is_in_sub_folder(thn_guess)):
-            rel_thn_name = f"{slugify(object_name)}-{thn_guess.name}"
-            rel_thn = Path("data/img") / rel_thn_name
-            shutil.copy2(thn_guess, out / rel_thn)
-
-        # SIMBAD: use folder name (not filename, not FITS OBJECT)
-        simbad_ident = simbad_ident_from_dir(obs_dir)
-        enrich = enrich_tags(simbad_ident, cache)
-
-        tags_fr = uniq_preserve(enrich.get("tags_fr", []))
-        tags_en = uniq_preserve(enrich.get("tags_en", []))
-
-        # Improve object type from tags
-        if "planetary nebula" in tags_en:
-            obj_type = "Planetary Nebula"
-        elif "globular cluster" in tags_en:
-            obj_type = "Globular Cluster"
-        elif "open cluster" in tags_en:
-            obj_type = "Open Cluster"
-        elif "nebula" in tags_en or "HII region" in tags_en:
-            obj_type = "Nebula"
-        elif "spiral galaxy" in tags_en:
-            obj_type = "Spiral Galaxy"
-        elif "galaxy" in tags_en:
-            obj_type = "Galaxy"
-        elif "star" in tags_en:
-            obj_type = "Star"
-        elif "planet" in tags_en:
-            obj_type = "Planet"
-
-        # Messier enrichment from XLSX
-        messier_id = normalize_messier_id(obs_dir.name) or normalize_messier_id(object_name)
-        messier_info = messier_db.get(messier_id.upper()) if (messier_id and messier_db) else None
-
-        messier_fields = {
-            "messier": "",
-            "ngc": "",
-            "constellation": "",
-            "magnitude": None,
-            "size": "",
-            "distance_ly": None,
-            "messier_type": "",
-        }
+    page_rel, page_sig = object_page_signature(obj_name, group_items, ctx)
+    top = group_items[0]
+    page_url_abs = BASE_URL.rstrip("/") + "/" + page_rel
 
-        if messier_id and messier_info:
-            messier_fields["messier"] = messier_id
-            messier_fields["ngc"] = messier_info.get("ngc_id") or ""
-            messier_fields["constellation"] = messier_info.get("constellation") or ""
-            messier_fields["magnitude"] = messier_info.get("mag")
-            messier_fields["size"] = messier_info.get("size") or ""
-            messier_fields["distance_ly"] = messier_info.get("distance_ly")
-            messier_fields["messier_type"] = messier_info.get("type") or ""
-
-            if obj_type in ("Other", "", None) and messier_fields["messier_type"]:
-                obj_type = messier_fields["messier_type"]
-
-            if messier_fields["messier_type"]:
-                tags_fr = uniq_preserve(tags_fr + [messier_fields["messier_type"]])
-
-        keywords_fr = uniq_preserve([object_name, catalog, "Seestar S50", "astrophotographie"] + tags_fr)
-        keywords_en = uniq_preserve([object_name, catalog, "Seestar S50", "astrophotography"] + tags_en)
-
-        if messier_fields["messier"]:
-            keywords_fr = uniq_preserve(keywords_fr + [messier_fields["messier"], messier_fields["ngc"], messier_fields["constellation"]])
-            keywords_en = uniq_preserve(keywords_en + [messier_fields["messier"], messier_fields["ngc"], messier_fields["constellation"]])
-
-        tags_short_fr = ", ".join(tags_fr[:3]) if tags_fr else ""
-        tags_short_en = ", ".join(tags_en[:3]) if tags_en else ""
-        desc = f"Astrophotographie {object_name} (Seestar S50). {tags_short_fr} / {tags_short_en}".strip()
-
-        alt = f"{object_name} — {', '.join(uniq_preserve(tags_fr[:2] + tags_en[:2]))} — {catalog} — Seestar S50".strip(" —")
-
-        obj_slug = slugify(object_name)
-        object_page = f"gallery/{obj_slug}.html"
-
-        content_abs = BASE_URL.rstrip("/") + "/" + rel_img.as_posix()
-        thumb_abs = BASE_URL.rstrip("/") + "/" + rel_thn.as_posix()
-
-        item = {
-            "name": jpg_path.name,
-            "objectName": object_name,
-            "catalog": catalog,
-            "objectType": obj_type,
-            "dateCreated": date_created_human,
-            "dateCreatedISO": date_created_iso,
-            "filter": meta.get("filter", ""),
-            "exptime": meta.get("exptime", ""),
-            "telescope": meta.get("telescope", ""),
-            "instrument": meta.get("instrument", ""),
-            "ra": meta.get("ra", ""),
-            "dec": meta.get("dec", ""),
+    if manifest.is_current(page_rel, page_sig):
+        manifest.mark(page_rel, page_sig)
+        return page_rel
 
-            "tags_fr": tags_fr,
-            "tags_en": tags_en,
-            "keywords_fr": keywords_fr,
-            "keywords_en": keywords_en,
-
-            # SIMBAD fields to display on object page
-            "simbad_ident": enrich.get("ident", ""),
-            "simbad_main_id": enrich.get("main_id", ""),
-            "simbad_otype": enrich.get("otype", ""),
-            "simbad_otype_txt": enrich.get("otype_txt", ""),
-            "simbad_source": enrich.get("source", ""),
-
-            # Messier fields
-            "messier": messier_fields["messier"],
-            "ngc": messier_fields["ngc"],
-            "constellation": messier_fields["constellation"],
-            "magnitude": messier_fields["magnitude"],
-            "size": messier_fields["size"],
-            "distance_ly": messier_fields["distance_ly"],
-            "messier_type": messier_fields["messier_type"],
-
-            "description": desc,
-            "alt": alt,
-
-            "contentUrl": rel_img.as_posix(),
-            "thumbnailUrl": rel_thn.as_posix(),
-            "contentUrlAbs": content_abs,
-            "thumbnailUrlAbs": thumb_abs,
-
-            "objectPage": object_page,
-            "astrometryUrl": "",
-
-            "_fitsPath": str(fits_path) if fits_path else "",
-            "_jpgPath": str(jpg_path),
-            "_jpgStem": jpg_path.stem,
-        }
+    og_obj = og_meta(
+        f"{obj_name} — {SITE_TITLE}",
+        top.get("description", f"Astrophotographie: {obj_name}"),
+        top["thumbnailUrlAbs"],
+        page_url_abs
+    )
+
+    jsonld = image_jsonld(top, page_url_abs)
 
-        items.append(item)
-        object_groups.setdefault(object_name, []).append(item)
+    page = build_object_page_html(
+        SITE_TITLE,
+        obj_name,
+        json.dumps(jsonld, ensure_ascii=False, indent=2),
+        og_obj,
+        group_items,
+        weather_block=ctx.get("weather_blocks", {}).get(obj_name),
+    )
 
-    save_cache(root / CACHE_PATH, cache)
-    print("\n✅ Tags + Messier: terminé (cache SIMBAD mis à jour).")
+    # Erreur météo transitoire: ne pas figer la page, elle sera re-rendue au prochain build
+    if "(erreur API)" in page or "(erreur module)" in page:
+        page_sig = ""
+    manifest.write_text(page_rel, page, sig=page_sig)
+    return page_rel
 
-    items.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
 
-    # Pass 2: astrometry (optional) + persistent cache
-    if nova_session:
-        if ASTROMETRY_MODE == "all":
-            to_solve = [it for it in items if it.get("_fitsPath")]
-        else:
-            to_solve = []
-            for obj, group in object_groups.items():
-                group.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
-                if group and group[0].get("_fitsPath"):
-                    to_solve.append(group[0])
-
-        print(f"[INFO] Astrométrie mode={ASTROMETRY_MODE} -> {len(to_solve)} solve(s)")
-
-        done = 0
-        for it in to_solve:
-            done += 1
-            obj = it["objectName"]
-            fits_path = Path(it["_fitsPath"]) if it.get("_fitsPath") else None
-            jpg_path = Path(it["_jpgPath"])
-            jpg_stem = it["_jpgStem"]
-            pct = (done / max(1, len(to_solve))) * 100.0
-            print(f"🌐 Astrométrie: {done}/{len(to_solve)} ({pct:5.1f}%) — {obj}", end="\r")
+# Champs suffisants pour la grille de l'accueil (app.js) et le sitemap en mode streaming
+SUMMARY_FIELDS = (
+    "name", "objectName", "catalog", "objectType", "dateCreated", "dateCreatedISO", "filter",
+    "description", "alt", "tags_fr", "tags_en", "keywords_fr", "keywords_en",
+    "messier", "ngc", "constellation", "magnitude", "size", "distance_ly",
+    "contentUrl", "width", "height", "srcset", "srcsetWebp",
+    "thumbnailUrl", "thumbnailWebpUrl", "thumbnailWidth", "thumbnailHeight", "thumbnailUrlAbs", "objectPage",
+)
 
-            try:
-                if not fits_path or not fits_path.exists():
-                    print(f"\n[WARN] Pas de FITS local pour {obj} -> astrométrie skip")
-                    continue
-
-                # ---------- Persistent cache check ----------
-                src_path = fits_path if fits_path.exists() else jpg_path
-                src_fp = file_fingerprint(src_path)
-
-                cache_key = f"{slugify(obj)}-{jpg_stem}"
-                cached = astro_cache.get(cache_key)
-
-                cached_png = ASTRO_CACHE_DIR / f"{cache_key}-astrometry.png"
-                cached_wcs = ASTRO_CACHE_DIR / f"{cache_key}-wcs.fits"
-
-                if cached and cached.get("src_fp") == src_fp and cached_png.exists() and cached_wcs.exists():
-                    astro_rel = Path("astrometry") / cached_png.name
-                    wcs_rel = Path("data/solved") / cached_wcs.name
-
-                    shutil.copy2(cached_png, out / astro_rel)
-                    shutil.copy2(cached_wcs, out / wcs_rel)
-
-                    it["astrometryUrl"] = astro_rel.as_posix()
-                    print(f"\n[CACHE] Astrométrie réutilisée pour {obj}: {cached_png.name}")
-                    continue
-                # -------------------------------------------
-
-                wcs_fits = out / "data/solved" / f"{cache_key}-wcs.fits"
-
-                # Run solve if we don't already have WCS for this run
-                if not wcs_fits.exists():
-                    scale = estimate_scale_arcsec_per_pix(fits_path)
-                    subid = nova_upload_fits(nova_session, fits_path, scale_arcsec_per_pix=scale)
-                    jobid = nova_poll_submission(subid, wait_s=5, timeout_s=600)
-                    ok = nova_poll_job_solved(jobid, wait_s=5, timeout_s=900)
-                    if not ok:
-                        print(f"\n[WARN] Plate-solve échoué (job failure) pour {obj}")
-                        continue
-
-                    ok_dl = nova_download_wcs_header_only(jobid, wcs_fits)
-                    if not ok_dl:
-                        print(f"\n[WARN] Téléchargement WCS header-only échoué pour {obj}")
-                        continue
-
-                wcs_header = load_wcs_header_only(wcs_fits)
-                if wcs_header is None:
-                    continue
-                # Centre du champ (WCS) pour usage local (carte stellaire)
-                ra_c, dec_c = wcs_center_from_header(wcs_header)
-                if ra_c is not None and dec_c is not None:
-                    it["wcsCenterRaDeg"] = ra_c
-                    it["wcsCenterDecDeg"] = dec_c
-
-                img = read_best_image_from_fits(fits_path)
-                if img is None:
-                    print(f"\n[WARN] Image FITS invalide: aucun HDU 2D dans {fits_path.name} -> fallback JPG")
-                    img = read_image_from_jpg(jpg_path)
-
-                if img is None:
-                    print(f"\n[WARN] Aucun pixel image disponible (FITS+JPG) pour {obj}")
-                    continue
-
-                astro_name = f"{cache_key}-astrometry.png"
-                astro_rel = Path("astrometry") / astro_name
-
-                ok_png = make_astrometry_png_from_image_and_wcs(
-                    image_array_2d=img,
-                    wcs_header=wcs_header,
-                    out_png=out / astro_rel,
-                    title=obj
-                )
-
-                if ok_png:
-                    it["astrometryUrl"] = astro_rel.as_posix()
-
-                # Carte stellaire (cache persistant + copie dans /site)
-                try:
-                    ra_c = it.get("wcsCenterRaDeg", None)
-                    dec_c = it.get("wcsCenterDecDeg", None)
-
-                    if ra_c is None or dec_c is None:
-                        # fallback Messier si disponible (si vous le mappez plus tard)
-                        ra_c = it.get("messier_ra_deg", None)
-                        dec_c = it.get("messier_dec_deg", None)
-
-                    if ra_c is not None and dec_c is not None:
-                        STAR_CACHE_DIR.mkdir(parents=True, exist_ok=True)
-                        star_cache = load_star_cache()
-                        star_key = f"{obj.upper()}|{float(ra_c):.6f}|{float(dec_c):.6f}|30"
-
-                        if star_key in star_cache and Path(star_cache[star_key]).exists():
-                            star_png_cache = Path(star_cache[star_key])
-                        else:
-                            star_png_cache = STAR_CACHE_DIR / f"{slugify(obj)}_{abs(int(float(ra_c)*1000))}_{abs(int(float(dec_c)*1000))}_30.png"
-                            ok_star = make_finder_chart_png(float(ra_c), float(dec_c), star_png_cache, fov_arcmin=ATLAS_FOV_ARCMIN, inner_fov_arcmin=30.0, title=obj, diverse_catalog=diverse_catalog, diverse_mag_limit=diverse_mag_limit)
-                            if ok_star:
-                                star_cache[star_key] = str(star_png_cache)
-                                save_star_cache(star_cache)
-
-                        if star_png_cache.exists():
-                            (out / "starcharts").mkdir(parents=True, exist_ok=True)
-                            star_name = f"{slugify(obj)}-finder.png"
-                            dest_rel = Path("starcharts") / star_name
-                            shutil.copy2(star_png_cache, out / dest_rel)
-                            it["starChartUrl"] = dest_rel.as_posix()
-                except Exception as e:
-                    print(f"[WARN] Carte stellaire: erreur inattendue: {e}")
-
-                    # ---------- Save to persistent cache ----------
-                    shutil.copy2(wcs_fits, cached_wcs)
-                    shutil.copy2(out / astro_rel, cached_png)
-                    astro_cache[cache_key] = {
-                        "src_fp": src_fp,
-                        "object": obj,
-                        "updated": datetime.now().isoformat(timespec="seconds")
-                    }
-                    save_json(ASTRO_CACHE_INDEX, astro_cache)
-                    # ---------------------------------------------
 
-                else:
-                    print(f"\n[WARN] PNG astrométrie non généré: {obj}")
+def summary_record(item: dict) -> dict:
+    """Résumé compact d'un item (index + sitemap), sans les champs internes ni la fiche complète."""
+    return {k: item[k] for k in SUMMARY_FIELDS if k in item}
 
-            except Exception as e:
-                print(f"\n[WARN] Astrométrie échouée pour {obj}: {e}")
 
-        print("\n✅ Astrométrie: terminé.")
-    else:
-        print("[INFO] Astrométrie non exécutée (pas de session Nova).")
+def public_record(item: dict) -> dict:
+    """Fiche publique d'un item pour images.json (sans chemins locaux internes)."""
+    return {k: v for k, v in item.items() if not k.startswith("_")}
 
-    # Préparer une version "publique" des items pour images.json (sans chemins locaux internes)
-    # Prepare a "public" version for images.json (strip internal local paths)
-    items_public = []
-    for it in items:
-        it_pub = {k: v for k, v in it.items() if not k.startswith("_")}
-        items_public.append(it_pub)
+
+class PublicRecordSpool:
+    """
+    Fiches publiques du mode streaming: chaque fiche est sérialisée dans un fichier
+    temporaire dès que son groupe est rendu; seuls (date, position, taille) restent en
+    mémoire. `chunks()` produit images.json trié, identique à json.dumps(..., indent=2).
+    """
+
+    def __init__(self):
+        self.file = tempfile.TemporaryFile()
+        self.entries: list[tuple[str, int, int]] = []
+
+    def add(self, item: dict) -> None:
+        # élément d'un tableau indenté: json.dumps([fiche]) sans "[\n" ni "\n]"
+        data = json.dumps([public_record(item)], ensure_ascii=False, indent=2)[2:-2].encode("utf-8")
+        self.file.seek(0, os.SEEK_END)
+        self.entries.append((item.get("dateCreatedISO", ""), self.file.tell(), len(data)))
+        self.file.write(data)
+
+    def chunks(self):
+        """Tableau JSON, plus récent d'abord (même ordre stable que les résumés)."""
+        order = sorted(self.entries, key=lambda e: e[0], reverse=True)
+        if not order:
+            yield b"[]"
+            return
+        yield b"[\n"
+        for i, (_, offset, size) in enumerate(order):
+            self.file.seek(offset)
+            yield (b",\n" if i else b"") + self.file.read(size)
+        yield b"\n]"
+
+    def close(self) -> None:
+        self.file.close()
+
+
+def write_site_index(ctx: dict, images_json_items, index_items: list):
+    """
+    data/images.json, index.html (données embarquées) et assets statiques.
+    `images_json_items`: liste de fiches publiques, ou PublicRecordSpool (mode streaming).
+    """
+    manifest = ctx["manifest"]
 
     print("🧩 Écriture des fichiers du site...")
 
-    (out / "data/images.json").write_text(
-        json.dumps(items_public, ensure_ascii=False, indent=2),
-        encoding="utf-8"
-    )
+    if isinstance(images_json_items, PublicRecordSpool):
+        manifest.write_chunks("data/images.json", images_json_items.chunks())
+    else:
+        manifest.write_text("data/images.json", json.dumps(images_json_items, ensure_ascii=False, indent=2))
 
-    og_img = items[0]["thumbnailUrlAbs"] if items else (BASE_URL.rstrip("/") + "/")
+    og_img = index_items[0]["thumbnailUrlAbs"] if index_items else (BASE_URL.rstrip("/") + "/")
     og_index = og_meta(SITE_TITLE, "Galerie astrophotographie — Seestar S50", og_img, BASE_URL.rstrip("/") + "/index.html")
 
     index_html = build_index_html(SITE_TITLE, og_index)
     index_html = index_html.replace(
         '<script id="images-data" type="application/json"></script>',
         '<script id="images-data" type="application/json">\n' +
-        json.dumps(items, ensure_ascii=False) +
+        json.dumps(index_items, ensure_ascii=False) +
         '\n</script>'
     )
-    (out / "index.html").write_text(index_html, encoding="utf-8")
+    manifest.write_text("index.html", index_html)
 
-    (out / "assets/js/app.js").write_text(build_app_js(), encoding="utf-8")
-    (out / "assets/css/styles.css").write_text(build_styles_css(), encoding="utf-8")
+    manifest.write_text("assets/js/app.js", build_app_js())
+    manifest.write_text("assets/css/styles.css", build_styles_css())
+
+
+def finalize_site(ctx: dict, object_urls: list[str]) -> list[str]:
+    """robots.txt + sitemap.xml, suppression des sorties obsolètes, sauvegarde du manifeste."""
+    manifest = ctx["manifest"]
+    manifest.write_text("robots.txt", "User-agent: *\nAllow: /\nSitemap: sitemap.xml\n")
+
+    manifest.write_bytes("sitemap.xml", build_sitemap_xml(["index.html"] + object_urls, BASE_URL))
+
+    store = manifest.asset_store
+    if store is not None:
+        # Nom logique -> chemin haché, et en-têtes de cache longue durée pour a/*
+        manifest.write_text("data/assets.json", json.dumps(store.logical, ensure_ascii=False, indent=2, sort_keys=True))
+        manifest.write_text("_headers", IMMUTABLE_HEADERS)
+        store.save()
+        print(f"[INFO] Assets adressés par contenu: {len(set(store.logical.values()))} fichier(s) "
+              f"pour {len(store.logical)} nom(s) logique(s), {store.hashed} hash calculé(s)")
+
+    removed = manifest.remove_stale()
+    manifest.save()
+    return removed
+
+
+# ------------------------------------------------------------
+# Pipeline streaming: enrich -> solve -> chart -> weather -> render, objet par objet
+# ------------------------------------------------------------
+def plan_object_groups(jpgs: list[Path], ctx: dict) -> list[tuple]:
+    """
+    Pré-passe légère (métadonnées FITS seulement): (objet, jpg, fits, meta) triés par objet,
+    pour que chaque groupe soit contigu et puisse être publié dès qu'il est complet.
+    """
+    plan = []
+    for jpg_path in jpgs:
+        fits_path, meta = read_item_meta(jpg_path, ctx)
+        plan.append((object_name_from_meta(jpg_path, meta), jpg_path, fits_path, meta))
+    plan.sort(key=lambda row: row[0])
+    return plan
+
+
+def stream_enrich(plan: list[tuple], ctx: dict):
+    for obj_name, rows in groupby(plan, key=lambda row: row[0]):
+        yield obj_name, [build_item(jpg_path, fits_path, meta, ctx) for _, jpg_path, fits_path, meta in rows]
 
-    # Object pages
-    object_urls = []
-    WEATHER_DONE = 0
-    WEATHER_TOTAL = len(object_groups)
 
-    for obj_name, group_items in object_groups.items():
+def stream_solve(groups, ctx: dict):
+    for obj_name, group_items in groups:
         group_items.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+        if ctx["nova_session"]:
+            solve_items_astrometry(astrometry_targets(group_items), ctx)
+        yield obj_name, group_items
 
-        top = group_items[0]
-        page_rel = f"gallery/{slugify(obj_name)}.html"
-        page_url_abs = BASE_URL.rstrip("/") + "/" + page_rel
 
-        og_obj = og_meta(
-            f"{obj_name} — {SITE_TITLE}",
-            top.get("description", f"Astrophotographie: {obj_name}"),
-            top["thumbnailUrlAbs"],
-            page_url_abs
-        )
+def stream_weather(groups, ctx: dict):
+    for obj_name, group_items in groups:
+        # Bloc météo du héros, seulement si la page doit être re-rendue (comme en mode dag)
+        prefetch_weather(obj_name, group_items, ctx)
+        yield obj_name, group_items
 
-        jsonld = image_jsonld(top, page_url_abs)
 
-        page = build_object_page_html(
-            SITE_TITLE,
-            obj_name,
-            json.dumps(jsonld, ensure_ascii=False, indent=2),
-            og_obj,
-            group_items
-        )
+def stream_render(groups, ctx: dict):
+    for obj_name, group_items in groups:
+        page_rel = render_object_page(obj_name, group_items, ctx)
+        ctx["weather_blocks"].pop(obj_name, None)
+        yield page_rel, group_items
+
+
+def plan_hero_jpgs(plan: list[tuple]) -> list[str]:
+    """Image héros de chaque groupe (la plus récente), connue dès la pré-passe."""
+    def _date_iso(meta: dict) -> str:
+        dt = parse_date(meta.get("date_obs", ""))
+        return dt.isoformat() if dt else ""
+
+    heroes = []
+    for _, rows in groupby(plan, key=lambda row: row[0]):
+        rows = sorted(rows, key=lambda row: _date_iso(row[3]), reverse=True)
+        heroes.append(str(rows[0][1]))
+    return heroes
 
-        page_path = out / "gallery" / f"{slugify(obj_name)}.html"
-        page_path.write_text(page, encoding="utf-8")
+
+def stream_gallery(jpgs: list[Path], ctx: dict) -> tuple[list, PublicRecordSpool, list[str]]:
+    """
+    Retourne (résumés des items, fiches publiques pour images.json, pages objet) — seul un
+    groupe complet est en mémoire à la fois, les fiches complètes vont dans un fichier temporaire.
+    """
+    global WEATHER_DONE, WEATHER_TOTAL
+    plan = plan_object_groups(jpgs, ctx)
+    run_deepzoom_stage(plan_hero_jpgs(plan), ctx)
+    n_groups = len({row[0] for row in plan})
+    WEATHER_DONE = 0
+    WEATHER_TOTAL = n_groups
+    ctx["weather_blocks"] = {}
+
+    summaries = []
+    records = PublicRecordSpool()
+    object_urls = []
+    pipeline = stream_render(stream_weather(stream_solve(stream_enrich(plan, ctx), ctx), ctx), ctx)
+    for done, (page_rel, group_items) in enumerate(pipeline, start=1):
+        pct = (done / max(1, n_groups)) * 100.0
+        print(f"🚿 Streaming: {done}/{n_groups} ({pct:5.1f}%) — {page_rel}")
         object_urls.append(page_rel)
+        for it in group_items:
+            summaries.append(summary_record(it))
+            records.add(it)
+
+    summaries.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+    return summaries, records, object_urls
+
+
+# ------------------------------------------------------------
+# Pipeline dag: graphe de tâches par observation (réseau / CPU en parallèle)
+# ------------------------------------------------------------
+def prefetch_weather(obj_name: str, group_items: list, ctx: dict):
+    """
+    Tâche réseau: bloc météo de l'image héros, seulement si la page objet doit être re-rendue
+    (signature calculée après l'astrométrie du groupe, comme dans render_object_page).
+    """
+    page_rel, page_sig = object_page_signature(obj_name, group_items, ctx)
+    if ctx["manifest"].is_current(page_rel, page_sig):
+        return
+    # group_items est trié (plus récent en premier) par object_page_signature
+    ctx["weather_blocks"][obj_name] = space_weather_block_for(group_items[0], obj_name)
+
 
-    (out / "robots.txt").write_text(
-        "User-agent: *\nAllow: /\nSitemap: sitemap.xml\n",
-        encoding="utf-8"
+def schedule_group(sched: StageScheduler, obj_name: str, group_items: list, ctx: dict, on_page) -> None:
+    """
+    Tâche CPU: trie le groupe enrichi et planifie solve (réseau) -> rendu (CPU) -> météo
+    (réseau, sautée si la page est inchangée), puis la page objet (CPU). Les tâches des
+    autres objets occupent les pools pendant ce temps.
+    """
+    group_items.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+    # Pyramide du héros attachée tout de suite: images.json l'inclut même si la page échoue
+    attach_deepzoom(group_items[0], ctx)
+    tasks = []
+    if ctx["nova_session"]:
+        for it in astrometry_targets(group_items):
+            solved = sched.submit(f"solve:{it['_jpgStem']}", NET, solve_item_wcs, it, ctx)
+            tasks.append(sched.submit(
+                f"astrometry:{it['_jpgStem']}", CPU,
+                lambda it=it, solved=solved: render_item_astrometry(it, solved.result(), ctx),
+                deps=[solved],
+            ))
+    # La signature de la page dépend des champs ajoutés par l'astrométrie (URL PNG / carte, centre WCS)
+    weather = sched.submit(f"weather:{obj_name}", NET, prefetch_weather, obj_name, group_items, ctx, deps=tasks)
+    sched.submit(
+        f"page:{obj_name}", CPU,
+        lambda: on_page(render_object_page(obj_name, group_items, ctx)),
+        deps=[weather],
     )
 
-    write_sitemap(out, ["index.html"] + object_urls, BASE_URL)
+
+def schedule_gallery(jpgs: list[Path], ctx: dict) -> tuple[list, list[str]]:
+    """
+    Pipeline dag: pour chaque objet, enrichissement SIMBAD (réseau) -> solve Nova (réseau)
+    -> PNG + carte (CPU) et météo (réseau) -> page objet (CPU). Les tâches indépendantes de
+    tous les objets s'exécutent en même temps, dans la limite de NET_WORKERS / CPU_WORKERS.
+    Retourne (items triés, pages objet).
+    """
+    global WEATHER_DONE, WEATHER_TOTAL
+    plan = plan_object_groups(jpgs, ctx)
+    run_deepzoom_stage(plan_hero_jpgs(plan), ctx)
+    groups = [(obj_name, list(rows)) for obj_name, rows in groupby(plan, key=lambda row: row[0])]
+    WEATHER_DONE = 0
+    WEATHER_TOTAL = len(groups)
+    ctx["weather_blocks"] = {}
+
+    items = []
+    object_urls = []
+
+    def _page_done(page_rel: str):
+        object_urls.append(page_rel)
+        print(f"🧭 Dag: {len(object_urls)}/{len(groups)} — {page_rel}")
+
+    with StageScheduler({NET: NET_WORKERS, CPU: CPU_WORKERS}) as sched:
+        print(f"[INFO] Pipeline dag: {len(groups)} objet(s), {NET_WORKERS} tâche(s) réseau / {CPU_WORKERS} CPU")
+        for obj_name, rows in groups:
+            built = [
+                sched.submit(f"enrich:{jpg_path.name}", NET, build_item, jpg_path, fits_path, meta, ctx)
+                for _, jpg_path, fits_path, meta in rows
+            ]
+
+            def _group(obj_name=obj_name, built=built):
+                group_items = [f.result() for f in built]
+                items.extend(group_items)
+                schedule_group(sched, obj_name, group_items, ctx, _page_done)
+
+            sched.submit(f"group:{obj_name}", CPU, _group, deps=built)
+
+        for name, exc in sched.join():
+            print(f"[WARN] Tâche {name} échouée: {exc}")
+
+    items.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+    object_urls.sort()
+    return items, object_urls
+
+
+# ------------------------------------------------------------
+# MAIN
+# ------------------------------------------------------------
+def load_build_state(root: Path, state: dict | None = None) -> dict:
+    """
+    Charge (ou recharge si modifié) tout ce qui peut rester en mémoire entre deux builds:
+    catalogues XLSX, caches SIMBAD / astrométrie / cartes, index de scan, session Nova.
+    Loads (or reloads when changed) everything that can stay in memory between builds.
+    """
+    global SIMBAD_LOCAL
+    state = {} if state is None else state
+    script_dir = Path(__file__).resolve().parent
+
+    # Messier catalog
+    messier_xlsx = find_messier_xlsx(script_dir, root)
+    messier_fp = file_fingerprint(messier_xlsx) if messier_xlsx else ""
+    if "messier_db" not in state or state.get("messier_fp") != messier_fp:
+        messier_db = {}
+        if messier_xlsx:
+            try:
+                messier_db = load_messier_catalog(messier_xlsx)
+                print(f"[INFO] Catalogue Messier chargé: {messier_xlsx} ({len(messier_db)} entrées)")
+            except Exception as e:
+                print(f"[WARN] Lecture catalogue Messier impossible: {messier_xlsx} ({e})")
+                messier_db = {}
+        else:
+            print(f"[INFO] Catalogue Messier introuvable (attendu: {MESSIER_XLSX_NAME} près du script).")
+        state.update(messier_xlsx=messier_xlsx, messier_fp=messier_fp, messier_db=messier_db)
+
+    # Catalogue d’objets divers (pour labels de la carte): objets <= mag 6
+    diverse_xlsx = find_diverse_xlsx(script_dir, root)
+    diverse_fp = file_fingerprint(diverse_xlsx) if diverse_xlsx else ""
+    if "diverse_catalog" not in state or state.get("diverse_fp") != diverse_fp:
+        diverse_catalog = []
+        if diverse_xlsx:
+            try:
+                diverse_catalog = load_diverse_catalog(diverse_xlsx)
+                print(f"[INFO] Catalogue objets divers chargé: {diverse_xlsx} ({len(diverse_catalog)} entrées)")
+            except Exception as e:
+                print(f"[WARN] Lecture catalogue objets divers impossible: {diverse_xlsx} ({e})")
+                diverse_catalog = []
+        else:
+            print(f"[INFO] Catalogue objets divers introuvable (attendu: {DIVERSE_XLSX_NAME} près du script).")
+        state.update(diverse_xlsx=diverse_xlsx, diverse_fp=diverse_fp, diverse_catalog=diverse_catalog)
+
+    # Magasin de cache unifié (SQLite WAL): anciens index JSON importés une seule fois
+    if "cache_store" not in state:
+        store = get_cache_store(root / CACHE_STORE_PATH)
+        for ns, legacy in LEGACY_JSON_CACHES.items():
+            n = store.import_json(ns, root / legacy)
+            if n:
+                print(f"[INFO] Cache: {n} entrée(s) importée(s) de {legacy} -> {CACHE_STORE_PATH} [{ns}]")
+        state["cache_store"] = store
+
+    # SIMBAD cache
+    if "cache" not in state:
+        state["cache"] = state["cache_store"].namespace("simbad")
+        upgrade_simbad_cache(state["cache"])
+
+    # Astrometry persistent cache (PNG/WCS dans cache/astrometry/, index dans le magasin)
+    if "astro_cache" not in state:
+        ASTRO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        state["astro_cache"] = state["cache_store"].namespace("astrometry")
+    if "star_cache" not in state:
+        state["star_cache"] = state["cache_store"].namespace("starcharts")
+
+    # Index de scan: gardé en mémoire, seuls les dossiers modifiés sont relus aux builds suivants
+    if "scan_index" not in state:
+        state["scan_index"] = ScanIndex(root / SCAN_INDEX_PATH if SCAN_INDEX_ENABLED else None, workers=SCAN_WORKERS)
+
+    # Index des en-têtes FITS: partagé par métadonnées, échelle Nova, météo et lecture image
+    if "fits_index" not in state:
+        state["fits_index"] = FitsHeaderIndex(root / FITS_INDEX_PATH if FITS_INDEX_ENABLED else None)
+        set_fits_index(state["fits_index"])
+
+    # Base SIMBAD locale: ouverte si tools/sync_simbad.py l'a remplie (rouverte en --watch après une synchro)
+    if state.get("simbad_local") is None:
+        state["simbad_local"] = simbad_local.open_local(root / SIMBAD_LOCAL_PATH)
+        if state["simbad_local"] is not None:
+            meta = state["simbad_local"].meta()
+            print(f"[INFO] Base SIMBAD locale: {state['simbad_local'].count()} objet(s) (synchro {meta.get('synced', '?')})")
+    SIMBAD_LOCAL = state["simbad_local"]
+
+    # Nova session
+    if "nova_session" not in state:
+        NOVA_API_KEY = os.environ.get("NOVA_ASTROMETRY_API_KEY", "").strip()
+        nova_session = None
+        if not NOVA_API_KEY:
+            print("[INFO] NOVA_ASTROMETRY_API_KEY non défini -> pas d'astrométrie (plate solve)")
+        else:
+            try:
+                nova_session = nova_login(NOVA_API_KEY)
+                print("[INFO] Nova: session OK")
+            except Exception as e:
+                print(f"[WARN] Login Nova impossible: {e}")
+                nova_session = None
+        state["nova_session"] = nova_session
+        if nova_session:
+            prepare_atlas_data()
+
+    # Processus de rendu (Hipparcos + constellations chargés une fois chacun); recréés si le catalogue change
+    if state.get("render_pool_fp") != diverse_fp:
+        if state.get("render_pool") is not None:
+            state["render_pool"].close()
+        state["render_pool"] = RenderPool(RENDER_WORKERS, CONSTELLATION_INDEX_JSON, state["diverse_catalog"])
+        state["render_pool_fp"] = diverse_fp
+
+    return state
+
+
+def build_gallery(root: Path, state: dict, incremental: bool = INCREMENTAL_BUILD):
+    """Génère site/ à partir de l'état chargé par load_build_state (build complet ou incrémental)."""
+    global SCAN_INDEX, WEATHER_DONE, WEATHER_TOTAL
+    out = root / "site"
+
+    cache = state["cache"]
+    nova_session = state["nova_session"]
+
+    diverse_mag_limit = float(os.environ.get("GNU_ASTRO_GALERY_DIVERSE_MAG_LIMIT", str(DIVERSE_LABEL_MAG_LIMIT_DEFAULT)))
+
+    # Empreintes des catalogues + du générateur: si elles changent, toutes les pages sont re-rendues.
+    # Catalog + generator fingerprints: any change invalidates every rendered page.
+    catalogs_fp = {
+        "messier": state["messier_fp"],
+        "diverse": state["diverse_fp"],
+        "generator": file_fingerprint(Path(__file__).resolve()),
+    }
+
+    # Rebuild site fresh (sauf en mode incrémental: le manifeste décide quoi réécrire)
+    if out.exists() and not incremental:
+        shutil.rmtree(out)
+    manifest = BuildManifest(
+        root / BUILD_MANIFEST_PATH,
+        out,
+        reset=not incremental,
+        publish_mode=PUBLISH_MODE,
+        asset_store=AssetStore(root / ASSET_STORE_PATH) if ASSET_STORE_ENABLED else None,
+    )
+    manifest.record_input("catalogs", catalogs_fp)
+    if incremental:
+        print(f"[INFO] Build incrémental (manifeste: {root / BUILD_MANIFEST_PATH})")
+    (out / "assets/css").mkdir(parents=True, exist_ok=True)
+    (out / "assets/js").mkdir(parents=True, exist_ok=True)
+    (out / "data").mkdir(parents=True, exist_ok=True)
+    (out / "gallery").mkdir(parents=True, exist_ok=True)
+    (out / "data/img").mkdir(parents=True, exist_ok=True)
+    (out / "astrometry").mkdir(parents=True, exist_ok=True)
+    (out / "data/solved").mkdir(parents=True, exist_ok=True)
+
+    # Une seule passe disque: JPG, vignettes et FITS empilés indexés par dossier (persistant si activé)
+    scan_index = state["scan_index"]
+    SCAN_INDEX = scan_index
+    jpgs = find_final_jpgs(root, index=scan_index)
+    if SCAN_INDEX_ENABLED:
+        scan_index.save()
+        print(f"[INFO] Index de scan: {scan_index.listed} dossier(s) relu(s), {scan_index.reused} inchangé(s)")
+    if not jpgs:
+        print("Aucun JPG final trouvé (hors dossiers *_sub/*-sub et hors fichiers *_thn.jpg).")
+        return
+
+    print(f"🔎 {len(jpgs)} image(s) à traiter (hors *_sub/*-sub et hors *_thn.jpg)...")
+
+    ctx = dict(
+        state,
+        out=out,
+        manifest=manifest,
+        catalogs_fp=catalogs_fp,
+        diverse_mag_limit=diverse_mag_limit,
+        root=root,
+    )
+
+    # Vignettes manquantes: générées en lot (pool de processus) avant les passes, cache par empreinte
+    ctx["generated_thumbs"] = ensure_thumbnails(
+        [j for j in jpgs if scan_index.thumbnail_for(j) is None],
+        root / THUMB_CACHE_DIR,
+        size=THUMB_SIZE,
+        workers=IMAGE_WORKERS,
+    )
+    ctx["image_variants"] = ensure_variants(
+        jpgs, root / VARIANT_CACHE_DIR, IMAGE_VARIANT_WIDTHS, workers=IMAGE_WORKERS
+    ) if IMAGE_VARIANT_WIDTHS else {}
+
+    # Identifiants SIMBAD absents du cache résolus en parallèle avant la passe 1
+    prefetch_simbad(jpgs, cache)
+
+    if PIPELINE_MODE == "stream":
+        print("[INFO] Pipeline streaming: chaque page objet est écrite dès que son groupe est complet")
+        summaries, records, object_urls = stream_gallery(jpgs, ctx)
+        try:
+            write_site_index(ctx, records, summaries)
+        finally:
+            records.close()
+        removed = finalize_site(ctx, object_urls)
+    elif PIPELINE_MODE == "dag":
+        items, object_urls = schedule_gallery(jpgs, ctx)
+        items_public = [public_record(it) for it in items]
+        write_site_index(ctx, items_public, items)
+        removed = finalize_site(ctx, object_urls)
+    else:
+        total = len(jpgs)
+        processed = 0
+        items = []
+        object_groups = {}
+
+        # Pass 1: build items
+        for jpg_path in jpgs:
+            processed += 1
+            pct = (processed / total) * 100.0
+            print(f"🛠️  Scan+tags: {processed}/{total} ({pct:5.1f}%)", end="\r")
+
+            fits_path, meta = read_item_meta(jpg_path, ctx)
+            item = build_item(jpg_path, fits_path, meta, ctx)
+
+            items.append(item)
+            object_groups.setdefault(item["objectName"], []).append(item)
+
+        print("\n✅ Tags + Messier: terminé (cache SIMBAD mis à jour).")
+
+        items.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+
+        # Pass 2: astrometry (optional) + persistent cache
+        if nova_session:
+            if ASTROMETRY_MODE == "all":
+                to_solve = [it for it in items if it.get("_fitsPath")]
+            else:
+                to_solve = []
+                for obj, group in object_groups.items():
+                    to_solve.extend(astrometry_targets(group))
+
+            print(f"[INFO] Astrométrie mode={ASTROMETRY_MODE} -> {len(to_solve)} solve(s)")
+
+            solve_items_astrometry(to_solve, ctx, progress=True)
+
+            print("\n✅ Astrométrie: terminé.")
+        else:
+            print("[INFO] Astrométrie non exécutée (pas de session Nova).")
+
+        # Pyramides DeepZoom des héros (optionnel), attachées avant images.json comme en mode stream
+        for group in object_groups.values():
+            group.sort(key=lambda x: x.get("dateCreatedISO", ""), reverse=True)
+        run_deepzoom_stage([group[0]["_jpgPath"] for group in object_groups.values()], ctx)
+        for group in object_groups.values():
+            attach_deepzoom(group[0], ctx)
+
+        # Préparer une version "publique" des items pour images.json (sans chemins locaux internes)
+        # Prepare a "public" version for images.json (strip internal local paths)
+        items_public = [public_record(it) for it in items]
+
+        write_site_index(ctx, items_public, items)
+
+        # Object pages (conditions météo des héros récupérées d'abord, en parallèle)
+        prefetch_weather_conditions([
+            hero_fits_path(max(group, key=lambda x: x.get("dateCreatedISO", "")))
+            for group in object_groups.values()
+        ])
+        object_urls = []
+        WEATHER_DONE = 0
+        WEATHER_TOTAL = len(object_groups)
+
+        for obj_name, group_items in object_groups.items():
+            object_urls.append(render_object_page(obj_name, group_items, ctx))
+
+        removed = finalize_site(ctx, object_urls)
+
+    # Conditions météo récupérées pendant le rendu des pages (hors pré-chargement): un seul lot
+    if HAS_SPACE_WEATHER and space_weather is not None:
+        space_weather.flush_cache()
+
+    if manifest.published:
+        print("[INFO] Publication: " + ", ".join(f"{mode}={n}" for mode, n in sorted(manifest.published.items())))
+    if incremental:
+        print(f"[INFO] Build incrémental: {manifest.written} fichier(s) écrit(s), "
+              f"{manifest.skipped} inchangé(s), {len(removed)} obsolète(s) supprimé(s)")
 
     print(f"✅ Galerie générée dans: {out}")
-    print(f"📌 Cache SIMBAD: {root / CACHE_PATH}")
-    print(f"📌 Cache astrométrie: {ASTRO_CACHE_DIR} (index: {ASTRO_CACHE_INDEX})")
+    print(f"📌 Cache SIMBAD: {CACHE_STORE_PATH} [simbad]")
+    print(f"📌 Cache astrométrie: {ASTRO_CACHE_DIR} (index: {CACHE_STORE_PATH} [astrometry])")
     if BASE_URL.startswith("https://example.com"):
         print("⚠️  Mets BASE_URL sur ton URL réelle si tu publies (sinon OG/sitemap ont une URL fictive).")
 
 
+def main():
+    root = Path(os.getcwd())
+    build_gallery(root, load_build_state(root))
+
+
+def watch_gallery():
+    """
+    Mode surveillance (--watch): catalogues, Hipparcos, lignes de constellations et caches
+    restent en mémoire; chaque changement dans MyWorks déclenche un build incrémental.
+    Watch mode: everything stays warm in memory; each change triggers an incremental build.
+    """
+    from astrogalery.watch import watch_changes, HAS_WATCHDOG
+
+    root = Path(os.getcwd())
+    state = load_build_state(root)
+    build_gallery(root, state, incremental=True)
+
+    extra_files = [p for p in (state.get("messier_xlsx"), state.get("diverse_xlsx")) if p]
+    backend = "watchdog" if HAS_WATCHDOG else "polling"
+    print(f"👀 Surveillance de {root} ({backend}, intervalle {WATCH_INTERVAL_S:g}s) — Ctrl+C pour arrêter")
+    try:
+        for changed in watch_changes(root, interval=WATCH_INTERVAL_S, extra_files=extra_files, workers=SCAN_WORKERS):
+            print(f"\n🔁 {len(changed)} changement(s) détecté(s) -> build incrémental")
+            try:
+                load_build_state(root, state)
+                build_gallery(root, state, incremental=True)
+            except Exception as e:
+                print(f"[WARN] Build (surveillance) échoué: {e}")
+    except KeyboardInterrupt:
+        print("\n[INFO] Surveillance arrêtée.")
+
+
 if __name__ == "__main__":
-    main()
+    if "--watch" in sys.argv[1:]:
+        watch_gallery()
+    else:
+        main()
@@ -22,11 +22,17 @@
 #
 # Cache:
 # - Un cache local léger évite de re-télécharger la même heure/site.
-#   Fichier: .cache/space_weather_cache.json (à côté du script principal)
+#   Magasin SQLite partagé cache/cache.sqlite (espace de noms "space_weather", une ligne par
+#   heure/site); repli sans le paquet astrogalery: .cache/space_weather_cache.json
+# - Le cache est chargé une seule fois par processus (WeatherCache); les nouvelles entrées
+#   restent en mémoire et sont écrites par lots (flush_cache: fin de l'étape météo, fin du
+#   build, sortie du processus).
 
 from __future__ import annotations
 
+import atexit
 import json
+import threading
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Optional, Tuple
@@ -34,8 +40,27 @@ from typing import Any, Dict, Optional, Tuple
 import requests
 from astropy.io import fits
 
-OPEN_METEO_URL = "https://archive-api.open-meteo.com/v1/archive"
+try:
+    # Index d'en-têtes FITS partagé avec generate_gallery.py (un seul parsing par FITS)
+    from astrogalery.fits_index import read_fits_header
+except Exception:  # pragma: no cover
+    read_fits_header = None  # type: ignore
+
+try:
+    # Session partagée (timeouts, nouvelles tentatives), limites par hôte + requêtes concurrentes
+    from astrogalery import http_client, net
+except Exception:  # pragma: no cover
+    http_client = None  # type: ignore
+    net = None  # type: ignore
+
+try:
+    # Magasin de cache SQLite unifié (upsert d'une seule entrée, lecteurs concurrents)
+    from astrogalery.cache import get_cache_store
+except Exception:  # pragma: no cover
+    get_cache_store = None  # type: ignore
 
+OPEN_METEO_URL = "https://archive-api.open-meteo.com/v1/archive"
+WEATHER_CACHE_NS = "space_weather"
 
 def _cache_path() -> Path:
     return Path(".cache") / "space_weather_cache.json"
@@ -61,6 +86,69 @@ def _save_cache(cache: Dict[str, Any]) -> None:
         pass
 
 
+class WeatherCache:
+    """
+    Cache météo du processus: chargé au premier accès, entrées nouvelles gardées en mémoire
+    (`dirty`) et écrites d'un bloc par `flush`. Sûr entre threads (pipeline dag).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Optional[Dict[str, Any]] = None
+        self._dirty: Dict[str, Any] = {}
+
+    def _loaded(self) -> Dict[str, Any]:
+        # Appelé avec le verrou
+        if self._data is None:
+            if get_cache_store is not None:
+                self._data = get_cache_store().items(WEATHER_CACHE_NS)
+            else:
+                self._data = _load_cache()
+        return self._data
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._loaded().get(key)
+
+    def keys(self) -> set:
+        with self._lock:
+            return set(self._loaded())
+
+    def put(self, key: str, value: Dict[str, Any]) -> None:
+        with self._lock:
+            self._loaded()[key] = value
+            self._dirty[key] = value
+
+    def flush(self) -> int:
+        """Écrit les entrées en attente (une transaction); retourne leur nombre."""
+        with self._lock:
+            if not self._dirty:
+                return 0
+            dirty, self._dirty = self._dirty, {}
+            try:
+                if get_cache_store is not None:
+                    get_cache_store().set_many(WEATHER_CACHE_NS, dirty)
+                else:
+                    _save_cache(self._loaded())
+            except Exception:
+                # Cache best-effort: nouvel essai au prochain flush
+                self._dirty = {**dirty, **self._dirty}
+                return 0
+            return len(dirty)
+
+
+_WEATHER_CACHE = WeatherCache()
+
+
+def flush_cache() -> int:
+    """Écrit les conditions météo récupérées depuis le dernier flush (fin d'étape / de build)."""
+    return _WEATHER_CACHE.flush()
+
+
+# Entrées encore en mémoire à la sortie du processus (build interrompu, usage hors pipeline)
+atexit.register(flush_cache)
+
+
 def _parse_date_obs(date_obs: str) -> Optional[datetime]:
     if not date_obs:
         return None
@@ -89,8 +177,10 @@ def extract_site_time_from_fits(fits_path: str | Path) -> Optional[Tuple[datetim
 
     # Seestar / astrometry downloads may produce header-only FITS or non-standard cards.
     # ignore_missing_simple=True makes Astropy more tolerant.
-    with fits.open(fp, ignore_missing_simple=True) as hdul:
-        hdr = hdul[0].header
+    hdr = read_fits_header(fp) if read_fits_header is not None else None
+    if hdr is None:
+        with fits.open(fp, ignore_missing_simple=True) as hdul:
+            hdr = hdul[0].header
 
     lat = hdr.get("SITELAT")
     lon = hdr.get("SITELONG")
@@ -109,14 +199,19 @@ def extract_site_time_from_fits(fits_path: str | Path) -> Optional[Tuple[datetim
         return None
 
 
-def fetch_openmeteo_conditions(dt_utc: datetime, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+def _cache_key(dt_utc: datetime, lat: float, lon: float) -> str:
     # Cache key: hour + rounded lat/lon to reduce duplicates
     hour = dt_utc.replace(minute=0, second=0, microsecond=0)
-    key = f"{hour.isoformat()}|{lat:.4f}|{lon:.4f}"
+    return f"{hour.isoformat()}|{lat:.4f}|{lon:.4f}"
 
-    cache = _load_cache()
-    if key in cache:
-        return cache[key]
+
+def fetch_openmeteo_conditions(dt_utc: datetime, lat: float, lon: float) -> Optional[Dict[str, Any]]:
+    hour = dt_utc.replace(minute=0, second=0, microsecond=0)
+    key = _cache_key(dt_utc, lat, lon)
+
+    cached = _WEATHER_CACHE.get(key)
+    if cached is not None:
+        return cached
 
     params = {
         "latitude": lat,
@@ -133,7 +228,10 @@ def fetch_openmeteo_conditions(dt_utc: datetime, lat: float, lon: float) -> Opti
         "timezone": "UTC",
     }
 
-    r = requests.get(OPEN_METEO_URL, params=params, timeout=30)
+    if http_client is not None:
+        r = http_client.get(OPEN_METEO_URL, params=params)
+    else:
+        r = requests.get(OPEN_METEO_URL, params=params, timeout=30)
     r.raise_for_status()
     data = r.json()
 
@@ -160,11 +258,46 @@ def fetch_openmeteo_conditions(dt_utc: datetime, lat: float, lon: float) -> Opti
         "source": "Open-Meteo archive (UTC)",
     }
 
-    cache[key] = out
-    _save_cache(cache)
+    _WEATHER_CACHE.put(key, out)
     return out
 
 
+def prefetch_conditions(fits_paths) -> Tuple[int, int]:
+    """
+    Récupère en parallèle les heures/sites absents du cache pour une liste de FITS
+    (pages objet rendues ensuite sans attente réseau), puis écrit le cache d'un bloc.
+    Retourne (heures/sites récupérés, requêtes en échec ou sans donnée).
+    """
+    cached = _WEATHER_CACHE.keys()
+    todo: Dict[str, Tuple[datetime, float, float]] = {}
+    for fp in fits_paths:
+        try:
+            info = extract_site_time_from_fits(fp)
+        except Exception:
+            info = None
+        if info and _cache_key(*info) not in cached:
+            todo.setdefault(_cache_key(*info), info)
+    if not todo:
+        return 0, 0
+
+    def _fetch(info):
+        return fetch_openmeteo_conditions(*info)
+
+    if net is not None:
+        results = net.run_concurrently(_fetch, list(todo.values()), concurrency=net.host_concurrency(OPEN_METEO_URL))
+    else:
+        results = []
+        for info in todo.values():
+            try:
+                results.append(_fetch(info))
+            except Exception as e:
+                results.append(e)
+    # Fin de l'étape météo: toutes les nouvelles heures/sites écrites en une fois
+    flush_cache()
+    fetched = sum(1 for res in results if res is not None and not isinstance(res, Exception))
+    return fetched, len(todo) - fetched
+
+
 def render_space_weather_block(fits_path: str | Path) -> str:
     info = extract_site_time_from_fits(fits_path)
     if not info:
@@ -0,0 +1,96 @@
+"""Banc d'essai: lecteur brut d'en-têtes FITS vs astropy.
+
+FR:
+    python tools/bench_fits_header.py <dossier MyWorks> [--repeat 3]
+    Mesure la lecture des cartes utiles (OBJECT, DATE-OBS, SITELAT, ...) sur tous les
+    FITS `Stacked*` du dossier, vérifie que les deux lecteurs donnent les mêmes valeurs
+    et affiche l'accélération.
+
+EN:
+    python tools/bench_fits_header.py <MyWorks folder> [--repeat 3]
+    Times reading the useful cards (OBJECT, DATE-OBS, SITELAT, ...) from every
+    `Stacked*` FITS in the folder, checks that both readers agree and prints the speedup.
+"""
+
+from __future__ import annotations
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from astropy.io import fits  # noqa: E402
+
+from astrogalery.fits_header import read_raw_header  # noqa: E402
+
+KEYWORDS = (
+    "OBJECT", "DATE-OBS", "EXPTIME", "FILTER", "TELESCOP", "INSTRUME", "OBSERVER",
+    "RA", "DEC", "FOCALLEN", "XPIXSZ", "SITELAT", "SITELONG", "CRVAL1", "CRVAL2",
+)
+
+
+def read_astropy(p: Path) -> dict:
+    with fits.open(p, ignore_missing_simple=True) as hdul:
+        h = hdul[0].header
+        return {k: h.get(k) for k in KEYWORDS if k in h}
+
+
+def read_raw(p: Path) -> dict | None:
+    cards = read_raw_header(p, KEYWORDS)
+    if cards is None:
+        return None
+    out: dict = {}
+    for kw, value, _ in cards:
+        out.setdefault(kw, value)
+    return out
+
+
+def bench(files: list[Path], reader, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for p in files:
+            reader(p)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("root", type=Path)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args(argv)
+
+    files = sorted(p for p in args.root.rglob("Stacked*.fit*") if p.is_file())
+    if not files:
+        print(f"Aucun FITS Stacked* sous {args.root}")
+        return 1
+
+    fallbacks = 0
+    mismatches = 0
+    for p in files:
+        raw = read_raw(p)
+        if raw is None:
+            fallbacks += 1
+            continue
+        ref = read_astropy(p)
+        if raw != ref:
+            mismatches += 1
+            print(f"[DIFF] {p}: brut={raw} astropy={ref}")
+
+    t_astropy = bench(files, read_astropy, args.repeat)
+    t_raw = bench(files, read_raw, args.repeat)
+
+    n = len(files)
+    print(f"{n} FITS, meilleur de {args.repeat} passe(s)")
+    print(f"  astropy : {t_astropy * 1000:9.1f} ms ({t_astropy / n * 1e6:8.1f} µs/fichier)")
+    print(f"  brut    : {t_raw * 1000:9.1f} ms ({t_raw / n * 1e6:8.1f} µs/fichier)")
+    print(f"  accélération: x{t_astropy / max(t_raw, 1e-9):.1f}")
+    print(f"  repli astropy: {fallbacks}, divergences: {mismatches}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+"""Synchronisation de la base SIMBAD locale (Messier, NGC, IC, Sharpless, étoiles brillantes).
+
+FR:
+    python tools/sync_simbad.py [--db cache/simbad_local.sqlite] [--bright-mag 6.5]
+    À lancer depuis le dossier de la galerie (comme generate_gallery.py). Télécharge le
+    sous-ensemble `basic` + `ident` via TAP et remplace le contenu de la base; les builds
+    suivants résolvent ces objets et leurs cartes atlas sans réseau.
+
+EN:
+    python tools/sync_simbad.py [--db cache/simbad_local.sqlite] [--bright-mag 6.5]
+    Run from the gallery folder (like generate_gallery.py). Downloads the `basic` + `ident`
+    subset over TAP and replaces the database content; later builds resolve these objects
+    and their atlas charts without network.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from astrogalery.enrich import simbad_local  # noqa: E402
+from astrogalery.enrich.simbad_client import SIMBAD_TAP_DEFAULT  # noqa: E402
+
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--db", type=Path, default=Path(os.environ.get("GNU_ASTRO_GALERY_SIMBAD_DB", "cache/simbad_local.sqlite")))
+    ap.add_argument("--bright-mag", type=float, default=simbad_local.BRIGHT_STAR_MAG)
+    ap.add_argument("--tap", default=SIMBAD_TAP_DEFAULT)
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    db = simbad_local.SimbadLocal(args.db)
+    try:
+        stats = simbad_local.sync(db, tap_url=args.tap, bright_star_mag=args.bright_mag)
+        missing = simbad_local.missing_probes(db)
+    except RuntimeError as e:
+        print(f"[ERREUR] {e}")
+        return 1
+    finally:
+        db.close()
+    if missing:
+        print(f"[WARN] Identifiant(s) non résolu(s) par la base locale: {', '.join(missing)}")
+    print(f"✅ {args.db}: {stats['objects']} objet(s), {stats['idents']} identifiant(s) "
+          f"en {time.perf_counter() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())